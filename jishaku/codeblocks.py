@@ -2,11 +2,15 @@
 # SPDX-License-Identifier: MIT
 
 import collections
+import re
+import typing
 
-__all__ = ('Codeblock', 'codeblock_converter')
+__all__ = ('Codeblock', 'codeblock_converter', 'split_switches')
 
 Codeblock = collections.namedtuple('Codeblock', 'language content')
 
+SWITCH_PATTERN = re.compile(r'(--[a-z][a-z0-9_-]*)(?=[\s`]|$)')
+
 
 def codeblock_converter(argument):
     """
@@ -51,3 +55,23 @@ def codeblock_converter(argument):
         code[:] = last
 
     return Codeblock(''.join(language), ''.join(code[len(language):-backticks]))
+
+
+def split_switches(argument: str, switches: typing.Iterable[str]) -> typing.Tuple[typing.Set[str], str]:
+    """
+    Отделяет известные переключатели вида ``--proc`` от начала аргумента.
+
+    Возвращает найденные переключатели и остаток аргумента. Неизвестные переключатели остаются в аргументе.
+    """
+
+    found = set()
+    remaining = argument.lstrip()
+
+    while True:
+        match = SWITCH_PATTERN.match(remaining)
+
+        if not match or match.group(1) not in switches:
+            return found, remaining
+
+        found.add(match.group(1))
+        remaining = remaining[match.end():].lstrip()
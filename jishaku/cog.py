@@ -3,14 +3,23 @@
 
 from disnake.ext import commands
 
+from jishaku.features.cache import CacheFeature
+from jishaku.features.events import EventFeature
 from jishaku.features.filesystem import FilesystemFeature
 from jishaku.features.guild import GuildFeature
 from jishaku.features.invocation import InvocationFeature
 from jishaku.features.management import ManagementFeature
+from jishaku.features.memory import MemoryFeature
+from jishaku.features.metrics import MetricsFeature
 from jishaku.features.python import PythonFeature
 from jishaku.features.root_command import RootCommand
+from jishaku.features.shards import ShardFeature
 from jishaku.features.shell import ShellFeature
+from jishaku.features.stats import StatsFeature
+from jishaku.features.tasks import AsyncioFeature
 from jishaku.features.voice import VoiceFeature
+from jishaku.features.watchdog import WatchdogFeature
+from jishaku.modules import module_available
 
 __all__ = (
     "Jishaku",
@@ -19,15 +28,17 @@ __all__ = (
     "setup",
 )
 
-STANDARD_FEATURES = (VoiceFeature, GuildFeature, FilesystemFeature, InvocationFeature, ShellFeature, PythonFeature, ManagementFeature, RootCommand)
+STANDARD_FEATURES = (
+    VoiceFeature, GuildFeature, FilesystemFeature, InvocationFeature, ShellFeature, PythonFeature, ManagementFeature,
+    WatchdogFeature, AsyncioFeature, MemoryFeature, CacheFeature, ShardFeature, EventFeature, StatsFeature,
+    MetricsFeature, RootCommand
+)
 
 OPTIONAL_FEATURES = []
 
-try:
+# Сам youtube_dl не импортируется, пока не понадобится команде, здесь только проверяется, что он установлен
+if module_available('youtube_dl'):
     from jishaku.features.youtube import YouTubeFeature
-except ImportError:
-    pass
-else:
     OPTIONAL_FEATURES.insert(0, YouTubeFeature)
 
 
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import collections
+import time
+import typing
+
+__all__ = ('LogLinearHistogram', 'CommandStats', 'CommandStatsRecorder')
+
+
+class LogLinearHistogram:
+    """
+    Гистограмма задержек с фиксированными лог-линейными корзинами.
+
+    Каждая степень двойки микросекунд делится на ``2 ** sub_bucket_bits`` равных корзин,
+    так что относительная погрешность перцентилей не больше ``2 ** -sub_bucket_bits``.
+    Количество корзин постоянно, сколько бы значений ни было записано.
+    """
+
+    __slots__ = ('sub_bucket_bits', 'sub_buckets', 'buckets', 'count', 'total', 'max')
+
+    def __init__(self, sub_bucket_bits: int = 3, max_exponent: int = 37):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_buckets = 1 << sub_bucket_bits
+        self.buckets = [0] * (self.index((1 << max_exponent) - 1) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def index(self, microseconds: int) -> int:
+        """
+        Номер корзины для значения в микросекундах.
+        """
+
+        if microseconds < 2 * self.sub_buckets:
+            return microseconds
+
+        shift = microseconds.bit_length() - self.sub_bucket_bits - 1
+        return (shift + 1) * self.sub_buckets + (microseconds >> shift) - self.sub_buckets
+
+    def bounds(self, index: int) -> typing.Tuple[float, float]:
+        """
+        Нижняя и верхняя границы корзины в секундах.
+        """
+
+        if index < 2 * self.sub_buckets:
+            return index / 1e6, (index + 1) / 1e6
+
+        shift = index // self.sub_buckets - 1
+        mantissa = index % self.sub_buckets + self.sub_buckets
+
+        return (mantissa << shift) / 1e6, ((mantissa + 1) << shift) / 1e6
+
+    def record(self, seconds: float):
+        """
+        Записывает одно значение в секундах.
+        """
+
+        index = min(self.index(max(0, int(seconds * 1e6))), len(self.buckets) - 1)
+
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> typing.Optional[float]:
+        """
+        Оценка перцентиля в секундах: середина корзины, в которую он попадает.
+        """
+
+        if not self.count:
+            return None
+
+        target = max(1, round(fraction * self.count))
+        seen = 0
+
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+
+            if seen >= target:
+                low, high = self.bounds(index)
+                return min((low + high) / 2, self.max)
+
+        return self.max
+
+    def cumulative(self, bounds: typing.Sequence[float]) -> typing.Iterator[typing.Tuple[float, int]]:
+        """
+        Накопленные количества для возрастающих границ в секундах, как в корзинах гистограммы Prometheus.
+
+        Корзина относится к границе, если её середина не больше границы, так что результат приблизителен.
+        """
+
+        index = 0
+        seen = 0
+
+        for bound in bounds:
+            while index < len(self.buckets):
+                low, high = self.bounds(index)
+
+                if (low + high) / 2 > bound:
+                    break
+
+                seen += self.buckets[index]
+                index += 1
+
+            yield bound, seen
+
+    def nonzero(self) -> typing.Iterator[typing.Tuple[float, float, int]]:
+        """
+        Непустые корзины, как (нижняя граница, верхняя граница, количество).
+        """
+
+        for index, amount in enumerate(self.buckets):
+            if amount:
+                yield (*self.bounds(index), amount)
+
+
+class CommandStats:
+    """
+    Статистика одной команды: гистограмма задержек и количество ошибок.
+    """
+
+    __slots__ = ('histogram', 'errors')
+
+    def __init__(self):
+        self.histogram = LogLinearHistogram()
+        self.errors = 0
+
+    @property
+    def calls(self) -> int:
+        """
+        Всего завершённых вызовов, включая ошибки.
+        """
+
+        return self.histogram.count
+
+    @property
+    def error_rate(self) -> float:
+        """
+        Доля вызовов, завершившихся ошибкой.
+        """
+
+        return self.errors / self.calls if self.calls else 0.0
+
+
+class CommandStatsRecorder:
+    """
+    Учёт задержек вызовов команд по их полному имени.
+
+    Начало вызова запоминается по ключу (например, ID взаимодействия), а при завершении
+    задержка записывается в гистограмму команды. Незавершённых вызовов хранится не больше
+    ``pending_limit``; самые старые забываются, так что память ограничена.
+    """
+
+    def __init__(self, pending_limit: int = 1024):
+        self.pending_limit = pending_limit
+        self.pending: typing.OrderedDict[typing.Hashable, float] = collections.OrderedDict()
+        self.commands: typing.Dict[str, CommandStats] = {}
+
+    def start(self, key: typing.Hashable):
+        """
+        Запоминает начало вызова.
+        """
+
+        self.pending[key] = time.perf_counter()
+
+        if len(self.pending) > self.pending_limit:
+            self.pending.popitem(last=False)
+
+    def finish(self, key: typing.Hashable, name: str, failed: bool = False) -> typing.Optional[float]:
+        """
+        Записывает завершение вызова и возвращает его задержку, если его начало известно.
+        """
+
+        started = self.pending.pop(key, None)
+
+        if started is None:
+            return None
+
+        elapsed = time.perf_counter() - started
+
+        try:
+            stats = self.commands[name]
+        except KeyError:
+            stats = self.commands[name] = CommandStats()
+
+        stats.histogram.record(elapsed)
+
+        if failed:
+            stats.errors += 1
+
+        return elapsed
+
+    def reset(self):
+        """
+        Забывает всю статистику.
+        """
+
+        self.pending.clear()
+        self.commands.clear()
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import collections
+import time
+import typing
+from datetime import datetime, timezone
+
+__all__ = ('RateWindow', 'EventStats', 'ListenerStats', 'SteppedTimer', 'EventMetrics', 'event_shard')
+
+
+# События, в которых ID гильдии передаётся как ``id``, а не ``guild_id``
+GUILD_ID_EVENTS = {'GUILD_CREATE', 'GUILD_UPDATE', 'GUILD_DELETE'}
+
+
+class RateWindow:
+    """
+    Кольцо посекундных счётчиков для скользящих окон частоты до ``size`` секунд.
+
+    Ячейка переиспользуется, когда её секунда устаревает, так что память постоянна.
+    Ячеек на одну больше, чем ``size``, чтобы текущая неполная секунда не вытесняла самую старую из окна.
+    """
+
+    __slots__ = ('size', 'seconds', 'counts')
+
+    def __init__(self, size: int = 60):
+        self.size = size
+        self.seconds = [-1] * (size + 1)
+        self.counts = [0] * (size + 1)
+
+    def add(self, second: int, amount: int = 1):
+        """
+        Прибавляет к счётчику данной секунды.
+        """
+
+        slot = second % len(self.seconds)
+
+        if self.seconds[slot] != second:
+            self.seconds[slot] = second
+            self.counts[slot] = 0
+
+        self.counts[slot] += amount
+
+    def rate(self, window: int, second: int) -> float:
+        """
+        Средняя частота в секунду за последние ``window`` полных секунд до ``second``.
+        """
+
+        window = min(window, self.size)
+        oldest = second - window
+
+        total = sum(
+            count for stamp, count in zip(self.seconds, self.counts)
+            if oldest <= stamp < second
+        )
+
+        return total / window
+
+
+class EventStats:
+    """
+    Счётчики одного типа событий шлюза: количество, время разбора и частота.
+    """
+
+    __slots__ = ('count', 'parse_time', 'max_parse_time', 'window')
+
+    def __init__(self):
+        self.count = 0
+        self.parse_time = 0.0
+        self.max_parse_time = 0.0
+        self.window = RateWindow()
+
+    def add(self, elapsed: float, second: int):
+        """
+        Учитывает одно событие.
+        """
+
+        self.count += 1
+        self.parse_time += elapsed
+
+        if elapsed > self.max_parse_time:
+            self.max_parse_time = elapsed
+
+        self.window.add(second)
+
+
+class ListenerStats:
+    """
+    Счётчики одного обработчика событий: вызовы и время, которое он занимал цикл событий.
+    """
+
+    __slots__ = ('count', 'total_time', 'max_time')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def add(self, elapsed: float):
+        """
+        Учитывает один вызов.
+        """
+
+        self.count += 1
+        self.total_time += elapsed
+
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+
+class SteppedTimer:
+    """
+    Обёртка над awaitable обработчика, которая замеряет только время его шагов.
+
+    Пока обработчик ждёт (HTTP, ``asyncio.sleep``), цикл занят другими задачами, и это время не учитывается.
+    Шаги обходятся так же, как в :class:`jishaku.profiling.SteppedAwaitable`.
+    """
+
+    __slots__ = ('awaitable', 'name', 'record')
+
+    def __init__(self, awaitable: typing.Awaitable, name: str, record: typing.Callable[[str, float], None]):
+        self.awaitable = awaitable
+        self.name = name
+        self.record = record
+
+    def __await__(self):
+        perf_counter = time.perf_counter
+        iterator = self.awaitable.__await__()
+        value, error = None, None
+        elapsed = 0.0
+
+        try:
+            while True:
+                started = perf_counter()
+
+                try:
+                    yielded = iterator.throw(error) if error is not None else iterator.send(value)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    elapsed += perf_counter() - started
+
+                try:
+                    value, error = (yield yielded), None
+                except GeneratorExit:
+                    iterator.close()
+                    raise
+                except BaseException as exception:  # pylint: disable=broad-except
+                    value, error = None, exception
+        finally:
+            self.record(self.name, elapsed)
+
+
+def event_shard(event: str, data, shard_count: typing.Optional[int]) -> int:
+    """
+    Шард, на который пришло событие, по формуле разделения Discord.
+
+    Шлюз не сообщает шард в самом событии, поэтому он вычисляется по ID гильдии.
+    События без гильдии (например, личные сообщения) всегда приходят на шард 0.
+    """
+
+    if not isinstance(data, dict):
+        return 0
+
+    guild_id = data.get('guild_id') or (data.get('id') if event in GUILD_ID_EVENTS else None)
+
+    if not guild_id or not shard_count:
+        return 0
+
+    return (int(guild_id) >> 22) % shard_count
+
+
+class EventMetrics:
+    """
+    Учёт событий шлюза: количество и время разбора по типам и шардам, а также время каждого обработчика.
+
+    Разбор замеряется обёртками над обработчиками ``ConnectionState.parsers``, а обработчики -
+    через ``Client._run_event``, причём у обработчиков учитываются только их шаги, без ожиданий. Всё выполняется в потоке цикла событий, поэтому счётчики
+    обновляются без блокировок, а на событие уходят два замера времени и несколько сложений.
+
+    .. code:: python3
+
+        metrics = EventMetrics()
+        metrics.install(bot)
+
+        for event, stats in metrics.top_events(5):
+            print(event, stats.count)
+    """
+
+    def __init__(self):
+        self.events: typing.Dict[str, EventStats] = {}
+        self.shards: typing.Dict[int, RateWindow] = {}
+        self.shard_counts: typing.Counter[int] = collections.Counter()
+        self.listeners: typing.Dict[str, ListenerStats] = {}
+        self.started = datetime.now(timezone.utc)
+
+        self.bot = None
+        self.original_parsers: typing.Dict[str, typing.Callable] = {}
+        self.wrapped_parsers: typing.Dict[str, typing.Callable] = {}
+
+    @property
+    def installed(self) -> bool:
+        """
+        Установлен ли учёт.
+        """
+
+        return self.bot is not None
+
+    def reset(self):
+        """
+        Обнуляет все счётчики.
+        """
+
+        self.events.clear()
+        self.shards.clear()
+        self.shard_counts.clear()
+        self.listeners.clear()
+        self.started = datetime.now(timezone.utc)
+
+    def record_event(self, event: str, shard_id: int, elapsed: float):
+        """
+        Учитывает одно событие шлюза.
+        """
+
+        second = int(time.monotonic())
+
+        try:
+            stats = self.events[event]
+        except KeyError:
+            stats = self.events[event] = EventStats()
+
+        stats.add(elapsed, second)
+
+        try:
+            window = self.shards[shard_id]
+        except KeyError:
+            window = self.shards[shard_id] = RateWindow()
+
+        window.add(second)
+        self.shard_counts[shard_id] += 1
+
+    def record_listener(self, name: str, elapsed: float):
+        """
+        Учитывает один вызов обработчика.
+        """
+
+        try:
+            stats = self.listeners[name]
+        except KeyError:
+            stats = self.listeners[name] = ListenerStats()
+
+        stats.add(elapsed)
+
+    def wrap_parser(self, event: str, parser: typing.Callable, state) -> typing.Callable:
+        """
+        Оборачивает обработчик разбора одного типа событий замером времени.
+        """
+
+        perf_counter = time.perf_counter
+        record_event = self.record_event
+
+        def parse(data):
+            started = perf_counter()
+
+            try:
+                return parser(data)
+            finally:
+                record_event(event, event_shard(event, data, state.shard_count), perf_counter() - started)
+
+        return parse
+
+    def install(self, bot):
+        """
+        Начинает учёт событий бота.
+        """
+
+        if self.installed:
+            return
+
+        state = bot._connection  # pylint: disable=protected-access
+        parsers = state.parsers
+
+        self.original_parsers = dict(parsers)
+        self.wrapped_parsers = {
+            event: self.wrap_parser(event, parser, state)
+            for event, parser in self.original_parsers.items()
+        }
+
+        # Сокеты держат ссылку на этот же словарь, поэтому он изменяется на месте
+        parsers.update(self.wrapped_parsers)
+
+        original_run_event = bot._run_event  # pylint: disable=protected-access
+        record_listener = self.record_listener
+
+        async def _run_event(coro, event_name, *args, **kwargs):
+            def timed(*args, **kwargs):
+                return SteppedTimer(coro(*args, **kwargs), getattr(coro, '__qualname__', event_name), record_listener)
+
+            return await original_run_event(timed, event_name, *args, **kwargs)
+
+        bot._run_event = _run_event  # pylint: disable=protected-access
+        self.bot = bot
+
+    def uninstall(self):
+        """
+        Прекращает учёт событий, возвращая обработчики как были.
+        """
+
+        if not self.installed:
+            return
+
+        parsers = self.bot._connection.parsers  # pylint: disable=protected-access
+
+        for event, parser in self.original_parsers.items():
+            if parsers.get(event) is self.wrapped_parsers.get(event):
+                parsers[event] = parser
+
+        self.bot.__dict__.pop('_run_event', None)
+
+        self.bot = None
+        self.original_parsers = {}
+        self.wrapped_parsers = {}
+
+    def top_events(self, limit: int = 15) -> typing.List[typing.Tuple[str, EventStats]]:
+        """
+        Типы событий с наибольшим суммарным временем разбора.
+        """
+
+        return sorted(self.events.items(), key=lambda item: item[1].parse_time, reverse=True)[:limit]
+
+    def slowest_listeners(self, limit: int = 10) -> typing.List[typing.Tuple[str, ListenerStats]]:
+        """
+        Обработчики с наибольшим суммарным временем выполнения.
+        """
+
+        return sorted(self.listeners.items(), key=lambda item: item[1].total_time, reverse=True)[:limit]
+
+    def rates(self, window: int = 10) -> typing.Dict[int, float]:
+        """
+        Частота событий в секунду по шардам за последние ``window`` секунд.
+        """
+
+        second = int(time.monotonic())
+        return {shard_id: rate.rate(window, second) for shard_id, rate in sorted(self.shards.items())}
@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import collections
+import concurrent.futures
+import dis
+import hashlib
+import importlib
+import importlib.util
+import os
+import py_compile
+import sys
+import time
+import types
+import typing
+
+from jishaku.functools import executor_function
+
+__all__ = (
+    'ExtensionPlan', 'Fingerprint', 'ExtensionFingerprints', 'module_imports', 'prepare_extension',
+    'dependency_order', 'prepare_extensions', 'extension_files', 'file_fingerprint'
+)
+
+
+# ``preimport_errors`` - ошибки предварительного импорта сторонних модулей расширения, как (модуль, ошибка)
+ExtensionPlan = collections.namedtuple(
+    'ExtensionPlan', 'name imports prepare_time error preimport_errors', defaults=((),)
+)
+
+Fingerprint = collections.namedtuple('Fingerprint', 'mtime size digest')
+
+
+def is_submodule(parent: str, child: str) -> bool:
+    """
+    Является ли ``child`` модулем ``parent`` или им самим.
+    """
+
+    return parent == child or child.startswith(parent + '.')
+
+
+def code_imports(code: types.CodeType) -> typing.Iterator[typing.Tuple[str, int, typing.Tuple[str, ...]]]:
+    """
+    Импорты в байткоде и во всех вложенных объектах кода, как (модуль, уровень, импортируемые имена).
+    """
+
+    instructions = list(dis.get_instructions(code))
+
+    for index, instruction in enumerate(instructions):
+        if instruction.opname == 'IMPORT_NAME' and index >= 2:
+            level, fromlist = instructions[index - 2].argval, instructions[index - 1].argval
+            yield instruction.argval, level or 0, tuple(fromlist or ())
+
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            yield from code_imports(constant)
+
+
+def module_imports(source: str, name: str, is_package: bool = False, filename: str = '<unknown>') -> typing.Set[str]:
+    """
+    Имена модулей, которые исходный код импортирует, с разрешёнными относительными импортами.
+
+    Импорты берутся из скомпилированного байткода, а не из :mod:`ast`: построение дерева :mod:`ast`
+    в нескольких потоках одновременно в некоторых версиях CPython не потокобезопасно.
+    """
+
+    package = name if is_package else name.rpartition('.')[0]
+    imports = set()
+
+    for module, level, fromlist in code_imports(compile(source, filename, 'exec', dont_inherit=True)):
+        if level:
+            try:
+                module = importlib.util.resolve_name('.' * level + module, package)
+            except (ImportError, ValueError):
+                continue
+
+        imports.add(module)
+        # ``from package import module`` тоже может быть импортом модуля
+        imports.update(f"{module}.{member}" for member in fromlist if member != '*')
+
+    return imports
+
+
+def prepare_extension(name: str) -> ExtensionPlan:
+    """
+    Находит исходный код расширения, собирает его импорты и заранее компилирует его в кеш байткода,
+    чтобы загрузка в цикле событий только читала готовый байткод.
+
+    Ошибки не выбрасываются, а записываются в план; настоящую ошибку покажет сама загрузка.
+    """
+
+    started = time.perf_counter()
+
+    try:
+        spec = importlib.util.find_spec(name)
+
+        if spec is None or not spec.has_location or not spec.origin.endswith('.py'):
+            return ExtensionPlan(name, frozenset(), time.perf_counter() - started, None)
+
+        with open(spec.origin, encoding='utf-8') as source_file:
+            source = source_file.read()
+
+        imports = module_imports(source, name, spec.submodule_search_locations is not None, spec.origin)
+
+        if not sys.dont_write_bytecode:
+            py_compile.compile(
+                spec.origin,
+                cfile=importlib.util.cache_from_source(spec.origin),
+                doraise=True,
+                invalidation_mode=py_compile.PycInvalidationMode.TIMESTAMP
+            )
+    except Exception as exc:  # pylint: disable=broad-except
+        return ExtensionPlan(name, frozenset(), time.perf_counter() - started, f"{type(exc).__name__}: {exc}")
+
+    return ExtensionPlan(name, frozenset(imports), time.perf_counter() - started, None)
+
+
+def is_importing(name: str) -> bool:
+    """
+    Импортируется ли сейчас модуль или один из его родительских пакетов в каком-то потоке.
+    """
+
+    parts = name.split('.')
+
+    for index in range(1, len(parts) + 1):
+        module = sys.modules.get('.'.join(parts[:index]))
+        spec = getattr(module, '__spec__', None)
+
+        if getattr(spec, '_initializing', False):
+            return True
+
+    return False
+
+
+def preimport(names: typing.Sequence[str]) -> typing.List[typing.Tuple[str, str]]:
+    """
+    Импортирует сторонние модули одного пакета заранее, по порядку, чтобы загрузка расширений
+    нашла их в ``sys.modules``. Возвращает ошибки импорта как (модуль, ошибка).
+    """
+
+    errors = []
+
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ModuleNotFoundError as exc:
+            # Имя может и не быть модулем (например, ``from package import function``)
+            if exc.name != name:
+                errors.append((name, f"{type(exc).__name__}: {exc}"))
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append((name, f"{type(exc).__name__}: {exc}"))
+
+    return errors
+
+
+def dependency_order(plans: typing.Sequence[ExtensionPlan]) -> typing.List[str]:
+    """
+    Упорядочивает расширения так, чтобы расширение шло после расширений, которые оно импортирует.
+
+    Порядок без зависимостей сохраняется. Расширения в цикле импортов остаются в исходном порядке в конце.
+    """
+
+    names = [plan.name for plan in plans]
+    dependencies = {
+        plan.name: {
+            other for other in names
+            if other != plan.name and any(is_submodule(other, module) for module in plan.imports)
+        }
+        for plan in plans
+    }
+
+    order = []
+    done = set()
+
+    while len(order) < len(names):
+        ready = [name for name in names if name not in done and dependencies[name] <= done]
+
+        if not ready:
+            # Цикл импортов
+            order.extend(name for name in names if name not in done)
+            break
+
+        order.extend(ready)
+        done.update(ready)
+
+    return order
+
+
+async def prepare_extensions(
+    names: typing.Sequence[str], workers: int = 8
+) -> typing.Tuple[typing.List[ExtensionPlan], typing.List[str]]:
+    """
+    Подготавливает расширения в пуле потоков: компилирует их и заранее импортирует ещё не загруженные
+    сторонние модули, которые они используют.
+
+    Модули одного пакета импортируются в одном потоке, а модули, которые уже импортируются где-то ещё,
+    пропускаются. Ошибки предварительного импорта записываются в ``preimport_errors`` планов.
+
+    Возвращает планы расширений и порядок загрузки по зависимостям.
+    """
+
+    loop = asyncio.get_running_loop()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jishaku-load')
+
+    try:
+        plans = await asyncio.gather(*(loop.run_in_executor(pool, prepare_extension, name) for name in names))
+
+        packages = collections.defaultdict(list)
+
+        for module in sorted({
+            module
+            for plan in plans
+            for module in plan.imports
+            if module not in sys.modules and not is_importing(module)
+            and not any(is_submodule(name, module) for name in names)
+        }):
+            # Сортировка ставит пакет перед его подмодулями
+            packages[module.partition('.')[0]].append(module)
+
+        results = await asyncio.gather(*(loop.run_in_executor(pool, preimport, group) for group in packages.values()))
+    finally:
+        # При отмене gather уже отменил ожидающие задачи пула, а уже идущие импорты не ждём в потоке цикла
+        pool.shutdown(wait=False)
+
+    errors = dict(error for result in results for error in result)
+
+    plans = [
+        plan._replace(preimport_errors=tuple(
+            (module, errors[module]) for module in sorted(plan.imports) if module in errors
+        ))
+        for plan in plans
+    ]
+
+    return plans, dependency_order(plans)
+
+
+def extension_files(name: str) -> typing.List[typing.Tuple[str, str]]:
+    """
+    Исходные файлы загруженного расширения и его подмодулей, как (имя модуля, путь).
+    """
+
+    files = []
+
+    for module_name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+
+        if path and path.endswith('.py') and is_submodule(name, module_name):
+            files.append((module_name, path))
+
+    return sorted(files)
+
+
+def file_fingerprint(path: str, previous: Fingerprint = None) -> typing.Optional[Fingerprint]:
+    """
+    Отпечаток файла: время изменения, размер и хеш содержимого, или None, если файла нет.
+
+    Если время изменения и размер совпадают с ``previous``, файл не перечитывается.
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if previous is not None and previous.mtime == stat.st_mtime_ns and previous.size == stat.st_size:
+        return previous
+
+    with open(path, 'rb') as source_file:
+        digest = hashlib.sha256(source_file.read()).hexdigest()
+
+    return Fingerprint(stat.st_mtime_ns, stat.st_size, digest)
+
+
+class ExtensionFingerprints:
+    """
+    Отпечатки исходных файлов загруженных расширений, чтобы перезагружать только изменившиеся.
+
+    Изменившимся считается расширение, у которого содержимое какого-либо файла (самого модуля или подмодулей)
+    отличается от записанного. Файлы, у которых изменилось только время изменения, не считаются изменёнными.
+    """
+
+    def __init__(self):
+        self.files: typing.Dict[str, typing.Dict[str, typing.Optional[Fingerprint]]] = {}
+        self.imports: typing.Dict[str, typing.FrozenSet[str]] = {}
+
+    def forget(self, name: str):
+        """
+        Забывает отпечатки расширения.
+        """
+
+        self.files.pop(name, None)
+        self.imports.pop(name, None)
+
+    @executor_function
+    def record(self, names: typing.Iterable[str]):
+        """
+        Записывает отпечатки и импорты расширений в их текущем виде.
+        """
+
+        for name in names:
+            files = {}
+            imports = set()
+
+            for module_name, path in extension_files(name):
+                fingerprint = files[path] = file_fingerprint(path)
+
+                if fingerprint is None:
+                    continue
+
+                try:
+                    with open(path, encoding='utf-8') as source_file:
+                        imports.update(module_imports(
+                            source_file.read(), module_name, path.endswith('__init__.py'), path
+                        ))
+                except (OSError, SyntaxError, ValueError):
+                    pass
+
+            self.files[name] = files
+            self.imports[name] = frozenset(imports)
+
+    def changed(self, name: str) -> bool:
+        """
+        Изменилось ли расширение с момента записи. Неизвестные расширения не считаются изменёнными.
+        """
+
+        recorded = self.files.get(name, {})
+        changed = False
+
+        for path, previous in recorded.items():
+            current = file_fingerprint(path, previous)
+
+            if current is not None and previous is not None and current.digest == previous.digest:
+                # Совпадает содержимое, запоминаем новое время, чтобы не перечитывать файл снова
+                recorded[path] = current
+            elif current != previous:
+                changed = True
+
+        return changed
+
+    @executor_function
+    def stale(self, names: typing.Iterable[str]) -> typing.List[str]:
+        """
+        Расширения из ``names``, исходный код которых изменился с момента записи.
+        """
+
+        return [name for name in names if self.changed(name)]
+
+    def dependents(self, names: typing.Iterable[str], loaded: typing.Iterable[str]) -> typing.List[str]:
+        """
+        Расширения из ``names`` вместе со всеми загруженными расширениями, которые импортируют их, прямо или нет,
+        в порядке зависимостей: расширение идёт после тех, которые оно импортирует.
+
+        Порядок ``loaded`` для этого не годится: disnake переносит перезагруженное расширение в конец
+        ``bot.extensions``, и зависимое расширение, загруженное раньше, перезагрузилось бы со старым модулем.
+        """
+
+        loaded = list(loaded)
+        selected = set(names)
+        grown = True
+
+        while grown:
+            grown = False
+
+            for name in loaded:
+                if name in selected:
+                    continue
+
+                if any(is_submodule(other, module) for other in selected for module in self.imports.get(name, ())):
+                    selected.add(name)
+                    grown = True
+
+        names = [name for name in loaded if name in selected] + sorted(selected - set(loaded))
+
+        return dependency_order([
+            ExtensionPlan(name, self.imports.get(name, frozenset()), 0.0, None) for name in names
+        ])
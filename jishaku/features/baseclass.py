@@ -7,6 +7,7 @@ import contextlib
 import typing
 from datetime import datetime, timezone
 
+import aiohttp
 from disnake.ext import commands
 
 __all__ = (
@@ -51,6 +52,7 @@ class Feature(commands.Cog):
         self.start_time: datetime = datetime.utcnow().replace(tzinfo=timezone.utc)
         self.tasks = collections.deque()
         self.task_count: int = 0
+        self._http_session: typing.Optional[aiohttp.ClientSession] = None
 
         # Генерировать и прикрепить команды
         command_lookup = {}
@@ -113,6 +115,30 @@ class Feature(commands.Cog):
         # Не думайте, что это много, но все равно инициирует.
         super().__init__(*args, **kwargs)
 
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        """
+        Общая для всего кога сессия aiohttp, создаваемая при первом обращении.
+
+        Соединения переиспользуются между запросами, а DNS кэшируется. Сессия закрывается в `cog_unload`.
+        """
+
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300)
+            self._http_session = aiohttp.ClientSession(connector=connector)
+
+        return self._http_session
+
+    def cog_unload(self):
+        """
+        Закрывает общую сессию aiohttp при выгрузке кога.
+        """
+
+        if self._http_session is not None and not self._http_session.closed:
+            self.bot.loop.create_task(self._http_session.close())
+
+        super().cog_unload()
+
     async def cog_check(self, ctx: commands.Context):
         """
         Локальная проверка, делает все команды в полученных Cogs только владельца
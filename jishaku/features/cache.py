@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import io
+import json
+
+import disnake
+from disnake.ext import commands
+
+from jishaku.features.baseclass import Feature
+from jishaku.features.root_command import natural_size
+from jishaku.paginators import send_text
+from jishaku.state_cache import measure_cache
+
+
+def approximate_size(size_in_bytes: int) -> str:
+    """
+    `natural_size` с поддержкой нуля.
+    """
+
+    return natural_size(size_in_bytes) if size_in_bytes else "0 B"
+
+
+class CacheFeature(Feature):
+    """
+    Функция, содержащая команды для оценки кеша disnake
+    """
+
+    @Feature.Command(parent="jsk", name="cache", invoke_without_command=True)
+    async def jsk_cache(self, ctx: commands.Context, limit: int = 10):
+        """
+        Показывает количество объектов и примерный размер каждого хранилища кеша, а также самые большие гильдии.
+
+        Кеш обходится по частям, не блокируя цикл событий.
+        """
+
+        report = await measure_cache(self.bot)
+
+        lines = [
+            f"Кеш занимает примерно {approximate_size(report.size)} "
+            f"(обход занял {report.duration:.3f}сек в {report.slices} срезах).",
+            "",
+            f"{'хранилище':<28} {'объекты':>10} {'~размер':>12}"
+        ]
+
+        for name, stats in sorted(report.stores.items(), key=lambda item: item[1].size, reverse=True):
+            lines.append(f"{name:<28} {stats.count:>10} {approximate_size(stats.size):>12}")
+
+        top_guilds = report.top_guilds(limit)
+
+        if top_guilds:
+            lines.extend(["", f"Гильдии с наибольшим кешем ({len(top_guilds)} из {len(report.guilds)}):"])
+
+            for guild in top_guilds:
+                counts = ", ".join(f"{name} {stats.count}" for name, stats in guild.stores.items() if stats.count)
+                lines.append(f"{guild.name} ({guild.id}): ~{approximate_size(guild.size)}; {counts}")
+
+        await send_text(ctx, "\n".join(lines), "cache.txt", prefix='```prolog')
+
+    @Feature.Command(parent="jsk_cache", name="json")
+    async def jsk_cache_json(self, ctx: commands.Context, limit: int = None):
+        """
+        Отправляет отчёт о кеше файлом JSON, чтобы отслеживать его во времени.
+
+        Если указан лимит, в файл попадают только самые большие гильдии.
+        """
+
+        report = await measure_cache(self.bot)
+        data = json.dumps(report.to_dict(guild_limit=limit), indent=2, ensure_ascii=False)
+
+        await ctx.send(file=disnake.File(filename="cache.json", fp=io.BytesIO(data.encode('utf-8'))))
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import time
+from datetime import datetime, timezone
+
+from disnake.ext import commands
+
+from jishaku.event_metrics import EventMetrics
+from jishaku.features.baseclass import Feature
+from jishaku.flags import Flags
+from jishaku.paginators import send_text
+
+
+class EventFeature(Feature):
+    """
+    Функция, содержащая команды учёта событий шлюза
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.event_metrics = EventMetrics()
+
+    async def cog_load(self):
+        """
+        Включает учёт событий, если он включен флагом.
+        """
+
+        if Flags.EVENT_METRICS:
+            self.event_metrics.install(self.bot)
+
+        await super().cog_load()
+
+    def cog_unload(self):
+        """
+        Выключает учёт событий при выгрузке кога.
+        """
+
+        self.event_metrics.uninstall()
+
+        super().cog_unload()
+
+    @Feature.Command(parent="jsk", name="events", aliases=["event"], invoke_without_command=True)
+    async def jsk_events(self, ctx: commands.Context, limit: int = 15):
+        """
+        Показывает типы событий шлюза, которые дольше всего разбираются, частоту событий по шардам
+        и самые медленные обработчики.
+
+        Учёт включается `jsk events monitor on` или флагом JISHAKU_EVENT_METRICS.
+        """
+
+        metrics = self.event_metrics
+
+        if not metrics.installed and not metrics.events:
+            return await ctx.send("Учёт событий выключен, включите его `jsk events monitor on`.")
+
+        elapsed = (datetime.now(timezone.utc) - metrics.started).total_seconds()
+        rates = metrics.rates(10)
+        total = sum(stats.count for stats in metrics.events.values())
+
+        lines = [
+            f"{total} событий за {elapsed:.0f}сек, сейчас {sum(rates.values()):.1f} событий/с.",
+            "",
+            f"{'событие':<32} {'всего':>10} {'10с/с':>8} {'60с/с':>8} {'разбор':>10} {'сред.':>8} {'max':>8}"
+        ]
+
+        second = int(time.monotonic())
+
+        for event, stats in metrics.top_events(limit):
+            lines.append(
+                f"{event:<32} {stats.count:>10} {stats.window.rate(10, second):>8.1f} "
+                f"{stats.window.rate(60, second):>8.1f} {stats.parse_time * 1000:>8.0f}ms "
+                f"{stats.parse_time / stats.count * 1000:>6.2f}ms {stats.max_parse_time * 1000:>6.1f}ms"
+            )
+
+        lines.extend(["", "Шарды (событий всего, событий/с за 10с):"])
+        lines.append(", ".join(
+            f"{shard_id}: {metrics.shard_counts[shard_id]} ({rate:.1f}/s)" for shard_id, rate in rates.items()
+        ) or "нет")
+
+        listeners = metrics.slowest_listeners(limit)
+
+        if listeners:
+            lines.extend([
+                "", "Обработчики (время в цикле событий, без ожиданий):",
+                f"{'обработчик':<48} {'вызовы':>8} {'всего':>10} {'сред.':>8} {'max':>8}"
+            ])
+
+            for name, stats in listeners:
+                lines.append(
+                    f"{name:<48} {stats.count:>8} {stats.total_time * 1000:>8.0f}ms "
+                    f"{stats.total_time / stats.count * 1000:>6.2f}ms {stats.max_time * 1000:>6.1f}ms"
+                )
+
+        await send_text(ctx, "\n".join(lines), "events.txt", prefix='```prolog')
+
+    @Feature.Command(parent="jsk_events", name="monitor")
+    async def jsk_events_monitor(self, ctx: commands.Context, toggle: bool = None):
+        """
+        Включает или выключает учёт событий шлюза и времени обработчиков.
+        """
+
+        metrics = self.event_metrics
+
+        if toggle is None:
+            state = "включён" if metrics.installed else "выключен"
+            return await ctx.send(f"Учёт событий {state}.")
+
+        if toggle:
+            metrics.install(self.bot)
+            return await ctx.send("Учёт событий включён.")
+
+        metrics.uninstall()
+        await ctx.send("Учёт событий выключен. Собранные счётчики сохранены до `jsk events reset`.")
+
+    @Feature.Command(parent="jsk_events", name="reset", aliases=["clear"])
+    async def jsk_events_reset(self, ctx: commands.Context):
+        """
+        Обнуляет счётчики событий и обработчиков.
+        """
+
+        self.event_metrics.reset()
+        await ctx.send("Счётчики событий обнулены.")
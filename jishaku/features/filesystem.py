@@ -1,19 +1,49 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: MIT
 
+import codecs
 import io
 import os
 import pathlib
 import re
+import typing
 
-import aiohttp
 import disnake
 from disnake.ext import commands
 
 from jishaku.exception_handling import ReplResponseReactor
 from jishaku.features.baseclass import Feature
+from jishaku.flags import Flags
+from jishaku.functools import executor_function
 from jishaku.hljs import get_language, guess_file_traits
-from jishaku.paginators import PaginatorInterface, WrappedFilePaginator, use_file_check
+from jishaku.paginators import LazyFilePaginator, PaginatorInterface, WrappedPaginator, use_file_check
+
+
+@executor_function
+def read_line_span(path: str, line_span: typing.Tuple[int, int]) -> bytes:
+    """
+    Читает файл и возвращает заданный промежуток строк в UTF-8, вне цикла событий.
+    """
+
+    with open(path, 'rb') as file:
+        content, *_ = guess_file_traits(file.read())
+
+    return '\n'.join(content.split('\n')[line_span[0] - 1:line_span[1]]).encode('utf-8')
+
+
+@executor_function
+def build_file_paginator(source: typing.Union[str, typing.BinaryIO], **kwargs) -> LazyFilePaginator:
+    """
+    Создаёт :class:`LazyFilePaginator` вне цикла событий.
+
+    В потоке исполнителя нет цикла событий, поэтому индекс страниц строится там же целиком.
+    """
+
+    if isinstance(source, str):
+        with open(source, 'rb') as file:
+            return LazyFilePaginator(file, **kwargs)
+
+    return LazyFilePaginator(source, **kwargs)
 
 
 class FilesystemFeature(Feature):
@@ -53,30 +83,27 @@ class FilesystemFeature(Feature):
             return await ctx.send(f"`{path}`: Трусливый отказ читать файл без данных о размере"
                                   f" (он может быть пустым, бесконечным или недоступным).")
 
-        if size > 128 * (1024 ** 2):
-            return await ctx.send(f"`{path}`: Трусливо отказывается читать файл размером >128 МБ.")
+        if size > Flags.FILE_SIZE_LIMIT:
+            return await ctx.send(f"`{path}`: Трусливо отказывается читать файл размером >{Flags.FILE_SIZE_LIMIT // 1024 ** 2} МБ.")
 
         try:
-            with open(path, "rb") as file:
-                if use_file_check(ctx, size):
-                    if line_span:
-                        content, *_ = guess_file_traits(file.read())
-
-                        lines = content.split('\n')[line_span[0] - 1:line_span[1]]
-
-                        await ctx.send(file=disnake.File(
-                            filename=pathlib.Path(file.name).name,
-                            fp=io.BytesIO('\n'.join(lines).encode('utf-8'))
-                        ))
-                    else:
-                        await ctx.send(file=disnake.File(
-                            filename=pathlib.Path(file.name).name,
-                            fp=file
-                        ))
+            if use_file_check(ctx, size):
+                if line_span:
+                    content = await read_line_span(path, line_span)
+
+                    await ctx.send(file=disnake.File(
+                        filename=pathlib.Path(path).name,
+                        fp=io.BytesIO(content)
+                    ))
                 else:
-                    paginator = WrappedFilePaginator(file, line_span=line_span, max_size=1985)
-                    interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
-                    await interface.send_to(ctx)
+                    await ctx.send(file=disnake.File(
+                        filename=pathlib.Path(path).name,
+                        fp=path
+                    ))
+            else:
+                paginator = await build_file_paginator(path, line_span=line_span, max_size=1985)
+                interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+                await interface.send_to(ctx)
         except UnicodeDecodeError:
             return await ctx.send(f"`{path}`: Не удалось определить кодировку этого файла. ")
         except ValueError as exc:
@@ -88,45 +115,125 @@ class FilesystemFeature(Feature):
         Загрузите и отобразите текстовый файл из Интернета.
 
         Эта команда похожа на JSK Cat, но принимает URL.
+        Ответ читается потоком: пагинатор показывается до окончания загрузки,
+        а загрузка прерывается, как только ответ превышает ``FILE_SIZE_LIMIT``.
         """
 
         # Удалить встроенные маскировщики, если они присутствуют
         url = url.lstrip("<").rstrip(">")
+        limit = Flags.FILE_SIZE_LIMIT
 
         async with ReplResponseReactor(ctx.message):
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    data = await response.read()
-                    hints = (
-                        response.content_type,
-                        url
-                    )
-                    code = response.status
-
-            if not data:
-                return await ctx.send(f"HTTP-ответ был пустым (status code {code}).")
-
-            if use_file_check(ctx, len(data)):  # Файл «Полный контент» Предел предварительного просмотра
-                # Обнаружение мелкого языка
-                language = None
+            async with self.http_session.get(url) as response:
+                code = response.status
+                hints = (
+                    response.content_type,
+                    url
+                )
+
+                if response.content_length is not None and response.content_length > limit:
+                    return await ctx.send(f"Трусливо отказывается загружать ответ размером >{limit // 1024 ** 2} МБ."
+                                          f" (status code {code})")
+
+                chunks = response.content.iter_chunked(65536)
+                head = bytearray()
+                finished = True
+
+                # Начала ответа достаточно, чтобы выбрать между файлом и пагинатором
+                async for chunk in chunks:
+                    head += chunk
+
+                    if len(head) > 50_000:
+                        finished = False
+                        break
 
-                for hint in hints:
-                    language = get_language(hint)
+                if not head:
+                    return await ctx.send(f"HTTP-ответ был пустым (status code {code}).")
 
-                    if language:
-                        break
+                if finished and use_file_check(ctx, len(head)):  # Файл «Полный контент» Предел предварительного просмотра
+                    # Обнаружение мелкого языка
+                    language = None
+
+                    for hint in hints:
+                        language = get_language(hint)
+
+                        if language:
+                            break
+
+                    return await ctx.send(file=disnake.File(
+                        filename=f"ответ.{language or 'txt'}",
+                        fp=io.BytesIO(head)
+                    ))
+
+                probe = bytes(head)
+
+                if not finished:
+                    # Не обрезать символ посередине
+                    cut = probe.rfind(b'\n')
+                    probe = probe[:cut] if cut > 0 else probe.rstrip(bytes(range(0x80, 0x100)))
 
-                await ctx.send(file=disnake.File(
-                    filename=f"ответ.{language or 'txt'}",
-                    fp=io.BytesIO(data)
-                ))
-            else:
                 try:
-                    paginator = WrappedFilePaginator(io.BytesIO(data), language_hints=hints, max_size=1985)
-                except UnicodeDecodeError:
+                    _, encoding, language = guess_file_traits(probe)
+                except (UnicodeDecodeError, LookupError):
+                    # LookupError - кодировка из coding cookie неизвестна Python
+                    encoding, language = response.charset, None
+
+                decoder = None
+
+                if encoding:
+                    try:
+                        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+                    except LookupError:
+                        # Название кодировки из ответа неизвестно Python
+                        pass
+
+                if decoder is None:
                     return await ctx.send(f"Не удалось определить кодировку ответа. (status code {code})")
-                except ValueError as exc:
-                    return await ctx.send(f"Не удалось прочитать ответ (status code {code}), {exc}")
 
+                for hint in hints:
+                    if language:
+                        break
+
+                    language = get_language(hint)
+
+                paginator = WrappedPaginator(prefix=f'```{language or ""}', suffix='```', max_size=1985, force_wrap=True)
                 interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+
+                tail = ''
+
+                def split_lines(data: bytes, final: bool = False) -> typing.List[str]:
+                    nonlocal tail
+                    *lines, tail = (tail + decoder.decode(data, final)).split('\n')
+                    return lines
+
+                await interface.add_lines(split_lines(bytes(head)))
+
+                # Как и в jsk cat, показываем ответ с начала
+                interface.display_page = 0
                 await interface.send_to(ctx)
+
+                received = len(head)
+                truncated = False
+
+                async for chunk in chunks:
+                    if interface.closed:
+                        return
+
+                    received += len(chunk)
+
+                    if received > limit:
+                        truncated = True
+                        break
+
+                    await interface.add_lines(split_lines(chunk))
+
+                lines = split_lines(b'', final=True)
+
+                # Ответ, оканчивающийся переводом строки, не должен давать пустую последнюю строку
+                if tail:
+                    lines.append(tail)
+
+                if truncated:
+                    lines.append(f"[ответ обрезан после {limit} байт]")
+
+                await interface.add_lines(lines)
@@ -17,10 +17,12 @@ from disnake.ext.commands.slash_core import (
     SubCommand
 )
 
+from jishaku.codeblocks import split_switches
 from jishaku.exception_handling import ReplResponseReactor
 from jishaku.features.baseclass import Feature
 from jishaku.models import copy_context_with
-from jishaku.paginators import PaginatorInterface, WrappedPaginator, use_file_check
+from jishaku.paginators import PaginatorInterface, WrappedPaginator, send_text, use_file_check
+from jishaku.profiling import PROFILING_SESSIONS, StackSampler, render_flamegraph, session_from_switches
 
 UserIDConverter = commands.IDConverter[disnake.User]
 
@@ -124,8 +126,13 @@ class InvocationFeature(Feature):
     async def jsk_debug(self, ctx: commands.Context, *, command_string: str):
         """
         Запустите выполнение времени команды и улавливая исключения.
+
+        С ``--cprofile`` или ``--tracemalloc`` после выполнения присылается отчёт профилировщика.
         """
 
+        switches, command_string = split_switches(command_string, PROFILING_SESSIONS)
+        profiler = session_from_switches(switches)
+
         alt_ctx = await copy_context_with(ctx, content=ctx.prefix + command_string)
 
         if alt_ctx.command is None:
@@ -134,11 +141,67 @@ class InvocationFeature(Feature):
         start = time.perf_counter()
 
         async with ReplResponseReactor(ctx.message):
-            with self.submit(ctx):
-                await alt_ctx.command.invoke(alt_ctx)
+            with self.submit(ctx), profiler:
+                await profiler.wrap(alt_ctx.command.invoke(alt_ctx))
 
         end = time.perf_counter()
-        return await ctx.send(f"Команда `{alt_ctx.command.qualified_name}` выполнена за {end - start:.3f}сек.")
+        await ctx.send(f"Команда `{alt_ctx.command.qualified_name}` выполнена за {end - start:.3f}сек.")
+
+        report = profiler.report()
+
+        if report is not None:
+            await send_text(ctx, report, profiler.filename)
+
+    @Feature.Command(parent="jsk", name="profile", aliases=["prof"])
+    async def jsk_profile(self, ctx: commands.Context, *, command_string: str):
+        """
+        Запустите команду под выборочным профилировщиком.
+
+        Отправляет свёрнутые стеки, SVG-флеймграф и таблицу самых затратных функций.
+        Время, проведённое в ожидании, тоже учитывается.
+        """
+
+        alt_ctx = await copy_context_with(ctx, content=ctx.prefix + command_string)
+
+        if alt_ctx.command is None:
+            return await ctx.send(f'Команда "{alt_ctx.invoked_with}" не существует.')
+
+        sampler = StackSampler()
+
+        async with ReplResponseReactor(ctx.message):
+            with self.submit(ctx):
+                with sampler:
+                    # Задача создаётся уже под выборкой, иначе её начало прошло бы, пока ставится реакция
+                    sampler.task = self.bot.loop.create_task(alt_ctx.command.invoke(alt_ctx))
+                    await sampler.task
+
+        if not sampler.sample_count:
+            return await ctx.send(
+                f"Команда `{alt_ctx.command.qualified_name}` выполнена за {sampler.duration:.3f}сек, "
+                f"слишком быстро для выборок."
+            )
+
+        title = f"jsk profile {command_string}"
+
+        await ctx.send(
+            f"Команда `{alt_ctx.command.qualified_name}` выполнена за {sampler.duration:.3f}сек, "
+            f"{sampler.sample_count} выборок.",
+            files=[
+                disnake.File(filename="profile.collapsed.txt", fp=io.BytesIO(sampler.collapsed().encode('utf-8'))),
+                disnake.File(filename="flamegraph.svg", fp=io.BytesIO(render_flamegraph(sampler.samples, title).encode('utf-8')))
+            ]
+        )
+
+        paginator = WrappedPaginator(prefix='```prolog', max_size=1985)
+        paginator.add_line(f"{'собств.':>8} {'накопл.':>8}  функция")
+
+        for name, own, cumulative in sampler.top():
+            paginator.add_line(
+                f"{own / sampler.sample_count:>8.1%} {cumulative / sampler.sample_count:>8.1%}  {name}"
+            )
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        return await interface.send_to(ctx)
 
     def get_slash_command(
         self,
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import contextlib
 import itertools
 import math
 import time
 import traceback
+import typing
 from urllib.parse import urlencode
 import os
 import sys
@@ -12,10 +15,48 @@ import sys
 import disnake
 from disnake.ext import commands
 
+from jishaku.extension_loading import ExtensionFingerprints, prepare_extensions
 from jishaku.features.baseclass import Feature
 from jishaku.flags import Flags
+from jishaku.import_profiler import ImportNode, ImportProfiler, format_import_tree
 from jishaku.modules import ExtensionConverter
-from jishaku.paginators import WrappedPaginator
+from jishaku.paginators import WrappedPaginator, send_text
+
+LOAD_SWITCHES = {'--parallel', '--changed', '--profile'}
+
+
+def format_load_error(exc: BaseException) -> str:
+    """
+    Короткая трассировка ошибки загрузки расширения в блоке кода.
+    """
+
+    traceback_data = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__, 1))
+    return f"```py\n{traceback_data}\n```"
+
+
+def format_import_profiles(profiles: typing.List[ImportNode], limit: int = 10) -> str:
+    """
+    Отчёт о времени импортов: самые тяжёлые модули каждого расширения и полные деревья.
+    """
+
+    sections = []
+
+    for root in profiles:
+        imports_time = root.cumulative - root.self_time
+        lines = [f"{root.name}: {root.cumulative * 1000:.1f}мс, из них на импорты {imports_time * 1000:.1f}мс"]
+
+        for title, cumulative in (("собственное", False), ("полное", True)):
+            lines.append(f"  Наибольшее {title} время:")
+            lines.extend(
+                f"    {(node.cumulative if cumulative else node.self_time) * 1000:>9.1f}мс  {node.name}"
+                for node in root.top(limit, cumulative)
+            )
+
+        sections.append("\n".join(lines))
+
+    sections.extend(format_import_tree(root) for root in profiles)
+
+    return "\n\n".join(sections)
 
 
 class ManagementFeature(Feature):
@@ -23,41 +64,292 @@ class ManagementFeature(Feature):
     Функция, содержащая команды управления расширением и бота
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.extension_fingerprints = ExtensionFingerprints()
+        self.autoreload_task: typing.Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        """
+        Запоминает исходный код уже загруженных расширений для `jsk reload --changed`.
+        """
+
+        await self.extension_fingerprints.record(list(self.bot.extensions))
+
+        await super().cog_load()
+
+    def cog_unload(self):
+        """
+        Останавливает автоматическую перезагрузку при выгрузке кога.
+        """
+
+        if self.autoreload_task is not None:
+            self.autoreload_task.cancel()
+            self.autoreload_task = None
+
+        super().cog_unload()
+
     @Feature.Command(parent="jsk", name="load", aliases=["reload"])
     async def jsk_load(self, ctx: commands.Context, *extensions: ExtensionConverter):
         """
         Загружает или перезагружает заданные имена расширения.
 
+        С `--parallel` расширения сначала компилируются, а их сторонние зависимости импортируются
+        в пуле потоков, после чего в цикле событий они загружаются в порядке зависимостей.
+        Код модулей-зависимостей при этом выполняется не в потоке цикла событий: модули, которые при импорте
+        вызывают `asyncio.get_event_loop()` или трогают другое привязанное к потоку состояние, могут
+        не импортироваться или сломаться. Такие ошибки показываются в отчёте.
+
+        С `--changed` перезагружаются только расширения (по умолчанию все), исходный код которых
+        изменился, вместе с расширениями, которые их импортируют.
+
+        С `--profile` расширения загружаются по одному, и для каждого строится дерево времени импортов,
+        как у `python -X importtime`.
+
         Сообщает о любых расширениях, которые не загружались.
         """
 
-        paginator = WrappedPaginator(prefix='', suffix='')
+        names = list(itertools.chain(*extensions))
+        switches = {name for name in names if name.startswith('--')}
+        names = [name for name in names if name not in switches]
+
+        unknown = switches - LOAD_SWITCHES
+
+        if unknown:
+            return await ctx.send(f"Неизвестные ключи: {', '.join(sorted(unknown))}.")
+
+        if '--changed' in switches:
+            names = await self.changed_extensions(names or list(self.bot.extensions))
+
+            if not names:
+                return await ctx.send("Исходный код расширений не изменился.")
 
         # 'JSK RELOAD' Сама только что перезагружает Джишаку
-        if ctx.invoked_with == 'reload' and not extensions:
-            extensions = [['jishaku']]
+        elif ctx.invoked_with == 'reload' and not names:
+            names = ['jishaku']
 
-        for extension in itertools.chain(*extensions):
-            method, icon = (
-                (self.bot.reload_extension, "\N{CLOCKWISE RIGHTWARDS AND LEFTWARDS OPEN CIRCLE ARROWS}")
-                if extension in self.bot.extensions else
-                (self.bot.load_extension, "\N{INBOX TRAY}")
-            )
+        profiles = []
+
+        if '--profile' in switches:
+            paginator, loaded = self.load_extensions(names, profiles)
+        elif '--parallel' in switches:
+            paginator, loaded = await self.load_extensions_parallel(names)
+        else:
+            paginator, loaded = self.load_extensions(names)
+
+        # После неудачной перезагрузки работает старый модуль, так что его отпечаток не обновляется
+        await self.extension_fingerprints.record(loaded)
+
+        for page in paginator.pages:
+            await ctx.send(page)
+
+        if profiles:
+            await send_text(ctx, format_import_profiles(profiles), "imports.txt", prefix='```prolog')
+
+    def load_method(self, extension: str) -> typing.Tuple[typing.Callable[[str], None], str]:
+        """
+        Метод бота для загрузки или перезагрузки расширения и значок для отчёта.
+        """
+
+        if extension in self.bot.extensions:
+            return self.bot.reload_extension, "\N{CLOCKWISE RIGHTWARDS AND LEFTWARDS OPEN CIRCLE ARROWS}"
+
+        return self.bot.load_extension, "\N{INBOX TRAY}"
+
+    def load_extensions(
+        self, names: typing.List[str], profiles: typing.List[ImportNode] = None
+    ) -> typing.Tuple[WrappedPaginator, typing.List[str]]:
+        """
+        Загружает или перезагружает расширения по одному и возвращает отчёт и список успешно загруженных.
+
+        Если передан список ``profiles``, в него добавляется дерево импортов каждого расширения.
+        """
+
+        paginator = WrappedPaginator(prefix='', suffix='')
+        loaded = []
+
+        for extension in names:
+            method, icon = self.load_method(extension)
+            profiler = ImportProfiler(extension) if profiles is not None else contextlib.nullcontext()
 
             try:
-                method(extension)
+                with profiler:
+                    method(extension)
             except Exception as exc:
-                traceback_data = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__, 1))
-
-                paginator.add_line(
-                    f"{icon}\N{WARNING SIGN} `{extension}`\n```py\n{traceback_data}\n```",
-                    empty=True
-                )
+                paginator.add_line(f"{icon}\N{WARNING SIGN} `{extension}`\n{format_load_error(exc)}", empty=True)
             else:
                 paginator.add_line(f"{icon} `{extension}`", empty=True)
+                loaded.append(extension)
+            finally:
+                if profiles is not None:
+                    profiles.append(profiler.root)
 
-        for page in paginator.pages:
-            await ctx.send(page)
+        return paginator, loaded
+
+    async def load_extensions_parallel(self, names: typing.List[str]) -> typing.Tuple[WrappedPaginator, typing.List[str]]:
+        """
+        Массовая загрузка: подготовка расширений в пуле потоков и загрузка в порядке зависимостей.
+
+        Возвращает отчёт и список успешно загруженных расширений.
+        """
+
+        started = time.perf_counter()
+        plans, order = await prepare_extensions(names)
+        prepared = time.perf_counter()
+
+        plans = {plan.name: plan for plan in plans}
+        paginator = WrappedPaginator(prefix='', suffix='')
+        loaded = []
+        load_time = 0.0
+
+        for extension in order:
+            method, icon = self.load_method(extension)
+            plan = plans[extension]
+
+            extension_started = time.perf_counter()
+
+            try:
+                method(extension)
+            except Exception as exc:
+                status, details = f"{icon}\N{WARNING SIGN}", f"\n{format_load_error(exc)}"
+            else:
+                status, details = icon, ""
+                loaded.append(extension)
+
+            elapsed = time.perf_counter() - extension_started
+            load_time += elapsed
+
+            preimport_errors = "".join(
+                f"\n\N{WARNING SIGN} предварительный импорт `{module}` в потоке: {error}"
+                for module, error in plan.preimport_errors
+            )
+
+            paginator.add_line(
+                f"{status} `{extension}` (подготовка {plan.prepare_time * 1000:.0f}мс, "
+                f"загрузка {elapsed * 1000:.0f}мс){preimport_errors}{details}",
+                empty=True
+            )
+
+        paginator.add_line(
+            f"Подготовка в потоках: {(prepared - started) * 1000:.0f}мс, "
+            f"загрузка в цикле событий: {load_time * 1000:.0f}мс."
+        )
+
+        return paginator, loaded
+
+    async def changed_extensions(self, names: typing.List[str]) -> typing.List[str]:
+        """
+        Загруженные расширения из ``names``, исходный код которых изменился, и расширения, которые их импортируют.
+        """
+
+        stale = await self.extension_fingerprints.stale([name for name in names if name in self.bot.extensions])
+
+        if not stale:
+            return []
+
+        return self.extension_fingerprints.dependents(stale, self.bot.extensions)
+
+    def reloads_itself(self, extension: str) -> bool:
+        """
+        Перезагрузка этого расширения выгрузит сам ког Джишаку (и отменит задачу, которая её выполняет)?
+        """
+
+        module = type(self).__module__
+        return extension.split('.')[0] == 'jishaku' or module == extension or module.startswith(extension + '.')
+
+    async def autoreload_changes(self, notified: typing.Set[str]) -> typing.List[str]:
+        """
+        Одна проверка автоматической перезагрузки: перезагружает изменившиеся расширения и возвращает страницы отчёта.
+
+        Сам Джишаку не перезагружается, ведь его выгрузка отменила бы эту задачу, - о его изменениях только
+        сообщается, один раз на изменение, для этого служит ``notified``.
+        """
+
+        stale = set(await self.extension_fingerprints.stale(list(self.bot.extensions)))
+        own = {name for name in stale if self.reloads_itself(name)}
+
+        fresh_own = own - notified
+        notified.clear()
+        notified.update(own)
+
+        stale -= own
+
+        if stale:
+            # Ждём, пока файлы перестанут меняться, чтобы не перезагружать на половине сохранения
+            for _ in range(10):
+                await asyncio.sleep(Flags.AUTORELOAD_INTERVAL)
+                more = set(await self.extension_fingerprints.stale(list(self.bot.extensions))) - own
+
+                if more <= stale:
+                    break
+
+                stale |= more
+
+        names = [
+            name for name in self.extension_fingerprints.dependents(stale, self.bot.extensions)
+            if not self.reloads_itself(name)
+        ] if stale else []
+
+        paginator, loaded = self.load_extensions(names)
+        await self.extension_fingerprints.record(loaded)
+
+        for name in sorted(fresh_own):
+            paginator.add_line(
+                f"\N{WARNING SIGN} `{name}` изменился, но перезагрузка выгрузила бы саму Джишаку. "
+                f"Перезагрузите его вручную через `jsk reload`.",
+                empty=True
+            )
+
+        return paginator.pages
+
+    async def autoreload(self, destination: disnake.abc.Messageable):
+        """
+        Следит за исходным кодом расширений и перезагружает изменившиеся, собирая изменения в пачки.
+
+        Ошибка одной проверки сообщается в ``destination`` и не останавливает слежение.
+        """
+
+        notified: typing.Set[str] = set()
+
+        while True:
+            await asyncio.sleep(Flags.AUTORELOAD_INTERVAL)
+
+            try:
+                pages = await self.autoreload_changes(notified)
+            except Exception as exc:  # pylint: disable=broad-except
+                pages = [f"\N{WARNING SIGN} Проверка автоматической перезагрузки не удалась:\n{format_load_error(exc)}"]
+
+            try:
+                for page in pages:
+                    await destination.send(page)
+            except disnake.HTTPException:
+                pass
+
+    @Feature.Command(parent="jsk", name="autoreload", aliases=["watch"])
+    async def jsk_autoreload(self, ctx: commands.Context, toggle: bool = None):
+        """
+        Включает или выключает автоматическую перезагрузку изменившихся расширений.
+
+        Исходные файлы проверяются каждые несколько секунд, а отчёт о перезагрузке отправляется в этот канал.
+        """
+
+        running = self.autoreload_task is not None and not self.autoreload_task.done()
+
+        if toggle is None:
+            state = "включена" if running else "выключена"
+            return await ctx.send(f"Автоматическая перезагрузка {state}.")
+
+        if running:
+            self.autoreload_task.cancel()
+            self.autoreload_task = None
+
+        if toggle:
+            self.autoreload_task = self.bot.loop.create_task(self.autoreload(ctx.channel))
+            return await ctx.send(
+                f"Автоматическая перезагрузка включена, проверка каждые {Flags.AUTORELOAD_INTERVAL:g}сек."
+            )
+
+        await ctx.send("Автоматическая перезагрузка выключена.")
 
     @Feature.Command(parent="jsk", name="unload")
     async def jsk_unload(self, ctx: commands.Context, *extensions: ExtensionConverter):
@@ -73,13 +365,9 @@ class ManagementFeature(Feature):
         for extension in itertools.chain(*extensions):
             try:
                 self.bot.unload_extension(extension)
+                self.extension_fingerprints.forget(extension)
             except Exception as exc:
-                traceback_data = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__, 1))
-
-                paginator.add_line(
-                    f"{icon}\N{WARNING SIGN} `{extension}`\n```py\n{traceback_data}\n```",
-                    empty=True
-                )
+                paginator.add_line(f"{icon}\N{WARNING SIGN} `{extension}`\n{format_load_error(exc)}", empty=True)
             else:
                 paginator.add_line(f"{icon} `{extension}`", empty=True)
 
@@ -203,27 +491,37 @@ class ManagementFeature(Feature):
         """
 
         commands_info = {
+            "asyncio": "Показывает все задачи asyncio в цикле событий.",
+            "autoreload": "Автоматически перезагружает расширения, исходный код которых изменился.",
+            "cache": "Показывает размер кеша disnake по хранилищам и гильдиям.",
             "cancel": "Отменяет задачу с указанным индексом.",
             "cat": "Читает файл, используя подсветку синтаксиса.",
             "curl": "Скачивает и отображает текстовый файл из интернета.",
             "debug": "Запускает команду, измеряя время выполнения.",
             "dis": "Дизассемблирует код Python в байт-код.",
+            "events": "Показывает частоту и время разбора событий шлюза и время обработчиков.",
             "git": "Сокращение для 'jsk sh git'. Вызывает системную оболочку.",
             "hide": "Скрывает Jishaku из команды help.",
             "invite": "Получает URL-адрес приглашения для этого бота.",
-            "load": "Загружает или перезагружает указанные имена расширений.",
+            "load": "Загружает или перезагружает расширения (`--parallel`, `--changed`, `--profile`).",
+            "mem": "Перепись объектов, сравнение снимков памяти и цепочки ссылок.",
+            "metrics": "Показывает метрики в формате OpenMetrics и состояние их экспорта.",
             "override": "Запускает команду от имени другого пользователя, канала или потока, с до... ",
             "permtrace": "Вычисляет источник предоставленных или отклоненных разрешений.",
             "pip": "Сокращение для 'jsk sh pip'. Вызывает системную оболочку.",
+            "profile": "Запускает команду под выборочным профилировщиком.",
             "py": "Прямая оценка кода Python.",
             "py_inspect": "Оценка кода Python с информацией о проверке.",
             "repeat": "Запускает команду несколько раз подряд.",
             "retain": "Включает или отключает сохранение переменных для REPL.",
             "rtt": "Вычисляет время двусторонней передачи данных до API.",
+            "shards": "Показывает задержку, отключения и поток событий каждого шарда.",
             "shell": "Выполняет команды в системной оболочке.",
             "show": "Показывает Jishaku в команде help.",
             "shutdown": "Выводит этого бота из системы.",
             "source": "Отображает исходный код для команды.",
+            "stalls": "Показывает худшие зависания цикла событий.",
+            "stats": "Показывает перцентили задержки и долю ошибок каждой команды.",
             "tasks": "Показывает запущенные задачи jishaku.",
             "unload": "Отключает указанные имена расширений.",
             "voice": "Команды, связанные с голосом.",
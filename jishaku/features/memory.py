@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import tracemalloc
+import typing
+
+from disnake.ext import commands
+
+from jishaku.features.baseclass import Feature
+from jishaku.features.root_command import natural_size
+from jishaku.memory import (
+    Census,
+    compare_tracemalloc_snapshots,
+    find_referrer_chains,
+    take_census,
+    take_tracemalloc_snapshot
+)
+from jishaku.paginators import send_text
+
+
+def signed_size(size_in_bytes: int) -> str:
+    """
+    Как `natural_size`, но со знаком и поддержкой нуля, для изменений размера.
+    """
+
+    if not size_in_bytes:
+        return "0 B"
+
+    return ("+" if size_in_bytes > 0 else "-") + natural_size(abs(size_in_bytes))
+
+
+class MemoryFeature(Feature):
+    """
+    Функция, содержащая команды диагностики памяти
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.census_snapshot: typing.Optional[Census] = None
+        self.tracemalloc_snapshot: typing.Optional[tracemalloc.Snapshot] = None
+
+    @Feature.Command(parent="jsk", name="mem", aliases=["memory"], invoke_without_command=True)
+    async def jsk_mem(self, ctx: commands.Context, limit: int = 25):
+        """
+        Перепись объектов, отслеживаемых сборщиком мусора, по типам.
+
+        Показывает типы с наибольшим суммарным размером. Перепись проводится вне цикла событий.
+        """
+
+        census = await take_census()
+
+        lines = [
+            f"{census.total_count} объектов, {natural_size(census.total_size)} без учёта вложенных объектов.",
+            "",
+            f"{'количество':>12} {'размер':>12}  тип"
+        ]
+
+        if census.partial:
+            lines.insert(1, "Перепись остановлена по времени и учитывает не все объекты.")
+
+        for name, count, size in census.top(limit):
+            lines.append(f"{count:>12} {natural_size(size) if size else '0 B':>12}  {name}")
+
+        await send_text(ctx, "\n".join(lines), "census.txt", prefix='```prolog')
+
+    @Feature.Command(parent="jsk_mem", name="snapshot", aliases=["snap"])
+    async def jsk_mem_snapshot(self, ctx: commands.Context):
+        """
+        Запоминает перепись объектов (и снимок tracemalloc, если он включён) для `jsk mem diff`.
+        """
+
+        self.census_snapshot = await take_census()
+        self.tracemalloc_snapshot = await take_tracemalloc_snapshot()
+
+        extra = " и снимок tracemalloc" if self.tracemalloc_snapshot else ""
+        await ctx.send(f"Запомнена перепись из {self.census_snapshot.total_count} объектов{extra}.")
+
+    @Feature.Command(parent="jsk_mem", name="diff")
+    async def jsk_mem_diff(self, ctx: commands.Context, limit: int = 25):
+        """
+        Сравнивает текущее состояние памяти со снимком `jsk mem snapshot`.
+
+        Показывает типы с наибольшим ростом, а если был снимок tracemalloc - и места выделений с наибольшим ростом.
+        """
+
+        if self.census_snapshot is None:
+            return await ctx.send("Снимка ещё нет, сначала выполните `jsk mem snapshot`.")
+
+        census = await take_census()
+        previous = self.census_snapshot
+
+        elapsed = (census.taken - previous.taken).total_seconds()
+
+        lines = [
+            f"За {elapsed:.0f}сек: {census.total_count - previous.total_count:+} объектов, "
+            f"{signed_size(census.total_size - previous.total_size)}.",
+            "",
+            f"{'количество':>12} {'размер':>12}  тип"
+        ]
+
+        if census.partial or previous.partial:
+            lines.insert(1, "Одна из переписей остановлена по времени, сравнение приблизительно.")
+
+        for name, count, size in census.diff(previous, limit):
+            lines.append(f"{count:>+12} {signed_size(size):>12}  {name}")
+
+        if self.tracemalloc_snapshot is not None:
+            snapshot = await take_tracemalloc_snapshot()
+
+            if snapshot is not None:
+                lines.extend(["", "Места выделений с наибольшим ростом (tracemalloc):"])
+                lines.extend(await compare_tracemalloc_snapshots(snapshot, self.tracemalloc_snapshot, limit))
+
+        await send_text(ctx, "\n".join(lines), "diff.txt", prefix='```prolog')
+
+    @Feature.Command(parent="jsk_mem", name="refs", aliases=["referrers"])
+    async def jsk_mem_refs(self, ctx: commands.Context, type_name: str, count: int = 3):
+        """
+        Показывает цепочки ссылок от модулей до нескольких экземпляров типа.
+
+        Тип указывается по имени, например, `Message` или `disnake.message.Message`.
+        """
+
+        total, chains = await find_referrer_chains(type_name, count)
+
+        if not total:
+            return await ctx.send(f"Экземпляров `{type_name}` не найдено.")
+
+        lines = [f"Найдено {total} экземпляров `{type_name}`.", ""]
+
+        for index, chain in enumerate(chains, start=1):
+            if chain:
+                lines.append(f"{index}: " + " -> ".join(chain))
+            else:
+                lines.append(f"{index}: не достижим из модулей (вероятно, удерживается только стеком или циклом).")
+
+        await send_text(ctx, "\n".join(lines), "referrers.txt", prefix='```')
+
+    @Feature.Command(parent="jsk_mem", name="trace", aliases=["tracemalloc"])
+    async def jsk_mem_trace(self, ctx: commands.Context, toggle: bool = None, frames: int = 1):
+        """
+        Включает или выключает tracemalloc, чтобы `jsk mem snapshot` также сравнивал места выделений.
+        """
+
+        if toggle is None:
+            state = "включён" if tracemalloc.is_tracing() else "выключен"
+            return await ctx.send(f"tracemalloc {state}.")
+
+        if toggle:
+            tracemalloc.start(frames)
+            return await ctx.send("tracemalloc включён. Это замедляет выделения памяти, не забудьте его выключить.")
+
+        tracemalloc.stop()
+        self.tracemalloc_snapshot = None
+        await ctx.send("tracemalloc выключен.")
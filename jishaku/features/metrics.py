@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import logging
+import time
+import typing
+
+from disnake.ext import commands
+
+from jishaku.features.baseclass import Feature
+from jishaku.flags import Flags
+from jishaku.metrics import MetricsExporter, MetricsRegistry, MetricWriter
+from jishaku.modules import module_available, optional_module
+from jishaku.paginators import send_text
+
+log = logging.getLogger(__name__)
+
+# Границы корзин гистограммы задержек команд в секундах
+COMMAND_LATENCY_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MetricsFeature(Feature):
+    """
+    Функция, содержащая экспорт метрик в формате OpenMetrics
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics_registry = MetricsRegistry()
+        self.metrics_exporter = MetricsExporter(self.metrics_registry, Flags.METRICS_HOST, Flags.METRICS_PORT)
+        self._process = None
+        self.metrics_error: typing.Optional[str] = None
+
+        self.register_metrics()
+
+    @property
+    def process(self):
+        """
+        Процесс бота в psutil. psutil импортируется при первом снятии метрик, а не при загрузке кога.
+        """
+
+        if self._process is None:
+            self._process = optional_module('psutil').Process()
+
+        return self._process
+
+    def register_metrics(self):
+        """
+        Регистрирует метрики процесса, цикла событий, шардов и команд.
+        """
+
+        register = self.metrics_registry.register
+
+        if module_available('psutil'):
+            register('process_resident_memory_bytes', 'gauge', "Resident memory size in bytes.", self.collect_rss)
+            register('process_cpu_seconds', 'counter', "User and system CPU time in seconds.", self.collect_cpu)
+            register('process_threads', 'gauge', "Number of OS threads.", self.collect_threads)
+
+        register('jishaku_uptime_seconds', 'gauge', "Seconds since the jishaku cog was loaded.", self.collect_uptime)
+        register('jishaku_loop_tasks', 'gauge', "Unfinished asyncio tasks in the bot loop.", self.collect_loop_tasks)
+        register('jishaku_command_tasks', 'gauge', "Running jishaku command tasks.", self.collect_command_tasks)
+        register('jishaku_loop_stalls', 'counter', "Event loop stalls seen by the watchdog.", self.collect_stalls)
+        register(
+            'jishaku_loop_stall_seconds', 'counter', "Total event loop stall time in seconds.", self.collect_stall_time
+        )
+
+        register('jishaku_guilds', 'gauge', "Guilds in the bot cache.", self.collect_guilds)
+        register('jishaku_shards', 'gauge', "Number of shards of this bot.", self.collect_shards)
+        register(
+            'jishaku_gateway_latency_seconds', 'gauge', "Heartbeat latency per shard in seconds.", self.collect_latency
+        )
+        register(
+            'jishaku_gateway_disconnects', 'counter', "Gateway disconnects per shard.", self.collect_disconnects
+        )
+        register('jishaku_gateway_events', 'counter', "Gateway events per type.", self.collect_events)
+
+        register('jishaku_command_latency_seconds', 'histogram', "Command latency in seconds.", self.collect_commands)
+        register('jishaku_command_errors', 'counter', "Command invocations that failed.", self.collect_errors)
+
+    async def cog_load(self):
+        """
+        Запускает экспорт метрик, если для него задан порт.
+
+        Если сервер не запустился (например, порт занят), ошибка записывается и показывается в `jsk metrics`,
+        а сам ког всё равно загружается.
+        """
+
+        if Flags.METRICS_PORT:
+            try:
+                await self.metrics_exporter.start()
+            except OSError as exc:
+                self.metrics_error = str(exc)
+                log.warning(
+                    "Не удалось запустить экспорт метрик на %s:%s: %s",
+                    self.metrics_exporter.host, self.metrics_exporter.port, exc
+                )
+
+        await super().cog_load()
+
+    def cog_unload(self):
+        """
+        Останавливает экспорт метрик при выгрузке кога.
+        """
+
+        if self.metrics_exporter.running:
+            self.bot.loop.create_task(self.metrics_exporter.stop())
+
+        super().cog_unload()
+
+    def collect_rss(self, writer: MetricWriter):
+        writer.sample(self.process.memory_info().rss)
+
+    def collect_cpu(self, writer: MetricWriter):
+        times = self.process.cpu_times()
+        writer.sample(times.user + times.system, suffix='_total')
+
+    def collect_threads(self, writer: MetricWriter):
+        writer.sample(self.process.num_threads())
+
+    def collect_uptime(self, writer: MetricWriter):
+        writer.sample(time.time() - self.start_time.timestamp())
+
+    def collect_loop_tasks(self, writer: MetricWriter):
+        writer.sample(len(asyncio.all_tasks(self.bot.loop)))
+
+    def collect_command_tasks(self, writer: MetricWriter):
+        writer.sample(len(self.tasks))
+
+    def collect_stalls(self, writer: MetricWriter):
+        watchdog = getattr(self, 'watchdog', None)
+
+        if watchdog is not None:
+            writer.sample(watchdog.stall_count, suffix='_total')
+
+    def collect_stall_time(self, writer: MetricWriter):
+        watchdog = getattr(self, 'watchdog', None)
+
+        if watchdog is not None:
+            writer.sample(watchdog.total_stall_time, suffix='_total')
+
+    def collect_guilds(self, writer: MetricWriter):
+        writer.sample(len(self.bot._connection._guilds))  # pylint: disable=protected-access
+
+    def collect_shards(self, writer: MetricWriter):
+        writer.sample(self.bot.shard_count or 1)
+
+    def collect_latency(self, writer: MetricWriter):
+        shards = getattr(self.bot, 'shards', None)
+
+        if isinstance(shards, dict):
+            for shard_id, shard in shards.items():
+                writer.sample(shard.latency, writer.labels(('shard', shard_id)))
+        else:
+            writer.sample(self.bot.latency, writer.labels(('shard', self.bot.shard_id or 0)))
+
+    def collect_disconnects(self, writer: MetricWriter):
+        shard_monitor = getattr(self, 'shard_monitor', None)
+
+        if shard_monitor is not None:
+            for shard_id, health in shard_monitor.shards.items():
+                writer.sample(health.disconnects, writer.labels(('shard', shard_id)), '_total')
+
+    def collect_events(self, writer: MetricWriter):
+        event_metrics = getattr(self, 'event_metrics', None)
+
+        if event_metrics is not None:
+            for event, stats in event_metrics.events.items():
+                writer.sample(stats.count, writer.labels(('event', event)), '_total')
+
+    def collect_commands(self, writer: MetricWriter):
+        command_stats = getattr(self, 'command_stats', None)
+
+        if command_stats is None:
+            return
+
+        for name, stats in command_stats.commands.items():
+            histogram = stats.histogram
+
+            for bound, count in histogram.cumulative(COMMAND_LATENCY_BOUNDS):
+                writer.sample(count, writer.labels(('command', name), ('le', bound)), '_bucket')
+
+            writer.sample(histogram.count, writer.labels(('command', name), ('le', '+Inf')), '_bucket')
+            writer.sample(histogram.count, writer.labels(('command', name)), '_count')
+            writer.sample(histogram.total, writer.labels(('command', name)), '_sum')
+
+    def collect_errors(self, writer: MetricWriter):
+        command_stats = getattr(self, 'command_stats', None)
+
+        if command_stats is not None:
+            for name, stats in command_stats.commands.items():
+                writer.sample(stats.errors, writer.labels(('command', name)), '_total')
+
+    @Feature.Command(parent="jsk", name="metrics", invoke_without_command=True)
+    async def jsk_metrics(self, ctx: commands.Context):
+        """
+        Показывает метрики в том виде, в котором их снимает Prometheus, и состояние экспорта.
+
+        Экспорт включается флагом JISHAKU_METRICS_PORT и слушает JISHAKU_METRICS_HOST (по умолчанию 127.0.0.1).
+        """
+
+        exporter = self.metrics_exporter
+
+        if exporter.running:
+            state = f"# Экспорт работает на http://{exporter.host}:{exporter.port}/metrics"
+        elif self.metrics_error is not None:
+            state = f"# Экспорт не запустился на {exporter.host}:{exporter.port}: {self.metrics_error}"
+        else:
+            state = "# Экспорт выключен, задайте порт флагом JISHAKU_METRICS_PORT."
+
+        await send_text(ctx, f"{state}\n{self.metrics_registry.render()}", "metrics.txt", prefix='```prolog')
@@ -3,17 +3,37 @@
 
 import io
 import os
+import typing
 
 import disnake
 from disnake.ext import commands
 
-from jishaku.codeblocks import codeblock_converter
+from jishaku.codeblocks import Codeblock, codeblock_converter, split_switches
 from jishaku.exception_handling import ReplResponseReactor
 from jishaku.features.baseclass import Feature
 from jishaku.flags import Flags, DISABLED_SYMBOLS
 from jishaku.functools import AsyncSender
-from jishaku.paginators import PaginatorInterface, WrappedPaginator, use_file_check
-from jishaku.repl import AsyncCodeExecutor, Scope, all_inspections, disassemble, get_var_dict_from_ctx
+from jishaku.paginators import PaginatorInterface, WrappedPaginator, send_text, use_file_check
+from jishaku.profiling import PROFILING_SESSIONS, session_from_switches
+from jishaku.repl import AsyncCodeExecutor, ProcessExecutor, Scope, all_inspections, disassemble, get_var_dict_from_ctx
+
+PROCESS_SWITCH = '--proc'
+PYTHON_SWITCHES = (PROCESS_SWITCH, *PROFILING_SESSIONS)
+
+
+def split_python_switches(argument: Codeblock) -> typing.Tuple[typing.Set[str], Codeblock]:
+    """
+    Отделяет переключатели вроде ``--proc`` и ``--cprofile`` от начала аргумента `jsk py`.
+
+    Возвращает найденные переключатели и оставшийся код.
+    """
+
+    switches, content = split_switches(argument.content, PYTHON_SWITCHES)
+
+    if not switches:
+        return switches, argument
+
+    return switches, codeblock_converter(content.strip())
 
 
 class PythonFeature(Feature):
@@ -26,6 +46,7 @@ class PythonFeature(Feature):
         self._scope = Scope()
         self.retain = Flags.RETAIN
         self.last_result = None
+        self._process_executor: typing.Optional[ProcessExecutor] = None
 
     @property
     def scope(self):
@@ -40,6 +61,27 @@ class PythonFeature(Feature):
             return self._scope
         return Scope()
 
+    @property
+    def process_executor(self) -> ProcessExecutor:
+        """
+        Рабочие процессы для `jsk py --proc`, создаваемые при первом обращении.
+        """
+
+        if self._process_executor is None:
+            self._process_executor = ProcessExecutor(processes=Flags.PROCESS_POOL_SIZE)
+
+        return self._process_executor
+
+    def cog_unload(self):
+        """
+        Убивает рабочие процессы `jsk py --proc` при выгрузке кога.
+        """
+
+        if self._process_executor is not None:
+            self._process_executor.close()
+
+        super().cog_unload()
+
     @Feature.Command(parent="jsk", name="retain")
     async def jsk_retain(self, ctx: commands.Context, *, toggle: bool = None):
         """
@@ -125,18 +167,27 @@ class PythonFeature(Feature):
     async def jsk_python(self, ctx: commands.Context, *, argument: codeblock_converter):
         """
         Прямая оценка кода Python.
+
+        С ``--proc`` код выполняется в отдельном процессе, не блокируя бота.
+        С ``--cprofile`` или ``--tracemalloc`` после выполнения присылается отчёт профилировщика.
         """
 
-        arg_dict = get_var_dict_from_ctx(ctx, Flags.SCOPE_PREFIX)
+        switches, argument = split_python_switches(argument)
+
+        if PROCESS_SWITCH in switches or Flags.PROCESS_REPL:
+            return await self.jsk_python_process(ctx, argument)
+
+        arg_dict = get_var_dict_from_ctx(ctx, Flags.SCOPE_PREFIX, session=self.http_session)
         arg_dict["_"] = self.last_result
 
         scope = self.scope
+        profiler = session_from_switches(switches)
 
         try:
             async with ReplResponseReactor(ctx.message):
-                with self.submit(ctx):
+                with self.submit(ctx), profiler:
                     executor = AsyncCodeExecutor(argument.content, scope, arg_dict=arg_dict)
-                    async for send, result in AsyncSender(executor):
+                    async for send, result in AsyncSender(profiler.wrap_iterator(executor)):
                         if result is None:
                             continue
 
@@ -147,13 +198,44 @@ class PythonFeature(Feature):
         finally:
             scope.clear_intersection(arg_dict)
 
+        report = profiler.report()
+
+        if report is not None:
+            await send_text(ctx, report, profiler.filename)
+
+    async def jsk_python_process(self, ctx: commands.Context, argument: Codeblock):
+        """
+        Выполняет код `jsk py` в пуле процессов.
+
+        Фрагменту доступна только переменная ``_``, а результаты проходят через `jsk_python_result_handling`
+        по мере того, как фрагмент их выдаёт.
+        """
+
+        async with ReplResponseReactor(ctx.message):
+            with self.submit(ctx):
+                results = self.process_executor.run(
+                    argument.content, {"_": self.last_result}, timeout=Flags.PROCESS_TIMEOUT or None
+                )
+
+                try:
+                    async for result in results:
+                        if result is None:
+                            continue
+
+                        self.last_result = result
+
+                        await self.jsk_python_result_handling(ctx, result)
+                finally:
+                    # Если обработка результата упала, процесс фрагмента убивается сразу, а не при сборке мусора
+                    await results.aclose()
+
     @Feature.Command(parent="jsk", name="py_inspect", aliases=["pyi", "python_inspect", "pythoninspect"])
     async def jsk_python_inspect(self, ctx: commands.Context, *, argument: codeblock_converter):
         """
         Оценка кода Python с проверкой информации.
         """
 
-        arg_dict = get_var_dict_from_ctx(ctx, Flags.SCOPE_PREFIX)
+        arg_dict = get_var_dict_from_ctx(ctx, Flags.SCOPE_PREFIX, session=self.http_session)
         arg_dict["_"] = self.last_result
 
         scope = self.scope
@@ -5,7 +5,6 @@ import math
 import sys
 import typing
 import os
-import psutil
 import time
 import datetime
 from datetime import timedelta
@@ -15,14 +14,9 @@ from disnake.ext import commands
 
 from jishaku.features.baseclass import Feature
 from jishaku.flags import Flags, ENABLED_SYMBOLS
-from jishaku.modules import package_version
+from jishaku.modules import optional_module, package_version
 from jishaku.paginators import PaginatorInterface
 
-try:
-    import psutil
-except ImportError:
-    psutil = None
-
 
 def natural_size(size_in_bytes: int):
     """
@@ -67,7 +61,9 @@ class RootCommand(Feature):
             ""
         ]
 
-        # обнаружить, установлена ​​ли функция [procinfo]
+        # обнаружить, установлена ​​ли функция [procinfo]; psutil импортируется только здесь, а не при загрузке
+        psutil = optional_module('psutil')
+
         if psutil:
             try:
                 proc = psutil.Process()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import disnake
+from disnake.ext import commands
+
+from jishaku.features.baseclass import Feature
+from jishaku.flags import Flags
+from jishaku.paginators import send_text
+from jishaku.shard_monitor import ShardMonitor
+
+SHARD_SORTS = {
+    "id": lambda status: status.shard_id,
+    "latency": lambda status: -(status.latency or 0.0),
+    "p95": lambda status: -(status.p95 or 0.0),
+    "disconnects": lambda status: -status.disconnects,
+    "events": lambda status: -(status.event_rate or 0.0),
+    "guilds": lambda status: -status.guilds,
+}
+
+
+def milliseconds(seconds) -> str:
+    """
+    Задержка в миллисекундах или прочерк, если её нет.
+    """
+
+    return f"{seconds * 1000:.0f}" if seconds is not None else "-"
+
+
+class ShardFeature(Feature):
+    """
+    Функция, содержащая команды для наблюдения за шардами
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shard_monitor = ShardMonitor(self.bot, interval=Flags.SHARD_SAMPLE_INTERVAL)
+
+    async def cog_load(self):
+        """
+        Запускает фоновый сбор задержек шардов.
+        """
+
+        self.shard_monitor.start()
+
+        await super().cog_load()
+
+    def cog_unload(self):
+        """
+        Останавливает фоновый сбор задержек шардов при выгрузке кога.
+        """
+
+        self.shard_monitor.stop()
+
+        super().cog_unload()
+
+    @property
+    def auto_sharded(self) -> bool:
+        """
+        Разделён ли бот на шарды автоматически. Только такие боты отправляют события шардов.
+        """
+
+        return isinstance(self.bot, disnake.AutoShardedClient)
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id: int):
+        self.shard_monitor.record_disconnect(shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id: int):
+        self.shard_monitor.record_resume(shard_id)
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        if not self.auto_sharded:
+            self.shard_monitor.record_disconnect(self.bot.shard_id or 0)
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        if not self.auto_sharded:
+            self.shard_monitor.record_resume(self.bot.shard_id or 0)
+
+    @Feature.Command(parent="jsk", name="shards", aliases=["shard"])
+    async def jsk_shards(self, ctx: commands.Context, sort: str = "id"):
+        """
+        Показывает состояние каждого шарда: задержку сейчас и за историю (p50/p95/max),
+        отключения, последнюю причину отключения, число гильдий и поток событий.
+
+        Сортировка: id, latency, p95, disconnects, events или guilds.
+        """
+
+        if sort not in SHARD_SORTS:
+            return await ctx.send(f"Неизвестная сортировка `{sort}`, доступны: {', '.join(SHARD_SORTS)}.")
+
+        monitor = self.shard_monitor
+        statuses = sorted(monitor.report(), key=SHARD_SORTS[sort])
+
+        if not statuses:
+            return await ctx.send("Бот ещё не подключён к шлюзу.")
+
+        samples = max(len(health.latencies) for health in monitor.shards.values())
+
+        lines = [
+            f"{len(statuses)} шардов, выборка каждые {monitor.interval:g}сек, в истории до {samples} выборок "
+            f"(задержки в мс).",
+            "",
+            f"{'шард':>6} {'сейчас':>7} {'p50':>6} {'p95':>6} {'max':>6} {'откл.':>6} {'возобн.':>8} "
+            f"{'гильдии':>8} {'событий/с':>10}  последнее отключение"
+        ]
+
+        for status in statuses:
+            if status.last_disconnect:
+                last = f"{status.last_disconnect.strftime('%Y-%m-%d %H:%M:%S')} UTC: {status.last_reason or '?'}"
+            else:
+                last = "-"
+
+            event_rate = f"{status.event_rate:.1f}" if status.event_rate is not None else "-"
+            shard = f"{status.shard_id}{'!' if status.closed else ''}"
+
+            lines.append(
+                f"{shard:>6} {milliseconds(status.latency):>7} {milliseconds(status.p50):>6} "
+                f"{milliseconds(status.p95):>6} {milliseconds(status.max):>6} {status.disconnects:>6} "
+                f"{status.resumes:>8} {status.guilds:>8} {event_rate:>10}  {last}"
+            )
+
+        if any(status.closed for status in statuses):
+            lines.extend(["", "! - сокет шарда сейчас закрыт."])
+
+        await send_text(ctx, "\n".join(lines), "shards.txt", prefix='```prolog')
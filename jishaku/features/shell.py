@@ -6,7 +6,8 @@ from disnake.ext import commands
 from jishaku.codeblocks import Codeblock, codeblock_converter
 from jishaku.exception_handling import ReplResponseReactor
 from jishaku.features.baseclass import Feature
-from jishaku.paginators import PaginatorInterface, WrappedPaginator
+from jishaku.flags import Flags
+from jishaku.paginators import PaginatorInterface, RingBufferPaginator, WrappedPaginator
 from jishaku.shell import ShellReader
 
 
@@ -22,25 +23,48 @@ class ShellFeature(Feature):
 
         Это использует системную оболочку, как определено в $ Shell, или `/bin/bash` в противном случае.
         Выполнение может быть отменено путем закрытия пагинатора.
+
+        Если задан флаг ``SHELL_RING_PAGES``, в памяти хранится только столько последних страниц,
+        а вывод (до ``FILE_SIZE_LIMIT`` байт) пишется на диск и прикладывается файлом по завершении.
         """
 
-        async with ReplResponseReactor(ctx.message):
-            with self.submit(ctx):
-                with ShellReader(argument.content) as reader:
-                    prefix = "```" + reader.highlight
+        paginator = None
+
+        try:
+            async with ReplResponseReactor(ctx.message):
+                with self.submit(ctx):
+                    async with ShellReader(argument.content) as reader:
+                        prefix = "```" + reader.highlight
+
+                        if Flags.SHELL_RING_PAGES > 0:
+                            # Режим захвата: в памяти только последние страницы, вывод в журнале на диске
+                            paginator = RingBufferPaginator(
+                                prefix=prefix, max_size=1975, max_pages=Flags.SHELL_RING_PAGES,
+                                max_log_size=Flags.FILE_SIZE_LIMIT
+                            )
+                        else:
+                            paginator = WrappedPaginator(prefix=prefix, max_size=1975)
+                        paginator.add_line(f"{reader.ps1} {argument.content}\n")
+
+                        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+                        self.bot.loop.create_task(interface.send_to(ctx))
 
-                    paginator = WrappedPaginator(prefix=prefix, max_size=1975)
-                    paginator.add_line(f"{reader.ps1} {argument.content}\n")
+                        async for lines in reader.batches():
+                            if interface.closed:
+                                return
+                            await interface.add_lines(lines)
 
-                    interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
-                    self.bot.loop.create_task(interface.send_to(ctx))
+                    await interface.add_line(f"\n[status] Return code {reader.close_code}")
 
-                    async for line in reader:
-                        if interface.closed:
-                            return
-                        await interface.add_line(line)
+                    if isinstance(paginator, RingBufferPaginator) and paginator.spilled:
+                        file = paginator.log_file("shell.log")
+                        note = f"Журнал обрезан после {paginator.max_log_size} байт." if paginator.log_truncated else None
 
-                await interface.add_line(f"\n[status] Return code {reader.close_code}")
+                        await ctx.send(note, file=file)
+        finally:
+            # Журнал на диске больше не нужен, даже если интерфейс ещё открыт
+            if isinstance(paginator, RingBufferPaginator):
+                paginator.close()
 
     @Feature.Command(parent="jsk", name="git")
     async def jsk_git(self, ctx: commands.Context, *, argument: codeblock_converter):
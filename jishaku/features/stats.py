@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import disnake
+from disnake.ext import commands
+
+from jishaku.command_stats import CommandStatsRecorder
+from jishaku.features.baseclass import Feature
+from jishaku.paginators import send_text
+
+STATS_SORTS = {
+    "calls": lambda item: -item[1].calls,
+    "errors": lambda item: -item[1].error_rate,
+    "p50": lambda item: -(item[1].histogram.percentile(0.5) or 0.0),
+    "p99": lambda item: -(item[1].histogram.percentile(0.99) or 0.0),
+    "name": lambda item: item[0],
+}
+
+SUBCOMMAND_TYPES = (disnake.OptionType.sub_command, disnake.OptionType.sub_command_group)
+
+# События команд, которые учитывает статистика
+STATS_EVENTS = frozenset({
+    'command', 'command_completion', 'command_error',
+    'slash_command', 'slash_command_completion', 'slash_command_error',
+})
+
+
+def milliseconds(seconds) -> str:
+    """
+    Задержка в миллисекундах или прочерк, если её нет.
+    """
+
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+
+class StatsFeature(Feature):
+    """
+    Функция, содержащая статистику задержек команд
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.command_stats = CommandStatsRecorder()
+        self.dispatch_hook = None
+
+    async def cog_load(self):
+        """
+        Начинает учитывать вызовы команд.
+        """
+
+        self.install_dispatch_hook()
+
+        await super().cog_load()
+
+    def cog_unload(self):
+        """
+        Возвращает ``bot.dispatch`` как был.
+        """
+
+        if self.dispatch_hook is not None and self.bot.__dict__.get('dispatch') is self.dispatch_hook:
+            self.bot.__dict__.pop('dispatch', None)
+
+        self.dispatch_hook = None
+
+        super().cog_unload()
+
+    def install_dispatch_hook(self):
+        """
+        Подменяет ``bot.dispatch``, чтобы видеть начало, завершение и ошибки команд в момент их отправки.
+
+        Слушатели ``on_command_error`` и ``on_slash_command_error`` для этого не подходят:
+        пока они есть, встроенные обработчики бота перестают печатать трассировки.
+        """
+
+        original_dispatch = self.bot.dispatch
+        record = self.record_event
+
+        def dispatch(event_name: str, *args, **kwargs):
+            if event_name in STATS_EVENTS:
+                try:
+                    record(event_name, args[0])
+                except Exception:  # pylint: disable=broad-except
+                    # Учёт не должен мешать доставке события
+                    pass
+
+            return original_dispatch(event_name, *args, **kwargs)
+
+        self.bot.dispatch = dispatch
+        self.dispatch_hook = dispatch
+
+    def record_event(self, event_name: str, context):
+        """
+        Учитывает одно событие команды из :data:`STATS_EVENTS`.
+        """
+
+        if event_name.startswith('slash_'):
+            key, name = context.id, None
+        elif context.command is not None:
+            key, name = id(context), context.command.qualified_name
+        else:
+            return
+
+        if event_name.endswith('command'):
+            self.command_stats.start(key)
+            return
+
+        if name is None:
+            name = self.application_command_name(context)
+
+        self.command_stats.finish(key, name, failed=event_name.endswith('error'))
+
+    def application_command_name(self, inter: disnake.ApplicationCommandInteraction) -> str:
+        """
+        Полное имя команды слеша, вызванной взаимодействием, вместе с подкомандами.
+        """
+
+        names = [inter.data.name]
+        options = inter.data.options
+
+        while options and options[0].type in SUBCOMMAND_TYPES:
+            names.append(options[0].name)
+            options = options[0].options
+
+        name = " ".join(names)
+        command = self.get_slash_command(name)
+
+        return "/" + (command.qualified_name if command else name)
+
+    @Feature.Command(parent="jsk", name="stats", invoke_without_command=True)
+    async def jsk_stats(self, ctx: commands.Context, sort: str = "calls", limit: int = 25):
+        """
+        Показывает количество вызовов, долю ошибок и перцентили задержки (p50/p90/p99) каждой команды.
+
+        Сортировка: calls, errors, p50, p99 или name. Команды слеша отмечены `/`.
+        """
+
+        if sort not in STATS_SORTS:
+            return await ctx.send(f"Неизвестная сортировка `{sort}`, доступны: {', '.join(STATS_SORTS)}.")
+
+        stats = sorted(self.command_stats.commands.items(), key=STATS_SORTS[sort])[:limit]
+
+        if not stats:
+            return await ctx.send("Ни одна команда ещё не завершилась.")
+
+        lines = [f"{'команда':<32} {'вызовы':>8} {'ошибки':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (мс)"]
+
+        for name, command_stats in stats:
+            histogram = command_stats.histogram
+
+            lines.append(
+                f"{name:<32} {command_stats.calls:>8} {command_stats.error_rate:>7.1%} "
+                f"{milliseconds(histogram.percentile(0.5)):>8} {milliseconds(histogram.percentile(0.9)):>8} "
+                f"{milliseconds(histogram.percentile(0.99)):>8} {milliseconds(histogram.max):>8}"
+            )
+
+        await send_text(ctx, "\n".join(lines), "stats.txt", prefix='```prolog')
+
+    @Feature.Command(parent="jsk_stats", name="command", aliases=["cmd"])
+    async def jsk_stats_command(self, ctx: commands.Context, *, command_name: str):
+        """
+        Показывает гистограмму задержек одной команды.
+        """
+
+        command = self.bot.get_command(command_name)
+
+        if command is not None:
+            name = command.qualified_name
+        else:
+            slash = self.get_slash_command(command_name.lstrip('/'))
+            name = f"/{slash.qualified_name}" if slash else command_name
+
+        command_stats = self.command_stats.commands.get(name)
+
+        if command_stats is None:
+            return await ctx.send(f"Для `{name}` статистики нет.")
+
+        histogram = command_stats.histogram
+        buckets = list(histogram.nonzero())
+        widest = max(amount for _, _, amount in buckets)
+
+        lines = [
+            f"{name}: {command_stats.calls} вызовов, {command_stats.errors} ошибок, "
+            f"в среднем {milliseconds(histogram.total / histogram.count)}мс.",
+            ""
+        ]
+
+        for low, high, amount in buckets:
+            bar = "#" * max(1, round(amount / widest * 40))
+            lines.append(f"{milliseconds(low):>10} - {milliseconds(high):>10}мс {amount:>8} {bar}")
+
+        await send_text(ctx, "\n".join(lines), "histogram.txt", prefix='```prolog')
+
+    @Feature.Command(parent="jsk_stats", name="reset", aliases=["clear"])
+    async def jsk_stats_reset(self, ctx: commands.Context):
+        """
+        Забывает статистику команд.
+        """
+
+        self.command_stats.reset()
+        await ctx.send("Статистика команд очищена.")
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+from disnake.ext import commands
+
+from jishaku.features.baseclass import Feature
+from jishaku.flags import Flags
+from jishaku.paginators import send_text
+from jishaku.task_monitor import describe_tasks, format_task_stack, task_monitor
+
+TASK_SORTS = {
+    "age": lambda info: -(info.age if info.age is not None else -1.0),
+    "cpu": lambda info: -(info.cpu_time or 0.0),
+    "steps": lambda info: -(info.steps or 0),
+    "name": lambda info: info.name,
+}
+
+
+class AsyncioFeature(Feature):
+    """
+    Функция, содержащая команды для просмотра задач asyncio
+    """
+
+    async def cog_load(self):
+        """
+        Устанавливает монитор задач, если он включен флагом.
+        """
+
+        if Flags.TASK_MONITOR:
+            task_monitor.install(self.bot.loop)
+
+        await super().cog_load()
+
+    def cog_unload(self):
+        """
+        Убирает монитор задач при выгрузке кога.
+        """
+
+        task_monitor.uninstall()
+
+        super().cog_unload()
+
+    @Feature.Command(parent="jsk", name="asyncio", aliases=["aio"], invoke_without_command=True, ignore_extra=False)
+    async def jsk_asyncio(self, ctx: commands.Context):
+        """
+        Команды для просмотра задач asyncio.
+
+        Если призван без подкоманда, показывает сводку по задачам цикла.
+        """
+
+        infos = describe_tasks(self.bot.loop)
+        monitored = [info for info in infos if info.cpu_time is not None]
+
+        summary = [f"В цикле событий {len(infos)} незавершённых задач."]
+
+        if task_monitor.installed:
+            cpu_time = sum(info.cpu_time for info in monitored)
+            summary.append(f"Монитор задач включён: учтено {len(monitored)} задач, {cpu_time:.3f}сек процессорного времени.")
+        else:
+            summary.append("Монитор задач выключен, включите его `jsk asyncio monitor on`.")
+
+        await ctx.send("\n".join(summary))
+
+    @Feature.Command(parent="jsk_asyncio", name="tasks")
+    async def jsk_asyncio_tasks(self, ctx: commands.Context, sort: str = "age", *, name: str = None):
+        """
+        Показывает все задачи цикла событий.
+
+        Сортировка: age, cpu, steps или name. Если указано имя, показываются только задачи,
+        в имени или корутине которых оно встречается.
+        """
+
+        if sort not in TASK_SORTS:
+            return await ctx.send(f"Неизвестная сортировка `{sort}`, доступны: {', '.join(TASK_SORTS)}.")
+
+        infos = describe_tasks(self.bot.loop)
+
+        if name:
+            needle = name.lower()
+            infos = [info for info in infos if needle in info.name.lower() or needle in info.coroutine.lower()]
+
+        if not infos:
+            return await ctx.send("Подходящих задач нет.")
+
+        infos.sort(key=TASK_SORTS[sort])
+
+        lines = []
+
+        for info in infos:
+            age = f"{info.age:.1f}s" if info.age is not None else "?"
+            cpu = f"{info.cpu_time * 1000:.1f}ms/{info.steps}" if info.cpu_time is not None else "?"
+
+            lines.append(f"{info.name} [{info.coroutine}] возраст {age}, CPU {cpu}")
+            lines.append(f"    ждёт в {info.await_point}")
+
+            if info.site:
+                lines.append(f"    создана в {info.site}")
+
+        await send_text(ctx, "\n".join(lines), "tasks.txt", prefix='```prolog')
+
+    @Feature.Command(parent="jsk_asyncio", name="dump", aliases=["stack"])
+    async def jsk_asyncio_dump(self, ctx: commands.Context, *, identifier: str):
+        """
+        Показывает полный стек одной задачи по её имени.
+        """
+
+        for info in describe_tasks(self.bot.loop):
+            if info.name == identifier:
+                break
+        else:
+            return await ctx.send(f"Задача `{identifier}` не найдена.")
+
+        text = format_task_stack(info.task)
+
+        if info.site:
+            text += f"\n\nСоздана в {info.site}"
+
+        if info.cpu_time is not None:
+            text += f"\nCPU {info.cpu_time * 1000:.1f}ms за {info.steps} шагов"
+
+        await send_text(ctx, text, "task.txt", prefix='```py')
+
+    @Feature.Command(parent="jsk_asyncio", name="monitor")
+    async def jsk_asyncio_monitor(self, ctx: commands.Context, toggle: bool = None):
+        """
+        Включает или выключает монитор задач, который учитывает место создания и процессорное время задач.
+        """
+
+        if toggle is None:
+            state = "включён" if task_monitor.installed else "выключен"
+            return await ctx.send(f"Монитор задач {state}.")
+
+        if toggle:
+            task_monitor.install(self.bot.loop)
+            return await ctx.send("Монитор задач включён. Место создания учитывается только для новых задач.")
+
+        task_monitor.uninstall()
+        await ctx.send("Монитор задач выключен.")
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+from disnake.ext import commands
+
+from jishaku.features.baseclass import Feature
+from jishaku.flags import Flags
+from jishaku.paginators import PaginatorInterface, WrappedPaginator
+from jishaku.watchdog import LoopWatchdog
+
+
+class WatchdogFeature(Feature):
+    """
+    Функция, содержащая сторожевой поток зависаний цикла событий
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.watchdog = LoopWatchdog(threshold=Flags.STALL_THRESHOLD)
+
+    async def cog_load(self):
+        """
+        Запускает сторожевой поток, когда цикл событий уже работает.
+        """
+
+        if not Flags.NO_STALL_WATCHDOG:
+            self.watchdog.start()
+
+        await super().cog_load()
+
+    def cog_unload(self):
+        """
+        Останавливает сторожевой поток при выгрузке кога.
+        """
+
+        self.watchdog.stop()
+
+        super().cog_unload()
+
+    @Feature.Command(parent="jsk", name="stalls", aliases=["stall"], invoke_without_command=True)
+    async def jsk_stalls(self, ctx: commands.Context):
+        """
+        Показывает худшие зависания цикла событий со стеком и задачей в момент зависания.
+        """
+
+        watchdog = self.watchdog
+        stalls = watchdog.stalls
+
+        if not watchdog.running and not stalls:
+            return await ctx.send("Сторожевой поток не запущен.")
+
+        if not stalls:
+            return await ctx.send(f"Цикл событий не зависал дольше {watchdog.threshold:.2f}s.")
+
+        paginator = WrappedPaginator(prefix='```py', max_size=1985)
+
+        paginator.add_line(
+            f"# {watchdog.stall_count} зависаний, всего {watchdog.total_stall_time:.2f}s "
+            f"(порог {watchdog.threshold:.2f}s)"
+        )
+
+        for index, stall in enumerate(stalls, start=1):
+            paginator.add_line(empty=True)
+            paginator.add_line(
+                f"# {index}: {stall.duration:.3f}s в {stall.started.strftime('%Y-%m-%d %H:%M:%S')} UTC, "
+                f"задача: {stall.task or 'нет'}"
+            )
+
+            for frame in stall.stack:
+                paginator.add_line(frame.rstrip('\n'))
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        return await interface.send_to(ctx)
+
+    @Feature.Command(parent="jsk_stalls", name="clear", aliases=["reset"])
+    async def jsk_stalls_clear(self, ctx: commands.Context):
+        """
+        Забывает записанные зависания цикла событий.
+        """
+
+        self.watchdog.clear()
+        await ctx.send("Записанные зависания очищены.")
@@ -3,11 +3,11 @@
 # [!] Требует обновления
 
 import disnake
-import youtube_dl
 from disnake.ext import commands
 
 from jishaku.features.baseclass import Feature
 from jishaku.features.voice import VoiceFeature
+from jishaku.modules import optional_module
 
 BASIC_OPTS = {
     'format': 'webm[abr>0]/bestaudio/best',
@@ -22,7 +22,7 @@ class BasicYouTubeDLSource(disnake.FFmpegPCMAudio):
     """
 
     def __init__(self, url, download: bool = False):
-        ytdl = youtube_dl.YoutubeDL(BASIC_OPTS)
+        ytdl = optional_module('youtube_dl').YoutubeDL(BASIC_OPTS)
         info = ytdl.extract_info(url, download=download)
         super().__init__(info['url'])
 
@@ -41,7 +41,8 @@ class YouTubeFeature(Feature):
         if await VoiceFeature.connected_check(ctx):
             return
 
-        if not youtube_dl:
+        # youtube_dl импортируется при первом вызове, а не при загрузке Джишаку
+        if not optional_module('youtube_dl'):
             return await ctx.send("youtube_dl не установлен.")
 
         voice = ctx.guild.voice_client
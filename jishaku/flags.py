@@ -4,6 +4,7 @@
 import dataclasses
 import inspect
 import os
+import sys
 import typing
 
 ENABLED_SYMBOLS = ("true", "t", "yes", "y", "on", "1")
@@ -115,3 +116,45 @@ class Flags(metaclass=FlagMeta):
 
     # Флаг, чтобы указать использование Braille J в команде выключения
     USE_BRAILLE_J: bool
+
+    # Флаг, чтобы указать, что `jsk sh` должен читать процесс через подпроцессы asyncio, а не через потоки исполнителя
+    NATIVE_SHELL: bool = lambda flags: sys.platform != "win32"
+
+    # Сколько последних страниц вывода `jsk sh` держать в памяти; остальное пишется на диск. 0 отключает этот режим.
+    SHELL_RING_PAGES: int
+
+    # Наибольший размер файла или ответа в байтах, который прочитают `jsk cat` и `jsk curl`
+    FILE_SIZE_LIMIT: int = 128 * 1024 ** 2
+
+    # Флаг, чтобы указать, что `jsk py` всегда выполняет код в пуле процессов, как с `--proc`
+    PROCESS_REPL: bool
+
+    # Сколько рабочих процессов держит пул `jsk py --proc`. 0 означает по числу ядер.
+    PROCESS_POOL_SIZE: int
+
+    # Сколько секунд фрагмент `jsk py --proc` может выполняться, прежде чем его процесс будет убит
+    PROCESS_TIMEOUT: int = 60
+
+    # Флаг, чтобы указать, что сторожевой поток зависаний цикла событий (`jsk stalls`) не следует запускать
+    NO_STALL_WATCHDOG: bool
+
+    # Сколько секунд цикл событий должен не тикать, чтобы это считалось зависанием
+    STALL_THRESHOLD: float = 0.25
+
+    # Флаг, чтобы указать, что монитор задач `jsk asyncio` следует включить при загрузке
+    TASK_MONITOR: bool
+
+    # Как часто в секундах `jsk shards` снимает задержку и поток событий каждого шарда
+    SHARD_SAMPLE_INTERVAL: float = 5.0
+
+    # Флаг, чтобы указать, что учёт событий шлюза `jsk events` следует включить при загрузке
+    EVENT_METRICS: bool
+
+    # Порт, на котором экспорт метрик отдаёт их в формате OpenMetrics по `/metrics`. 0 отключает экспорт.
+    METRICS_PORT: int
+
+    # Адрес, который слушает экспорт метрик. По умолчанию только локальный.
+    METRICS_HOST: str = '127.0.0.1'
+
+    # Как часто в секундах `jsk autoreload` проверяет исходный код расширений
+    AUTORELOAD_INTERVAL: float = 2.0
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import importlib._bootstrap  # pylint: disable=protected-access
+import threading
+import time
+import typing
+
+__all__ = ('ImportNode', 'ImportProfiler', 'format_import_tree')
+
+
+class ImportNode:
+    """
+    Один импорт в дереве импортов: модуль, полное время его загрузки и импорты, сделанные во время неё.
+    """
+
+    __slots__ = ('name', 'cumulative', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.cumulative = 0.0
+        self.children: typing.List['ImportNode'] = []
+
+    @property
+    def self_time(self) -> float:
+        """
+        Время загрузки без учёта вложенных импортов.
+        """
+
+        return max(0.0, self.cumulative - sum(child.cumulative for child in self.children))
+
+    def walk(self, depth: int = 0) -> typing.Iterator[typing.Tuple[int, 'ImportNode']]:
+        """
+        Обходит дерево в порядке импортов, как (глубина, узел).
+        """
+
+        yield depth, self
+
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def top(self, limit: int = 10, cumulative: bool = False) -> typing.List['ImportNode']:
+        """
+        Вложенные импорты с наибольшим собственным (или полным) временем.
+        """
+
+        nodes = [node for depth, node in self.walk() if depth]
+        key = (lambda node: node.cumulative) if cumulative else (lambda node: node.self_time)
+
+        return sorted(nodes, key=key, reverse=True)[:limit]
+
+
+class ImportProfiler:
+    """
+    Контекст-менеджер, который строит дерево времени импортов, как ``python -X importtime``, но в процессе.
+
+    На время контекста подменяется :func:`importlib._bootstrap._find_and_load`, через который проходят
+    все импорты модулей, которых ещё нет в ``sys.modules``. Учитываются только импорты из потока,
+    который вошёл в контекст.
+
+    .. code:: python3
+
+        with ImportProfiler('my_extension') as profiler:
+            bot.load_extension('my_extension')
+
+        for node in profiler.root.top(5):
+            print(node.name, node.self_time)
+    """
+
+    def __init__(self, name: str):
+        self.root = ImportNode(name)
+        self.stack: typing.List[ImportNode] = [self.root]
+        self.thread_id: typing.Optional[int] = None
+        self.original = None
+        self.started = 0.0
+
+    def __enter__(self):
+        original = self.original = importlib._bootstrap._find_and_load  # pylint: disable=protected-access
+        stack = self.stack
+        thread_id = self.thread_id = threading.get_ident()
+        perf_counter = time.perf_counter
+
+        def _find_and_load(name, *args, **kwargs):
+            if threading.get_ident() != thread_id:
+                return original(name, *args, **kwargs)
+
+            node = ImportNode(name)
+            stack[-1].children.append(node)
+            stack.append(node)
+
+            started = perf_counter()
+
+            try:
+                return original(name, *args, **kwargs)
+            finally:
+                node.cumulative = perf_counter() - started
+                stack.pop()
+
+        importlib._bootstrap._find_and_load = _find_and_load  # pylint: disable=protected-access
+        self.started = perf_counter()
+
+        return self
+
+    def __exit__(self, *args):
+        self.root.cumulative = time.perf_counter() - self.started
+        importlib._bootstrap._find_and_load = self.original  # pylint: disable=protected-access
+
+
+def format_import_tree(root: ImportNode) -> str:
+    """
+    Форматирует дерево импортов, как ``python -X importtime``: собственное и полное время в микросекундах.
+    """
+
+    lines = ["import time: self [us] | cumulative | imported package"]
+
+    for depth, node in root.walk():
+        lines.append(
+            f"import time: {node.self_time * 1e6:>9.0f} | {node.cumulative * 1e6:>10.0f} | {'  ' * depth}{node.name}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import collections
+import gc
+import sys
+import time
+import tracemalloc
+import types
+import typing
+from datetime import datetime, timezone
+
+from jishaku.functools import executor_function
+
+__all__ = (
+    'Census',
+    'take_census',
+    'take_tracemalloc_snapshot',
+    'compare_tracemalloc_snapshots',
+    'find_referrer_chains',
+    'type_name'
+)
+
+
+def type_name(kind: type) -> str:
+    """
+    Полное имя типа, без ``builtins.`` для встроенных типов.
+    """
+
+    module = getattr(kind, '__module__', None)
+
+    if module in (None, 'builtins'):
+        return kind.__qualname__
+
+    return f"{module}.{kind.__qualname__}"
+
+
+class Census:
+    """
+    Перепись объектов, отслеживаемых сборщиком мусора: количество и мелкий размер по типам.
+
+    ``partial`` означает, что перепись остановилась по бюджету времени и учла не все объекты.
+    """
+
+    def __init__(self):
+        self.counts: typing.Counter[str] = collections.Counter()
+        self.sizes: typing.Counter[str] = collections.Counter()
+        self.taken = datetime.now(timezone.utc)
+        self.partial = False
+
+    @property
+    def total_count(self) -> int:
+        """
+        Всего объектов в переписи.
+        """
+
+        return sum(self.counts.values())
+
+    @property
+    def total_size(self) -> int:
+        """
+        Суммарный мелкий размер объектов в байтах.
+        """
+
+        return sum(self.sizes.values())
+
+    def add(self, obj):
+        """
+        Учитывает один объект.
+        """
+
+        name = type_name(type(obj))
+        self.counts[name] += 1
+
+        try:
+            self.sizes[name] += sys.getsizeof(obj)
+        except TypeError:
+            pass
+
+    def top(self, limit: int = 25) -> typing.List[typing.Tuple[str, int, int]]:
+        """
+        Возвращает до ``limit`` типов с наибольшим суммарным размером, как (тип, количество, размер).
+        """
+
+        return [(name, self.counts[name], size) for name, size in self.sizes.most_common(limit)]
+
+    def diff(self, previous: 'Census', limit: int = 25) -> typing.List[typing.Tuple[str, int, int]]:
+        """
+        Сравнивает с более ранней переписью и возвращает до ``limit`` типов с наибольшим ростом,
+        как (тип, изменение количества, изменение размера).
+        """
+
+        names = set(self.counts) | set(previous.counts)
+
+        changes = [
+            (name, self.counts[name] - previous.counts[name], self.sizes[name] - previous.sizes[name])
+            for name in names
+        ]
+
+        changes = [change for change in changes if change[1] or change[2]]
+        changes.sort(key=lambda change: (abs(change[2]), abs(change[1])), reverse=True)
+
+        return changes[:limit]
+
+
+@executor_function
+def take_census(time_budget: float = 2.0) -> Census:
+    """
+    Проводит перепись объектов вне цикла событий.
+
+    Поток переписи всё равно держит GIL, поэтому через ``time_budget`` секунд она останавливается
+    и помечается как частичная, чтобы не останавливать цикл событий надолго.
+    """
+
+    census = Census()
+    deadline = time.perf_counter() + time_budget
+
+    for index, obj in enumerate(gc.get_objects()):
+        if not index % 1000 and time.perf_counter() > deadline:
+            census.partial = True
+            break
+
+        census.add(obj)
+
+    return census
+
+
+@executor_function
+def take_tracemalloc_snapshot() -> typing.Optional[tracemalloc.Snapshot]:
+    """
+    Снимает снимок tracemalloc вне цикла событий, если отслеживание включено.
+    """
+
+    if not tracemalloc.is_tracing():
+        return None
+
+    return tracemalloc.take_snapshot()
+
+
+@executor_function
+def compare_tracemalloc_snapshots(
+    snapshot: tracemalloc.Snapshot, previous: tracemalloc.Snapshot, limit: int = 25
+) -> typing.List[str]:
+    """
+    Сравнивает два снимка tracemalloc по строкам вне цикла событий и возвращает описания мест с наибольшим ростом.
+
+    При большом числе трасс сравнение занимает секунды.
+    """
+
+    return [str(stat) for stat in snapshot.compare_to(previous, 'lineno')[:limit]]
+
+
+def describe_edge(referrer, referent) -> str:
+    """
+    Описывает, как ``referrer`` ссылается на ``referent``.
+    """
+
+    if isinstance(referrer, types.ModuleType):
+        return f"модуль {referrer.__name__}"
+
+    if isinstance(referrer, dict):
+        for key, value in referrer.items():
+            if value is referent:
+                return f"dict[{key!r:.60}]"
+
+        return "dict (ключ)"
+
+    if isinstance(referrer, (list, tuple)):
+        for index, value in enumerate(referrer):
+            if value is referent:
+                return f"{type(referrer).__name__}[{index}]"
+
+    attributes = getattr(referrer, '__dict__', None)
+
+    if isinstance(attributes, dict):
+        for key, value in attributes.items():
+            if value is referent:
+                return f"{type_name(type(referrer))}.{key}"
+
+    return type_name(type(referrer))
+
+
+def referrer_chain(
+    target, max_depth: int = 8, max_visited: int = 5000, time_budget: float = 2.0, ignore: typing.Iterable = ()
+) -> typing.Optional[typing.List[str]]:
+    """
+    Ищет кратчайшую цепочку ссылок от какого-либо модуля до ``target`` поиском в ширину по referrers.
+
+    Поиск идёт по уровням: каждый :func:`gc.get_referrers` - это проход по всей куче под GIL,
+    поэтому он делается один раз на уровень для всех его объектов сразу, а не на каждый объект.
+    Поиск прекращается после ``max_visited`` объектов или ``time_budget`` секунд.
+
+    Объекты из ``ignore`` (например, списки самого вызывающего) не считаются ссылками.
+    """
+
+    if isinstance(target, types.ModuleType):
+        return [type_name(type(target))]
+
+    deadline = time.perf_counter() + time_budget
+
+    # Найденные объекты по id и id объекта, на который каждый из них ссылается
+    objects = {id(target): target}
+    referent_of: typing.Dict[int, int] = {}
+
+    ignored = {id(obj) for obj in ignore}
+    ignored.add(id(objects))
+
+    level = (target,)
+    visited = 0
+
+    for _ in range(max_depth):
+        if time.perf_counter() > deadline:
+            break
+
+        level_ids = {id(obj) for obj in level}
+        ignored.add(id(level))
+        found = []
+
+        for referrer in gc.get_referrers(*level):
+            key = id(referrer)
+
+            if key in objects or key in ignored or isinstance(referrer, types.FrameType):
+                continue
+
+            referent = next((obj for obj in gc.get_referents(referrer) if id(obj) in level_ids), None)
+
+            if referent is None:
+                continue
+
+            objects[key] = referrer
+            referent_of[key] = id(referent)
+            visited += 1
+
+            if isinstance(referrer, types.ModuleType):
+                chain = [referrer]
+
+                while key in referent_of:
+                    key = referent_of[key]
+                    chain.append(objects[key])
+
+                edges = [describe_edge(chain[index], chain[index + 1]) for index in range(len(chain) - 1)]
+                return [*edges, type_name(type(target))]
+
+            found.append(referrer)
+
+            if visited >= max_visited:
+                return None
+
+        # Список не должен остаться ссылкой на следующий уровень во время следующего прохода
+        level = tuple(found)
+        del found
+
+        if not level:
+            break
+
+    return None
+
+
+@executor_function
+def find_referrer_chains(name: str, count: int = 3, max_depth: int = 8) -> typing.Tuple[int, typing.List[typing.List[str]]]:
+    """
+    Ищет цепочки ссылок от модулей до нескольких экземпляров типа с данным именем вне цикла событий.
+
+    Возвращает количество найденных экземпляров и цепочки. Для объектов, недостижимых из модулей,
+    цепочки пусты.
+    """
+
+    instances = [
+        obj for obj in gc.get_objects()
+        if name in (type(obj).__qualname__, type_name(type(obj)))
+    ]
+
+    chains = [referrer_chain(obj, max_depth=max_depth, ignore=(instances,)) or [] for obj in instances[:count]]
+
+    return len(instances), chains
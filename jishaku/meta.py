@@ -3,8 +3,6 @@
 
 from collections import namedtuple
 
-import pkg_resources
-
 __all__ = (
     '__author__',
     '__copyright__',
@@ -25,6 +23,3 @@ __docformat__ = 'restructuredtext ru'
 __license__ = 'MIT'
 __title__ = 'jishaku'
 __version__ = '.'.join(map(str, (version_info.major, version_info.minor, version_info.micro)))
-
-# Это гарантирует, что когда Джишаку перезагружен, pkg_resources требует, чтобы она предоставила правильную информацию о версии
-pkg_resources.working_set.by_key.pop('jishaku', None)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import io
+import math
+import typing
+
+if typing.TYPE_CHECKING:
+    from aiohttp import web
+
+__all__ = ('MetricWriter', 'MetricsRegistry', 'MetricsExporter', 'CONTENT_TYPE')
+
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+METRIC_TYPES = ('counter', 'gauge', 'histogram', 'info', 'unknown')
+
+
+def escape_label(value) -> str:
+    """
+    Экранирует значение метки для текстового формата OpenMetrics.
+    """
+
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value) -> str:
+    """
+    Представление числа в текстовом формате OpenMetrics.
+    """
+
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+
+    return repr(value)
+
+
+class MetricWriter:
+    """
+    Пишет образцы метрик в текстовый буфер.
+
+    Строки меток кешируются, так что при повторных снятиях они не собираются заново.
+    """
+
+    def __init__(self):
+        self.buffer: typing.Optional[io.StringIO] = None
+        self.name = ''
+        self.label_cache: typing.Dict[typing.Tuple, str] = {}
+
+    def labels(self, *pairs: typing.Tuple[str, typing.Any]) -> str:
+        """
+        Строка меток ``{ключ="значение",...}`` для пар (ключ, значение), из кеша, если она уже была.
+        """
+
+        try:
+            return self.label_cache[pairs]
+        except KeyError:
+            rendered = ','.join(f'{key}="{escape_label(value)}"' for key, value in pairs)
+            labels = self.label_cache[pairs] = f'{{{rendered}}}'
+            return labels
+
+    def sample(self, value, labels: str = '', suffix: str = ''):
+        """
+        Записывает один образец текущей метрики.
+        """
+
+        self.buffer.write(f"{self.name}{suffix}{labels} {format_value(value)}\n")
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик, которые собираются только в момент снятия.
+
+    Каждая метрика - это имя, тип, описание и функция сбора, которая получает :class:`MetricWriter`
+    и пишет образцы прямо в текстовый буфер ответа, без промежуточных объектов.
+
+    .. code:: python3
+
+        registry = MetricsRegistry()
+        registry.register('bot_guilds', 'gauge', 'Guilds in cache', lambda writer: writer.sample(len(bot.guilds)))
+
+        text = registry.render()
+    """
+
+    def __init__(self):
+        self.metrics: typing.Dict[str, typing.Tuple[str, typing.Callable[[MetricWriter], None]]] = {}
+        self.writer = MetricWriter()
+
+    def register(self, name: str, kind: str, description: str, collect: typing.Callable[[MetricWriter], None]):
+        """
+        Добавляет метрику. Повторная регистрация с тем же именем заменяет её.
+        """
+
+        if kind not in METRIC_TYPES:
+            raise ValueError(f"Неизвестный тип метрики {kind}")
+
+        header = f"# TYPE {name} {kind}\n# HELP {name} {escape_label(description)}\n"
+        self.metrics[name] = (header, collect)
+
+    def unregister(self, name: str):
+        """
+        Убирает метрику.
+        """
+
+        self.metrics.pop(name, None)
+
+    def render(self) -> str:
+        """
+        Снимает все метрики в текстовом формате OpenMetrics.
+
+        Метрика, сбор которой завершился исключением, пропускается целиком.
+        """
+
+        buffer = io.StringIO()
+        writer = self.writer
+
+        for name, (header, collect) in self.metrics.items():
+            position = buffer.tell()
+
+            writer.buffer = buffer
+            writer.name = name
+            buffer.write(header)
+
+            try:
+                collect(writer)
+            except Exception:  # pylint: disable=broad-except
+                buffer.seek(position)
+                buffer.truncate()
+
+        writer.buffer = None
+        buffer.write("# EOF\n")
+
+        return buffer.getvalue()
+
+
+class MetricsExporter:
+    """
+    Маленький HTTP сервер, который отдаёт метрики реестра по ``/metrics``.
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9180):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.runner: typing.Optional['web.AppRunner'] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Запущен ли сервер.
+        """
+
+        return self.runner is not None
+
+    async def handle(self, _request: 'web.Request') -> 'web.Response':
+        """
+        Отдаёт снятые метрики.
+        """
+
+        from aiohttp import web  # pylint: disable=import-outside-toplevel
+
+        return web.Response(body=self.registry.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+    async def start(self):
+        """
+        Запускает сервер, если он ещё не запущен.
+        """
+
+        if self.running:
+            return
+
+        # aiohttp.web нужен только работающему экспорту, поэтому он не импортируется при загрузке
+        from aiohttp import web  # pylint: disable=import-outside-toplevel
+
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError:
+            await runner.cleanup()
+            raise
+
+        self.runner = runner
+
+    async def stop(self):
+        """
+        Останавливает сервер.
+        """
+
+        if self.runner is not None:
+            runner, self.runner = self.runner, None
+            await runner.cleanup()
@@ -1,14 +1,21 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: MIT
 
+import functools
+import importlib
+import importlib.util
 import pathlib
+import sys
+import types
 import typing
 
-import pkg_resources
 from braceexpand import UnbalancedBracesError, braceexpand
 from disnake.ext import commands
 
-__all__ = ('find_extensions_in', 'resolve_extensions', 'package_version', 'ExtensionConverter')
+__all__ = (
+    'find_extensions_in', 'resolve_extensions', 'package_version', 'module_available', 'optional_module',
+    'ExtensionConverter'
+)
 
 
 def find_extensions_in(path: typing.Union[str, pathlib.Path]) -> list:
@@ -62,14 +69,45 @@ def resolve_extensions(bot: commands.Bot, name: str) -> list:
     return exts
 
 
+@functools.lru_cache(maxsize=None)
 def package_version(package_name: str) -> typing.Optional[str]:
     """
     Возвращает версию пакета в виде строки, или нет, если ее нельзя найти.
+
+    Результат кешируется до перезагрузки Джишаку, вместе с которой перезагружается и этот модуль.
+    """
+
+    # importlib.metadata тянет за собой email, zipfile и csv, поэтому он импортируется только при первом запросе
+    from importlib import metadata  # pylint: disable=import-outside-toplevel
+
+    try:
+        return metadata.version(package_name)
+    except (metadata.PackageNotFoundError, AttributeError):
+        return None
+
+
+def module_available(name: str) -> bool:
+    """
+    Можно ли импортировать модуль. Сам модуль при этом не импортируется.
+    """
+
+    if name in sys.modules:
+        return sys.modules[name] is not None
+
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def optional_module(name: str) -> typing.Optional[types.ModuleType]:
+    """
+    Импортирует необязательную зависимость при первом обращении, или возвращает None, если её нет.
     """
 
     try:
-        return pkg_resources.get_distribution(package_name).version
-    except (pkg_resources.DistributionNotFound, AttributeError):
+        return importlib.import_module(name)
+    except ImportError:
         return None
 
 
@@ -1,16 +1,30 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: MIT
 
+import array
+import asyncio
+import collections
+import collections.abc
+import io
+import mmap
+import os
+import tempfile
+import typing
+import weakref
+
+import disnake
 from disnake.ext import commands
 
 from jishaku.flags import Flags
 from jishaku.hljs import get_language, guess_file_traits
+from jishaku.scheduler import EditScheduler, edit_scheduler
 from jishaku.shim.paginator_base import EmojiSettings
 
 from jishaku.shim.paginator_200 import PaginatorEmbedInterface, PaginatorInterface
 
-__all__ = ('EmojiSettings', 'PaginatorInterface', 'PaginatorEmbedInterface',
-           'WrappedPaginator', 'FilePaginator', 'use_file_check')
+__all__ = ('EmojiSettings', 'EditScheduler', 'edit_scheduler', 'PaginatorInterface', 'PaginatorEmbedInterface',
+           'WrappedPaginator', 'RingBufferPaginator', 'FilePaginator', 'LazyFilePaginator', 'use_file_check',
+           'send_text')
 
 
 class WrappedPaginator(commands.Paginator):
@@ -75,6 +89,180 @@ class WrappedPaginator(commands.Paginator):
         super().add_line(line, empty=empty)
 
 
+class PageRing(collections.abc.Sequence):
+    """
+    Последовательность страниц для :class:`RingBufferPaginator`.
+
+    В памяти хранятся только последние ``max_pages`` страниц,
+    более старые перечитываются из журнала на диске по смещениям.
+    """
+
+    def __init__(self, paginator: 'RingBufferPaginator', max_pages: int):
+        self.paginator = paginator
+        self.ring = collections.deque(maxlen=max_pages)
+        self.count = 0
+
+    def append(self, page: str):
+        """
+        Добавляет закрытую страницу, вытесняя самую старую из памяти.
+        """
+
+        self.ring.append(page)
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+
+        if index < 0:
+            index += self.count
+
+        if not 0 <= index < self.count:
+            raise IndexError('page index out of range')
+
+        first_in_memory = self.count - len(self.ring)
+
+        if index >= first_in_memory:
+            return self.ring[index - first_in_memory]
+
+        return self.paginator.read_page(index)
+
+
+class RingBufferPaginator(WrappedPaginator):
+    """
+    Обёрнутый пагинатор, который держит в памяти только последние ``max_pages`` страниц.
+
+    Весь поток строк пишется во временный журнал на диске, поэтому к старым страницам
+    всё ещё можно перейти, а сам журнал можно приложить файлом через :meth:`log_file`.
+    Журнал нужно закрыть через :meth:`close`, когда он больше не нужен.
+
+    Параметры
+    -----------
+    max_pages: int
+        Сколько последних страниц хранить в памяти.
+    max_log_size: Optional[int]
+        Наибольший размер журнала в байтах. Страницы сверх него не записываются,
+        и после вытеснения из памяти их уже не показать.
+    """
+
+    def __init__(self, *args, max_pages: int = 50, max_log_size: int = None, **kwargs):
+        self.max_pages = max_pages
+        self.max_log_size = max_log_size
+
+        handle, self.log_path = tempfile.mkstemp(prefix='jishaku-', suffix='.log')
+        self.log = os.fdopen(handle, 'w+b')
+        self._finalizer = weakref.finalize(self, self._remove_log, self.log, self.log_path)
+
+        # Смещения начала тела каждой страницы в журнале, плюс конец последней
+        self.offsets = array.array('Q', [0])
+
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _remove_log(log, path: str):
+        log.close()
+
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        super().clear()
+
+        self._pages = PageRing(self, self.max_pages)
+        self.offsets = array.array('Q', [0])
+        self.log_truncated = False
+        self.logged_pages = 0
+        self.log.seek(0)
+        self.log.truncate()
+
+    def close(self):
+        """
+        Закрывает и удаляет журнал на диске.
+
+        Вытесненные из памяти страницы после этого показываются как заглушки.
+        """
+
+        self._finalizer()
+
+    def close_page(self):
+        lines = self._current_page[1:] if self.prefix is not None else self._current_page
+
+        if self.log.closed:
+            self.log_truncated = True
+        elif not self.log_truncated:
+            self.log.seek(0, os.SEEK_END)
+            data = (self.linesep.join(lines) + self.linesep).encode('utf-8') if lines else b''
+
+            if self.max_log_size is not None and self.log.tell() + len(data) > self.max_log_size:
+                # Дальше журнал не пишется, чтобы бесконечный вывод не заполнил диск
+                self.log_truncated = True
+            else:
+                self.log.write(data)
+
+        if self.log_truncated:
+            # Страницы, не попавшие в журнал, получают смещение без содержимого
+            self.offsets.append(self.offsets[-1])
+        else:
+            self.offsets.append(self.log.tell())
+            self.logged_pages += 1
+
+        super().close_page()
+
+    def read_page(self, index: int) -> str:
+        """
+        Перечитывает и отрисовывает страницу с данным индексом из журнала.
+        """
+
+        parts = [] if self.prefix is None else [self.prefix]
+
+        if self.log.closed:
+            parts.append("[страница вытеснена из памяти, журнал уже закрыт]")
+        elif index >= self.logged_pages:
+            parts.append("[страница вытеснена из памяти и не записана: журнал достиг предела]")
+        else:
+            start, end = self.offsets[index], self.offsets[index + 1]
+
+            self.log.seek(start)
+            body = self.log.read(end - start).decode('utf-8')
+
+            if body:
+                parts.append(body[:-len(self.linesep)])
+
+        if self.suffix is not None:
+            parts.append(self.suffix)
+
+        return self.linesep.join(parts)
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Были ли какие-то страницы вытеснены из памяти на диск?
+        """
+
+        return len(self._pages) > self.max_pages
+
+    def log_file(self, filename: str = 'output.log') -> disnake.File:
+        """
+        Возвращает журнал вывода как :class:`disnake.File`. Если журнал достиг ``max_log_size``,
+        в нём только начало вывода, см. :attr:`log_truncated`.
+
+        Текущая страница закрывается, чтобы её строки тоже попали в журнал.
+        """
+
+        if len(self._current_page) > (0 if self.prefix is None else 1):
+            self.close_page()
+
+        self.log.flush()
+
+        # Отдельный дескриптор, чтобы загрузка не мешала чтению страниц по смещениям
+        return disnake.File(open(self.log_path, 'rb'), filename=filename)
+
+
 class FilePaginator(commands.Paginator):
     """
     Парень из кодовых блоков с синтаксисом, прочитанным из файла, подобного файлу.
@@ -132,6 +320,232 @@ class WrappedFilePaginator(FilePaginator, WrappedPaginator):
     """
 
 
+class IndexedPages(collections.abc.Sequence):
+    """
+    Последовательность страниц для :class:`LazyFilePaginator`.
+
+    Страницы декодируются и отрисовываются только при обращении к ним.
+    """
+
+    def __init__(self, paginator: 'LazyFilePaginator'):
+        self.paginator = paginator
+
+    def __len__(self):
+        return len(self.paginator.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError('page index out of range')
+
+        return self.paginator.render_page(index)
+
+
+class LazyFilePaginator(commands.Paginator):
+    """
+    Пагинатор файла, который не читает весь файл заранее.
+
+    Файл отображается в память, кодировка и язык угадываются по его началу,
+    а индекс границ страниц строится в фоне по кускам, не блокируя цикл событий надолго.
+    Декодируются только просматриваемые страницы. Длинные строки переносятся, как в :class:`WrappedPaginator`.
+
+    Параметры
+    -----------
+    fp
+        Файл, подобный (реализации ``fp.read``) Чтобы прочитать данные для этого пагинтора от.
+        Если у него есть ``fileno``, он отображается в память.
+    линейный промежуток: Optional[Tuple[int, int]]
+        LineSpan для чтения из файла. Начало промежутка находится подсчётом переводов строк, без разбора всего файла.
+    language_hints: Tuple[str]
+        Кортеж из струн, который может намекнуть на язык этого файла.
+    """
+
+    probe_size = 65536
+    index_step_size = 4 * 1024 * 1024
+    count_chunk_size = 1024 * 1024
+
+    def __init__(self, fp, line_span=None, language_hints=(), **kwargs):
+        self.data = self.map_file(fp)
+
+        language = ''
+
+        for hint in language_hints:
+            language = get_language(hint)
+
+            if language:
+                break
+
+        if not language:
+            try:
+                language = get_language(fp.name)
+            except AttributeError:
+                pass
+
+        _, self.encoding, file_language = guess_file_traits(self.probe())
+
+        language = file_language or language
+
+        super().__init__(prefix=f'```{language}', suffix='```', **kwargs)
+
+        self.start = 0
+        self.limit = len(self.data)
+
+        if line_span:
+            line_span = sorted(line_span)
+
+            self.start = self.line_offset(line_span[0]) if line_span[0] >= 1 else None
+            end = self.line_offset(line_span[1] + 1)
+
+            if self.start is None or (end is None and self.line_offset(line_span[1]) is None):
+                raise ValueError("Linespan goes out of bounds.")
+
+            if end is not None:
+                self.limit = end - 1
+
+        self.starts = array.array('Q')
+        self.ends = array.array('Q')
+        self.position = self.start
+        self._pages = IndexedPages(self)
+
+        self.index_task: asyncio.Task = None
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            while not self.index_step(self.index_step_size):
+                pass
+        else:
+            # Первая страница нужна сразу, остальные проиндексируются в фоне
+            if not self.index_step(self.probe_size):
+                self.index_task = loop.create_task(self.build_index())
+
+    def map_file(self, fp):
+        """
+        Отображает файл в память, или читает его, если у него нет настоящего дескриптора.
+        """
+
+        try:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # BytesIO и подобные, или пустой файл, который нельзя отобразить
+            return fp.read()
+
+        weakref.finalize(self, data.close)
+        return data
+
+    def probe(self) -> bytes:
+        """
+        Возвращает начало файла для угадывания кодировки, не обрезая символ посередине.
+        """
+
+        probe = self.data[:self.probe_size]
+
+        if len(self.data) > self.probe_size:
+            cut = probe.rfind(b'\n')
+            probe = probe[:cut] if cut > 0 else probe.rstrip(bytes(range(0x80, 0x100)))
+
+        return probe
+
+    def line_offset(self, line: int) -> typing.Optional[int]:
+        """
+        Возвращает байтовое смещение начала строки с данным номером (с 1), или None, если такой строки нет.
+        """
+
+        remaining = line - 1
+        position = 0
+
+        while remaining > 0:
+            chunk = self.data[position:position + self.count_chunk_size]
+
+            if not chunk:
+                return None
+
+            count = chunk.count(b'\n')
+
+            if count < remaining:
+                remaining -= count
+                position += len(chunk)
+                continue
+
+            index = -1
+            for _ in range(remaining):
+                index = chunk.find(b'\n', index + 1)
+
+            return position + index + 1
+
+        return 0
+
+    def index_step(self, size: int) -> bool:
+        """
+        Индексирует страницы примерно на ``size`` байт вперёд. Возвращает True, когда индекс готов.
+        """
+
+        data = self.data
+        budget = self.max_size - self._prefix_len - self._suffix_len - 2 * self._linesep_len
+        stop = min(self.limit, self.position + size)
+
+        while self.position < stop or (self.position == self.start == self.limit and not self.starts):
+            start = self.position
+
+            if self.limit - start <= budget:
+                self.starts.append(start)
+                self.ends.append(self.limit)
+                self.position = self.limit
+                break
+
+            cut = data.rfind(b'\n', start, start + budget + 1)
+
+            if cut > start:
+                self.starts.append(start)
+                self.ends.append(cut)
+                self.position = cut + 1
+                continue
+
+            # Строка не влезает в страницу, переносим по пробелу или по границе символа
+            split = data.rfind(b' ', start + 1, start + budget)
+
+            if split <= start:
+                split = start + budget
+
+                while split > start + 1 and data[split] & 0xC0 == 0x80:
+                    split -= 1
+
+            self.starts.append(start)
+            self.ends.append(split)
+            self.position = split
+
+        return self.position >= self.limit
+
+    async def build_index(self):
+        """
+        Достраивает индекс страниц кусками, уступая цикл событий между ними.
+        """
+
+        while not self.index_step(self.index_step_size):
+            await asyncio.sleep(0)
+
+    @property
+    def indexed(self) -> bool:
+        """
+        Готов ли индекс страниц полностью?
+        """
+
+        return self.position >= self.limit
+
+    def render_page(self, index: int) -> str:
+        """
+        Декодирует и отрисовывает одну страницу.
+        """
+
+        body = self.data[self.starts[index]:self.ends[index]].decode(self.encoding, errors='replace')
+        return self.linesep.join([self.prefix, body, self.suffix])
+
+
 def use_file_check(ctx: commands.Context, size: int) -> bool:
     """
     Проверка, чтобы определить, является ли загрузка файла и полагаться на предварительный просмотр файла Discord, приемлемо по сравнению с PaginatorInterface.
@@ -142,3 +556,18 @@ def use_file_check(ctx: commands.Context, size: int) -> bool:
         not Flags.FORCE_PAGINATOR,  # Проверьте, что пользователь явно не отключил это;
         (not ctx.author.is_on_mobile() if ctx.guild and ctx.bot.intents.presences else True)  # Убедитесь, что пользователь не на мобильном
     ])
+
+
+async def send_text(ctx: commands.Context, text: str, filename: str, prefix: str = '```'):
+    """
+    Отправляет длинный текст файлом, если это допустимо по :func:`use_file_check`, иначе через :class:`PaginatorInterface`.
+    """
+
+    if use_file_check(ctx, len(text)):
+        return await ctx.send(file=disnake.File(filename=filename, fp=io.BytesIO(text.encode('utf-8'))))
+
+    paginator = WrappedPaginator(prefix=prefix, max_size=1985)
+    paginator.add_line(text)
+
+    interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+    return await interface.send_to(ctx)
@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import collections
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import typing
+import zlib
+from xml.sax.saxutils import escape
+
+__all__ = ('StackSampler', 'render_flamegraph', 'ProfilingSession', 'CProfileSession', 'TracemallocSession',
+           'PROFILING_SESSIONS', 'session_from_switches')
+
+
+def frame_label(frame) -> str:
+    """
+    Имя кадра для свёрнутых стеков: функция, файл и строка её определения.
+    """
+
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+def await_chain(coro) -> typing.List[typing.Any]:
+    """
+    Возвращает кадры цепочки ``await`` приостановленной корутины, от внешнего к внутреннему.
+    """
+
+    frames = []
+
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None) or getattr(coro, 'ag_frame', None)
+
+        if frame is None:
+            break
+
+        frames.append(frame)
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None) or getattr(coro, 'ag_await', None)
+
+    return frames
+
+
+class StackSampler:
+    """
+    Выборочный профилировщик одной задачи asyncio на основе потока.
+
+    Каждые ``interval`` секунд поток снимает стек задачи. Пока задача выполняется,
+    берётся стек потока цикла от корутины задачи вверх; пока она приостановлена,
+    берётся её цепочка ``await`` с листом ``<await ...>``, поэтому время ожидания тоже учитывается.
+
+    .. code:: python3
+
+        task = loop.create_task(work())
+
+        with StackSampler(task) as sampler:
+            await task
+
+        print(sampler.collapsed())
+
+    Задачу можно назначить и после запуска, через ``sampler.task``, чтобы создать её уже под выборкой
+    и не пропустить её начало.
+    """
+
+    def __init__(self, task: typing.Optional[asyncio.Task] = None, interval: float = 0.01):
+        self.task = task
+        self.interval = interval
+
+        self.samples: typing.Counter[typing.Tuple[str, ...]] = collections.Counter()
+        self.sample_count = 0
+        self.duration = 0.0
+
+        self.loop_thread_id: int = None
+        self.thread: threading.Thread = None
+        self.stopped = threading.Event()
+        self.started = 0.0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """
+        Запускает поток выборки. Это нужно вызывать из потока цикла событий.
+        """
+
+        self.loop_thread_id = threading.get_ident()
+        self.stopped.clear()
+        self.started = time.perf_counter()
+
+        self.thread = threading.Thread(target=self.run, name='jishaku-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Останавливает поток выборки и дожидается его.
+        """
+
+        self.stopped.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        self.duration = time.perf_counter() - self.started
+
+    def run(self):
+        """
+        Тело потока выборки. Это не следует вызывать вручную - это обрабатывается `start`.
+        """
+
+        while not self.stopped.wait(self.interval):
+            stack = self.sample()
+
+            if stack:
+                self.samples[stack] += 1
+                self.sample_count += 1
+
+    def sample(self) -> typing.Optional[typing.Tuple[str, ...]]:
+        """
+        Снимает один стек задачи, от корня к листу.
+        """
+
+        task = self.task
+
+        if task is None or task.done():
+            return None
+
+        coro = task.get_coro()
+        root = getattr(coro, 'cr_frame', None)
+
+        if root is None:
+            return None
+
+        if getattr(coro, 'cr_running', False):
+            frame = sys._current_frames().get(self.loop_thread_id)  # pylint: disable=protected-access
+            frames = []
+
+            while frame is not None:
+                frames.append(frame)
+
+                if frame is root:
+                    return tuple(frame_label(frame) for frame in reversed(frames))
+
+                frame = frame.f_back
+
+        waiter = getattr(task, '_fut_waiter', None)
+        leaf = f"<await {type(waiter).__name__}>" if waiter is not None else "<ожидание>"
+
+        return (*(frame_label(frame) for frame in await_chain(coro)), leaf)
+
+    def collapsed(self) -> str:
+        """
+        Возвращает выборки в формате свёрнутых стеков (``a;b;c count``), понятном flamegraph.pl и speedscope.
+        """
+
+        return '\n'.join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in self.samples.most_common()
+        )
+
+    def top(self, count: int = 25) -> typing.List[typing.Tuple[str, int, int]]:
+        """
+        Возвращает до ``count`` функций с наибольшим собственным временем,
+        как (имя, собственные выборки, накопленные выборки).
+        """
+
+        own = collections.Counter()
+        cumulative = collections.Counter()
+
+        for stack, samples in self.samples.items():
+            own[stack[-1]] += samples
+
+            for name in set(stack):
+                cumulative[name] += samples
+
+        return [(name, own[name], cumulative[name]) for name, _ in own.most_common(count)]
+
+
+def frame_color(name: str) -> str:
+    """
+    Стабильный тёплый цвет для имени кадра, как в flamegraph.pl.
+    """
+
+    seed = zlib.crc32(name.encode('utf-8'))
+
+    red = 205 + seed % 50
+    green = (seed >> 8) % 230
+    blue = (seed >> 16) % 55
+
+    return f"rgb({red},{green},{blue})"
+
+
+def render_flamegraph(
+    samples: typing.Mapping[typing.Tuple[str, ...], int], title: str = "Flame Graph",
+    width: int = 1200, frame_height: int = 16
+) -> str:
+    """
+    Рисует свёрнутые стеки как SVG-флеймграф без внешних зависимостей.
+    """
+
+    # Строим дерево: имя -> [выборки, дети]
+    tree = [0, {}]
+
+    for stack, count in samples.items():
+        node = tree
+        node[0] += count
+
+        for name in stack:
+            node = node[1].setdefault(name, [0, {}])
+            node[0] += count
+
+    total = tree[0] or 1
+    rects = []
+    max_depth = 0
+
+    def layout(children: dict, x: float, depth: int):
+        nonlocal max_depth
+
+        for name, (count, grandchildren) in sorted(children.items()):
+            node_width = count / total * (width - 20)
+
+            if node_width >= 0.5:
+                max_depth = max(max_depth, depth)
+                rects.append((name, count, x, depth, node_width))
+                layout(grandchildren, x, depth + 1)
+
+            x += node_width
+
+    layout(tree[1], 10.0, 0)
+
+    height = (max_depth + 1) * frame_height + 50
+
+    lines = [
+        f'<svg version="1.1" width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg" font-family="Verdana" font-size="12">',
+        f'<rect x="0" y="0" width="{width}" height="{height}" fill="#eeeeb0"/>',
+        f'<text x="{width / 2}" y="24" text-anchor="middle" font-size="17">{escape(title)}</text>'
+    ]
+
+    for name, count, x, depth, node_width in rects:
+        y = height - 10 - (depth + 1) * frame_height
+        label = escape(f"{name} ({count} выборок, {count / total:.2%})")
+
+        lines.append(f'<g><title>{label}</title>')
+        lines.append(
+            f'<rect x="{x:.1f}" y="{y}" width="{node_width:.1f}" height="{frame_height - 1}" '
+            f'fill="{frame_color(name)}" rx="2" ry="2"/>'
+        )
+
+        max_chars = int(node_width / 7)
+
+        if max_chars >= 3:
+            text = name if len(name) <= max_chars else name[:max_chars - 2] + '..'
+            lines.append(f'<text x="{x + 3:.1f}" y="{y + frame_height - 4}">{escape(text)}</text>')
+
+        lines.append('</g>')
+
+    lines.append('</svg>')
+
+    return '\n'.join(lines)
+
+
+class SteppedAwaitable:
+    """
+    Обёртка над awaitable, которая включает сессию профилирования только на время его шагов.
+
+    Пока обёрнутая корутина приостановлена, цикл выполняет другие задачи, и они не попадают в профиль.
+    """
+
+    __slots__ = ('awaitable', 'session')
+
+    def __init__(self, awaitable: typing.Awaitable, session: 'ProfilingSession'):
+        self.awaitable = awaitable
+        self.session = session
+
+    def __await__(self):
+        iterator = self.awaitable.__await__()
+        value, error = None, None
+
+        while True:
+            self.session.enable()
+
+            try:
+                yielded = iterator.throw(error) if error is not None else iterator.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.session.disable()
+
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                iterator.close()
+                raise
+            except BaseException as exception:  # pylint: disable=broad-except
+                value, error = None, exception
+
+
+class SteppedIterator:
+    """
+    Асинхронный итератор, каждый шаг которого выполняется как :class:`SteppedAwaitable`.
+
+    Поддерживает ``asend``, поэтому подходит для :class:`jishaku.functools.AsyncSender`.
+    """
+
+    __slots__ = ('iterator', 'session', 'base')
+
+    def __init__(self, iterator: typing.AsyncIterable, session: 'ProfilingSession'):
+        self.iterator = iterator
+        self.session = session
+        self.base = None
+
+    def __aiter__(self):
+        self.base = self.iterator.__aiter__()
+        return self
+
+    def __anext__(self):
+        return SteppedAwaitable(self.base.__anext__(), self.session)
+
+    def asend(self, value):
+        return SteppedAwaitable(self.base.asend(value), self.session)
+
+
+class ProfilingSession:
+    """
+    Сессия профилирования, которая ничего не делает. Базовый класс для остальных сессий.
+
+    Используется как контекстный менеджер вокруг выполнения, а :meth:`wrap` и :meth:`wrap_iterator`
+    оборачивают то, что нужно профилировать. :meth:`report` возвращает текст отчёта или ``None``.
+    """
+
+    filename = 'profile.txt'
+
+    def __init__(self):
+        self.started = 0.0
+        self.wall_time = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.wall_time = time.perf_counter() - self.started
+
+    def enable(self):
+        """
+        Вызывается перед каждым шагом обёрнутой корутины.
+        """
+
+    def disable(self):
+        """
+        Вызывается после каждого шага обёрнутой корутины.
+        """
+
+    def wrap(self, awaitable: typing.Awaitable) -> typing.Awaitable:
+        """
+        Оборачивает awaitable для профилирования.
+        """
+
+        return awaitable
+
+    def wrap_iterator(self, iterator: typing.AsyncIterable) -> typing.AsyncIterable:
+        """
+        Оборачивает асинхронный итератор для профилирования.
+        """
+
+        return iterator
+
+    def report(self) -> typing.Optional[str]:
+        """
+        Возвращает текст отчёта.
+        """
+
+        return None
+
+
+class CProfileSession(ProfilingSession):
+    """
+    Детерминированное профилирование через :mod:`cProfile`.
+
+    Профилировщик включён только пока выполняются шаги обёрнутого кода,
+    так что время в ожидании и время других задач цикла не учитываются.
+    """
+
+    filename = 'profile.txt'
+
+    def __init__(self, sort: str = 'cumulative', limit: int = 40):
+        super().__init__()
+        self.profile = cProfile.Profile()
+        self.sort = sort
+        self.limit = limit
+
+        self.step_started = 0.0
+        self.active_time = 0.0
+
+    def enable(self):
+        self.step_started = time.perf_counter()
+        self.profile.enable()
+
+    def disable(self):
+        self.profile.disable()
+        self.active_time += time.perf_counter() - self.step_started
+
+    def wrap(self, awaitable: typing.Awaitable) -> typing.Awaitable:
+        return SteppedAwaitable(awaitable, self)
+
+    def wrap_iterator(self, iterator: typing.AsyncIterable) -> typing.AsyncIterable:
+        return SteppedIterator(iterator, self)
+
+    def report(self) -> str:
+        stream = io.StringIO()
+
+        stream.write(
+            f"Прошло {self.wall_time:.3f}сек, из них код выполнялся {self.active_time:.3f}сек, "
+            f"остальное - ожидание.\n\n"
+        )
+
+        try:
+            stats = pstats.Stats(self.profile, stream=stream)
+        except TypeError:
+            # Профилировщик не увидел ни одного вызова
+            stream.write("Нет данных профилирования.")
+        else:
+            stats.strip_dirs().sort_stats(self.sort).print_stats(self.limit)
+
+        return stream.getvalue()
+
+
+class TracemallocSession(ProfilingSession):
+    """
+    Отслеживание выделений памяти через :mod:`tracemalloc`.
+
+    Сравнивает снимки до и после выполнения. tracemalloc глобален для процесса,
+    поэтому выделения других задач за это время тоже попадают в отчёт.
+    """
+
+    filename = 'tracemalloc.txt'
+
+    def __init__(self, frames: int = 1, limit: int = 25):
+        super().__init__()
+        self.frames = frames
+        self.limit = limit
+
+        self.started_tracing = False
+        self.before: tracemalloc.Snapshot = None
+        self.after: tracemalloc.Snapshot = None
+
+    def __enter__(self):
+        self.started_tracing = not tracemalloc.is_tracing()
+
+        if self.started_tracing:
+            tracemalloc.start(self.frames)
+
+        self.before = tracemalloc.take_snapshot()
+        return super().__enter__()
+
+    def __exit__(self, *args):
+        super().__exit__(*args)
+        self.after = tracemalloc.take_snapshot()
+
+        if self.started_tracing:
+            tracemalloc.stop()
+
+    def report(self) -> str:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+
+        before = self.before.filter_traces(filters)
+        after = self.after.filter_traces(filters)
+
+        differences = after.compare_to(before, 'lineno')
+
+        size_diff = sum(stat.size_diff for stat in differences)
+        count_diff = sum(stat.count_diff for stat in differences)
+
+        lines = [
+            f"Прошло {self.wall_time:.3f}сек, изменение памяти: {size_diff / 1024:+.1f} KiB в {count_diff:+} блоках.",
+            ""
+        ]
+
+        lines.extend(str(stat) for stat in differences[:self.limit] if stat.size_diff or stat.count_diff)
+
+        return "\n".join(lines)
+
+
+PROFILING_SESSIONS = {
+    '--cprofile': CProfileSession,
+    '--tracemalloc': TracemallocSession,
+}
+
+
+def session_from_switches(switches: typing.Iterable[str]) -> ProfilingSession:
+    """
+    Возвращает сессию профилирования для первого подходящего переключателя, или пустую сессию.
+    """
+
+    for switch, session_type in PROFILING_SESSIONS.items():
+        if switch in switches:
+            return session_type()
+
+    return ProfilingSession()
@@ -4,5 +4,6 @@
 from jishaku.repl.compilation import *  # noqa: F401
 from jishaku.repl.disassembly import disassemble  # noqa: F401
 from jishaku.repl.inspections import all_inspections  # noqa: F401
+from jishaku.repl.process import ProcessExecutor  # noqa: F401
 from jishaku.repl.repl_builtins import get_var_dict_from_ctx  # noqa: F401
 from jishaku.repl.scope import *  # noqa: F401
@@ -3,8 +3,12 @@
 
 import ast
 import asyncio
+import collections
+import copy
 import inspect
 import linecache
+import types
+import typing
 
 import import_expression
 
@@ -32,6 +36,17 @@ async def _repl_coroutine({{0}}):
         _async_executor.scope.globals.update(locals())
 """.format(import_expression.constants.IMPORTER)
 
+# Шаблон разбирается один раз на процесс, а каждый вызов получает его глубокую копию
+CORO_TEMPLATE = import_expression.parse(CORO_CODE.format(''), mode='exec')
+
+
+def parse_arguments(args: str) -> ast.arguments:
+    """
+    Разбирает строку аргументов вида ``'a, b'`` в узел :class:`ast.arguments`.
+    """
+
+    return ast.parse(f'def _({args}): pass', mode='exec').body[0].args
+
 
 def wrap_code(code: str, args: str = '') -> ast.Module:
     """
@@ -41,11 +56,13 @@ def wrap_code(code: str, args: str = '') -> ast.Module:
     """
 
     user_code = import_expression.parse(code, mode='exec')
-    mod = import_expression.parse(CORO_CODE.format(args), mode='exec')
+    mod = copy.deepcopy(CORO_TEMPLATE)
 
     definition = mod.body[-1]  # async def ...:
     assert isinstance(definition, ast.AsyncFunctionDef)
 
+    definition.args = parse_arguments(args)
+
     try_block = definition.body[-1]  # try:
     assert isinstance(try_block, ast.Try)
 
@@ -76,6 +93,77 @@ def wrap_code(code: str, args: str = '') -> ast.Module:
     return mod
 
 
+class CodeCache:
+    """
+    LRU-кеш скомпилированных объектов кода для :class:`AsyncCodeExecutor`.
+
+    Ключ - исходный код, имена аргументов и имя импортёра выражений импорта,
+    так что повторный запуск того же фрагмента пропускает разбор, трансформацию и компиляцию.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.entries: typing.Dict[tuple, types.CodeType] = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Снимок счётчиков кеша.
+        """
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+            'maxsize': self.maxsize
+        }
+
+    def compile(self, code: str, args: str = '') -> types.CodeType:
+        """
+        Возвращает скомпилированный код для фрагмента, компилируя его только при промахе.
+        """
+
+        key = (code, args, import_expression.constants.IMPORTER)
+
+        try:
+            compiled = self.entries[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return compiled
+
+        # Ошибки синтаксиса не кешируются и пробрасываются как раньше
+        compiled = compile(wrap_code(code, args=args), '<repl>', 'exec')
+
+        self.misses += 1
+        self.entries[key] = compiled
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+        return compiled
+
+    def clear(self):
+        """
+        Очищает кеш и его счётчики.
+        """
+
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+code_cache = CodeCache()
+
+
 class AsyncCodeExecutor:
     """
     Выполняет/оценивает код Python внутри асинхронной функции или генератора.
@@ -108,12 +196,12 @@ class AsyncCodeExecutor:
                 self.args.append(value)
 
         self.source = code
-        self.code = wrap_code(code, args=', '.join(self.arg_names))
+        self.code = code_cache.compile(code, args=', '.join(self.arg_names))
         self.scope = scope or Scope()
         self.loop = loop or asyncio.get_event_loop()
 
     def __aiter__(self):
-        exec(compile(self.code, '<repl>', 'exec'), self.scope.globals, self.scope.locals)
+        exec(self.code, self.scope.globals, self.scope.locals)
         func_def = self.scope.locals.get('_repl_coroutine') or self.scope.globals['_repl_coroutine']
 
         return self.traverse(func_def)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+import typing
+
+from jishaku.repl.compilation import AsyncCodeExecutor
+
+__all__ = ('ProcessExecutor', 'ProcessPoolRecycled')
+
+
+class ProcessPoolRecycled(Exception):
+    """
+    Поднимается для фрагментов, чей рабочий процесс завершился, не закончив их,
+    например, когда пул закрывают при выгрузке кога.
+    """
+
+
+def picklable(value) -> typing.Any:
+    """
+    Возвращает значение, если его можно передать между процессами, иначе его repr.
+    """
+
+    try:
+        pickle.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return repr(value)
+
+    return value
+
+
+def picklable_exception(exception: BaseException) -> BaseException:
+    """
+    Возвращает исключение, если его можно передать между процессами, иначе RuntimeError с его repr.
+    """
+
+    try:
+        pickle.loads(pickle.dumps(exception))
+    except Exception:  # pylint: disable=broad-except
+        return RuntimeError(repr(exception))
+
+    return exception
+
+
+def run_in_process(connection, max_tasks: int):
+    """
+    Цикл рабочего процесса: получает фрагменты по каналу и отправляет их результаты по одному, как только они готовы.
+
+    После ``max_tasks`` фрагментов процесс завершается, чтобы его пересоздали.
+    Это вызывается внутри рабочего процесса, вручную это вызывать не следует.
+    """
+
+    async def stream(code: str, arg_dict: dict):
+        async for result in AsyncCodeExecutor(code, arg_dict=arg_dict):
+            connection.send(('result', picklable(result)))
+
+    for _ in range(max_tasks):
+        try:
+            code, arg_dict = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            asyncio.run(stream(code, arg_dict))
+        except BaseException as exception:  # pylint: disable=broad-except
+            connection.send(('error', picklable_exception(exception)))
+        else:
+            connection.send(('done', None))
+
+
+class Worker:
+    """
+    Рабочий процесс :class:`ProcessExecutor` и его конец канала.
+    """
+
+    def __init__(self, context, max_tasks: int):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=run_in_process, args=(child_connection, max_tasks), daemon=True)
+        self.process.start()
+
+        # Конец процесса нужно закрыть здесь, иначе после его смерти канал не получит EOF
+        child_connection.close()
+
+        self.tasks_left = max_tasks
+
+    def receive(self):
+        """
+        Ждёт следующее сообщение процесса. Смерть процесса превращается в :class:`ProcessPoolRecycled`.
+        """
+
+        try:
+            return self.connection.recv()
+        except (EOFError, OSError) as exception:
+            raise ProcessPoolRecycled("Рабочий процесс завершился, не закончив фрагмент") from exception
+
+    def kill(self):
+        """
+        Убивает процесс и ждёт его завершения. Это блокирует, поэтому вызывается в исполнителе.
+        """
+
+        if self.process.is_alive():
+            self.process.kill()
+
+        self.process.join()
+        self.connection.close()
+
+
+class ProcessExecutor:
+    """
+    Выполняет фрагменты кода в рабочих процессах, не занимая цикл событий бота.
+
+    Фрагменты получают только передаваемые через pickle аргументы, поэтому подходят для чистых вычислений.
+    Результаты приходят по каналу по одному, как только фрагмент их выдал.
+    Рабочие процессы пересоздаются после ``max_tasks_per_child`` фрагментов,
+    а при отмене или тайм-ауте убивается только процесс этого фрагмента.
+
+    .. code:: python3
+
+        executor = ProcessExecutor()
+
+        async for result in executor.run('sum(range(10 ** 8))', timeout=30):
+            print(result)
+    """
+
+    def __init__(self, processes: int = None, max_tasks_per_child: int = 50, context: str = 'spawn'):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self.context = multiprocessing.get_context(context)
+
+        self.idle: typing.List[Worker] = []
+        self.busy: typing.Set[Worker] = set()
+        self.slots: typing.Optional[asyncio.Semaphore] = None
+
+    @property
+    def workers(self) -> typing.List[Worker]:
+        """
+        Все живые рабочие процессы, свободные и занятые.
+        """
+
+        return [*self.idle, *self.busy]
+
+    async def acquire(self) -> Worker:
+        """
+        Берёт свободный рабочий процесс или запускает новый.
+        """
+
+        while self.idle:
+            worker = self.idle.pop()
+
+            if worker.process.is_alive():
+                return worker
+
+            worker.connection.close()
+
+        return await asyncio.get_running_loop().run_in_executor(
+            None, Worker, self.context, self.max_tasks_per_child
+        )
+
+    async def release(self, worker: Worker):
+        """
+        Возвращает процесс в свободные или, если его лимит фрагментов исчерпан, дожидается его выхода.
+        """
+
+        worker.tasks_left -= 1
+
+        if worker.tasks_left > 0:
+            self.idle.append(worker)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, worker.kill)
+
+    async def run(self, code: str, arg_dict: dict = None, timeout: float = None) -> typing.AsyncGenerator[typing.Any, None]:
+        """
+        Выполняет фрагмент в рабочем процессе и выдаёт всё, что он вернул или выдал, по мере получения.
+
+        Аргументы, которые нельзя передать через pickle, отбрасываются.
+        При отмене, тайм-ауте или закрытии генератора до конца фрагмента его процесс убивается.
+        """
+
+        arg_dict = {
+            key: value for key, value in (arg_dict or {}).items()
+            if picklable(value) is value
+        }
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.processes)
+
+        async with self.slots:
+            worker = await self.acquire()
+            self.busy.add(worker)
+
+            try:
+                worker.connection.send((code, arg_dict))
+
+                while True:
+                    remaining = None if deadline is None else max(deadline - loop.time(), 0)
+                    kind, value = await asyncio.wait_for(loop.run_in_executor(None, worker.receive), remaining)
+
+                    if kind == 'done':
+                        break
+
+                    if kind == 'error':
+                        # Процесс сам сообщил об ошибке и готов к следующему фрагменту
+                        self.busy.discard(worker)
+                        await self.release(worker)
+                        raise value
+
+                    yield value
+            except BaseException:
+                # Фрагмент нельзя остановить иначе, как убив его процесс
+                if worker in self.busy:
+                    self.busy.discard(worker)
+                    await asyncio.shield(loop.run_in_executor(None, worker.kill))
+
+                raise
+            else:
+                self.busy.discard(worker)
+                await self.release(worker)
+
+    async def terminate(self):
+        """
+        Убивает все рабочие процессы. Выполняющиеся фрагменты получают :class:`ProcessPoolRecycled`.
+
+        Ожидание завершения процессов делается в исполнителе, а не в цикле событий.
+        """
+
+        workers = self.detach()
+
+        if workers:
+            await asyncio.get_running_loop().run_in_executor(None, self.kill_all, workers)
+
+    def detach(self) -> typing.List[Worker]:
+        """
+        Забирает все рабочие процессы, чтобы следующий запуск создал новые, и возвращает их.
+        """
+
+        workers = self.workers
+        self.idle.clear()
+        self.busy.clear()
+
+        return workers
+
+    @staticmethod
+    def kill_all(workers: typing.List[Worker]):
+        """
+        Убивает переданные рабочие процессы.
+        """
+
+        for worker in workers:
+            worker.kill()
+
+    def close(self):
+        """
+        Убивает все рабочие процессы, не дожидаясь выполняющихся фрагментов.
+
+        Если цикл событий запущен, процессы убиваются в исполнителе, и ждать этого не нужно.
+        """
+
+        workers = self.detach()
+
+        if not workers:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.kill_all(workers)
+        else:
+            loop.run_in_executor(None, self.kill_all, workers)
@@ -1,26 +1,46 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import contextlib
+import functools
+import typing
+
 import aiohttp
 import disnake
 from disnake.ext import commands
 
 
-async def http_get_bytes(*args, **kwargs) -> bytes:
+@contextlib.asynccontextmanager
+async def borrow_session(session: aiohttp.ClientSession = None) -> typing.AsyncIterator[aiohttp.ClientSession]:
+    """
+    Отдаёт переданную общую сессию, или создаёт временную, если её нет.
+    """
+
+    if session is not None:
+        yield session
+        return
+
+    async with aiohttp.ClientSession() as temporary_session:
+        yield temporary_session
+
+
+async def http_get_bytes(*args, session: aiohttp.ClientSession = None, **kwargs) -> bytes:
     """
     Выполняет запрос HTTP GET против URL -адреса, возвращая полезную нагрузку ответа в качестве байтов.
 
     Аргументы, которые должны пройти, такие же, как :func:`aiohttp.ClientSession.get`.
+    В REPL эта функция привязана к общей сессии кога, так что соединения переиспользуются.
     """
 
-    async with aiohttp.ClientSession() as session:
+    async with borrow_session(session) as session:
         async with session.get(*args, **kwargs) as response:
             response.raise_for_status()
 
             return await response.read()
 
 
-async def http_get_json(*args, **kwargs) -> dict:
+async def http_get_json(*args, session: aiohttp.ClientSession = None, **kwargs) -> dict:
     """
     Выполняет запрос на http get против URL,
     Возврат полезной нагрузки ответа в качестве словаря полезной нагрузки ответа, интерпретируемой как JSON.
@@ -28,28 +48,28 @@ async def http_get_json(*args, **kwargs) -> dict:
     Аргументы, которые должны пройти, такие же, как :func:`aiohttp.ClientSession.get`.
     """
 
-    async with aiohttp.ClientSession() as session:
+    async with borrow_session(session) as session:
         async with session.get(*args, **kwargs) as response:
             response.raise_for_status()
 
             return await response.json()
 
 
-async def http_post_bytes(*args, **kwargs) -> bytes:
+async def http_post_bytes(*args, session: aiohttp.ClientSession = None, **kwargs) -> bytes:
     """
     Выполняет запрос на почту HTTP против URL, возвращая полезную нагрузку ответа в качестве байтов.
 
     Аргументы, которые должны пройти, такие же, как :func:`aiohttp.ClientSession.post`.
     """
 
-    async with aiohttp.ClientSession() as session:
+    async with borrow_session(session) as session:
         async with session.post(*args, **kwargs) as response:
             response.raise_for_status()
 
             return await response.read()
 
 
-async def http_post_json(*args, **kwargs) -> dict:
+async def http_post_json(*args, session: aiohttp.ClientSession = None, **kwargs) -> dict:
     """
     Выполняет запрос на http post против URL,
     Возврат полезной нагрузки ответа в качестве словаря полезной нагрузки ответа, интерпретируемой как JSON.
@@ -57,18 +77,67 @@ async def http_post_json(*args, **kwargs) -> dict:
     Аргументы, которые должны пройти, такие же, как :func:`aiohttp.ClientSession.post`.
     """
 
-    async with aiohttp.ClientSession() as session:
+    async with borrow_session(session) as session:
         async with session.post(*args, **kwargs) as response:
             response.raise_for_status()
 
             return await response.json()
 
 
-def get_var_dict_from_ctx(ctx: commands.Context, prefix: str = '_'):
+async def http_stream(
+    *args, method: str = 'GET', chunk_size: int = 65536, session: aiohttp.ClientSession = None, **kwargs
+) -> typing.AsyncIterator[bytes]:
+    """
+    Выполняет HTTP-запрос и отдаёт тело ответа кусками по мере загрузки, не держа его целиком в памяти.
+
+    Аргументы, которые должны пройти, такие же, как :func:`aiohttp.ClientSession.request`, без метода.
+
+    .. code:: python3
+
+        async for chunk in _http_stream('https://example.com/big.bin'):
+            total += len(chunk)
+    """
+
+    async with borrow_session(session) as session:
+        async with session.request(method, *args, **kwargs) as response:
+            response.raise_for_status()
+
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
+
+async def http_gather(
+    *urls: str, json: bool = False, concurrency: int = 10, return_exceptions: bool = False,
+    session: aiohttp.ClientSession = None, **kwargs
+) -> list:
+    """
+    Параллельно выполняет запросы HTTP GET к нескольким URL, возвращая ответы в том же порядке.
+
+    Одновременно выполняется не более ``concurrency`` запросов. Если ``json`` истинно, ответы разбираются как JSON,
+    иначе возвращаются байты. Остальные аргументы передаются в :func:`aiohttp.ClientSession.get`.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    fetch = http_get_json if json else http_get_bytes
+
+    async with borrow_session(session) as session:
+        async def limited(url: str):
+            async with semaphore:
+                return await fetch(url, session=session, **kwargs)
+
+        return await asyncio.gather(*(limited(url) for url in urls), return_exceptions=return_exceptions)
+
+
+def get_var_dict_from_ctx(ctx: commands.Context, prefix: str = '_', session: aiohttp.ClientSession = None):
     """
     Возвращает дикт, который будет использоваться в Repl для данного контекста.
+
+    Если передана ``session``, HTTP-помощники привязываются к ней вместо временной сессии на каждый запрос.
     """
 
+    def bind(function):
+        return functools.partial(function, session=session) if session is not None else function
+
     raw_var_dict = {
         'author': ctx.author,
         'bot': ctx.bot,
@@ -77,10 +146,12 @@ def get_var_dict_from_ctx(ctx: commands.Context, prefix: str = '_'):
         'find': disnake.utils.find,
         'get': disnake.utils.get,
         'guild': ctx.guild,
-        'http_get_bytes': http_get_bytes,
-        'http_get_json': http_get_json,
-        'http_post_bytes': http_post_bytes,
-        'http_post_json': http_post_json,
+        'http_get_bytes': bind(http_get_bytes),
+        'http_get_json': bind(http_get_json),
+        'http_post_bytes': bind(http_post_bytes),
+        'http_post_json': bind(http_post_json),
+        'http_stream': bind(http_stream),
+        'http_gather': bind(http_gather),
         'message': ctx.message,
         'msg': ctx.message
     }
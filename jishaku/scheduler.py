@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import collections
+import logging
+import time
+import typing
+
+import disnake
+
+__all__ = ('RateBucket', 'EditScheduler', 'edit_scheduler')
+
+log = logging.getLogger(__name__)
+
+
+class RateBucket:
+    """
+    Простое ведро токенов: не более ``rate`` операций за ``per`` секунд.
+    """
+
+    __slots__ = ('rate', 'per', 'tokens', 'updated')
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """
+        Сколько секунд осталось ждать до следующего свободного токена.
+        """
+
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+        if self.tokens >= 1:
+            return 0.0
+
+        return (1 - self.tokens) * self.per / self.rate
+
+    def consume(self):
+        """
+        Забирает один токен.
+        """
+
+        self.tokens -= 1
+
+
+class ChannelState:
+    """
+    Состояние ограничения скорости одного канала внутри :class:`EditScheduler`.
+    """
+
+    __slots__ = ('bucket', 'delay', 'ready_at', 'in_flight', 'last_used')
+
+    def __init__(self, bucket: RateBucket, delay: float):
+        self.bucket = bucket
+        self.delay = delay
+        self.ready_at = 0.0
+        self.in_flight = False
+        self.last_used = time.monotonic()
+
+
+class EditScheduler:
+    """
+    Общий планировщик правок сообщений для всех живых :class:`PaginatorInterface`.
+
+    Интерфейсы только сообщают, что их сообщение устарело, а планировщик сам решает, когда его править.
+    Повторные запросы до отправки правки сливаются в одну, а правки распределяются
+    по ведрам канала и глобальному ведру. Задержка между правками в канале
+    адаптивна: она сокращается после успешных правок и удваивается при 429.
+
+    Счётчики ``edits_sent``, ``edits_merged`` и ``ratelimits`` доступны как атрибуты и через :attr:`stats`.
+    """
+
+    def __init__(
+        self,
+        channel_rate: typing.Tuple[int, float] = (5, 5.0),
+        global_rate: typing.Tuple[int, float] = (40, 1.0),
+        min_delay: float = 0.25,
+        max_delay: float = 10.0
+    ):
+        self.channel_rate = channel_rate
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+        self.global_bucket = RateBucket(*global_rate)
+        self.channels: typing.Dict[typing.Any, ChannelState] = {}
+        self.pending: typing.Dict[typing.Any, None] = collections.OrderedDict()
+
+        self.task: asyncio.Task = None
+        self.wakeup: asyncio.Event = None
+
+        self.edits_sent = 0
+        self.edits_merged = 0
+        self.ratelimits = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        Снимок счётчиков планировщика.
+        """
+
+        return {
+            'edits_sent': self.edits_sent,
+            'edits_merged': self.edits_merged,
+            'ratelimits': self.ratelimits,
+            'pending': len(self.pending),
+            'channels': len(self.channels)
+        }
+
+    def request(self, interface):
+        """
+        Отмечает, что сообщение интерфейса нужно отредактировать.
+
+        Если правка для этого интерфейса уже ожидает отправки, запрос сливается с ней.
+        """
+
+        if interface in self.pending:
+            self.edits_merged += 1
+            return
+
+        self.pending[interface] = None
+        self.ensure_running()
+        self.wakeup.set()
+
+    def discard(self, interface):
+        """
+        Убирает ожидающую правку интерфейса, например, когда он закрывается.
+        """
+
+        self.pending.pop(interface, None)
+
+    def close(self, interface):
+        """
+        Закрывает интерфейс, сообщение которого больше нельзя редактировать, и убирает его правки.
+        """
+
+        self.pending.pop(interface, None)
+        interface.message = None
+
+        task = getattr(interface, 'task', None)
+
+        if task is not None:
+            task.cancel()
+
+    def ensure_running(self):
+        """
+        Запускает рабочую задачу планировщика в текущем цикле событий, если она не запущена.
+        """
+
+        loop = asyncio.get_event_loop()
+
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.wakeup = asyncio.Event()
+            self.task = loop.create_task(self.run())
+
+    def channel_state(self, interface) -> ChannelState:
+        """
+        Возвращает состояние канала, в котором находится сообщение интерфейса.
+        """
+
+        channel = getattr(interface.message, 'channel', None)
+        key = getattr(channel, 'id', None)
+
+        state = self.channels.get(key)
+
+        if state is None:
+            state = self.channels[key] = ChannelState(RateBucket(*self.channel_rate), self.min_delay)
+
+        return state
+
+    async def run(self):
+        """
+        Рабочий цикл планировщика. Это не следует вызывать вручную - это обрабатывается `request`.
+        """
+
+        loop = asyncio.get_event_loop()
+
+        while True:
+            now = time.monotonic()
+            wait = None
+
+            for interface in list(self.pending):
+                if interface.message is None:
+                    del self.pending[interface]
+                    continue
+
+                state = self.channel_state(interface)
+
+                if state.in_flight:
+                    continue
+
+                delay = max(state.ready_at - now, state.bucket.wait_time(now), self.global_bucket.wait_time(now))
+
+                if delay > 0:
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+
+                del self.pending[interface]
+
+                state.bucket.consume()
+                self.global_bucket.consume()
+                state.in_flight = True
+
+                loop.create_task(self.edit(interface, state))
+
+            self.prune(now)
+
+            self.wakeup.clear()
+
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=wait if wait is not None else 60)
+            except asyncio.TimeoutError:
+                if not self.pending and not any(state.in_flight for state in self.channels.values()):
+                    # Простаиваем, задача будет перезапущена следующим запросом
+                    return
+
+    def prune(self, now: float):
+        """
+        Забывает каналы, в которых давно не было правок, чтобы состояние не росло бесконечно.
+        """
+
+        stale = [
+            key for key, state in self.channels.items()
+            if not state.in_flight and now - state.last_used > 60
+        ]
+
+        for key in stale:
+            del self.channels[key]
+
+    async def edit(self, interface, state: ChannelState):
+        """
+        Отправляет одну правку и подстраивает задержку канала по её результату.
+        """
+
+        started = time.monotonic()
+
+        try:
+            await interface.send_edit()
+        except (disnake.NotFound, disnake.Forbidden):
+            # Сообщение удалено или права потеряны, дальнейшие правки тоже не пройдут
+            self.close(interface)
+        except disnake.HTTPException as exception:
+            if exception.status == 429:
+                self.ratelimits += 1
+                state.delay = min(self.max_delay, state.delay * 2)
+
+                # Правка не прошла, попробуем снова после отката, если интерфейс ещё жив
+                if not getattr(interface, 'closed', False):
+                    self.pending.setdefault(interface, None)
+            else:
+                log.warning("Не удалось отредактировать сообщение интерфейса: %s", exception)
+        else:
+            self.edits_sent += 1
+
+            elapsed = time.monotonic() - started
+
+            if elapsed > max(1.0, state.delay * 4):
+                # Библиотека, вероятно, сама ждала ограничения скорости, так что отступаем
+                state.delay = min(self.max_delay, state.delay * 1.5)
+            else:
+                state.delay = max(self.min_delay, state.delay * 0.8)
+        finally:
+            state.in_flight = False
+            state.last_used = time.monotonic()
+            state.ready_at = state.last_used + state.delay
+            self.wakeup.set()
+
+
+edit_scheduler = EditScheduler()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import collections
+import math
+import time
+import typing
+from datetime import datetime, timezone
+
+__all__ = ('ShardHealth', 'ShardStatus', 'ShardMonitor', 'percentile', 'shard_sockets')
+
+
+ShardStatus = collections.namedtuple(
+    'ShardStatus',
+    'shard_id latency p50 p95 max disconnects resumes last_disconnect last_reason guilds event_rate closed'
+)
+
+# Коды закрытия шлюза Discord, которые встречаются чаще всего
+CLOSE_CODES = {
+    1000: "обычное закрытие",
+    1001: "сервер уходит",
+    1006: "соединение оборвано",
+    4000: "неизвестная ошибка",
+    4007: "неверный sequence при RESUME",
+    4008: "превышен лимит запросов",
+    4009: "сессия истекла",
+    4011: "нужно больше шардов",
+    4014: "запрещённые интенты",
+}
+
+
+def percentile(values: typing.Sequence[float], fraction: float) -> typing.Optional[float]:
+    """
+    Перцентиль по ближайшему рангу. Для пустой последовательности возвращает None.
+    """
+
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+
+    return ordered[index]
+
+
+def close_reason(ws) -> str:
+    """
+    Описывает, почему закрылся сокет шлюза, по его коду закрытия.
+    """
+
+    code = getattr(ws, '_close_code', None) or getattr(getattr(ws, 'socket', None), 'close_code', None)
+
+    if code is None:
+        return "соединение потеряно"
+
+    if code in CLOSE_CODES:
+        return f"{code} ({CLOSE_CODES[code]})"
+
+    return str(code)
+
+
+def shard_sockets(bot) -> typing.Dict[int, typing.Any]:
+    """
+    Сокеты шлюза всех шардов бота по ID шарда.
+
+    Для бота без автоматического разделения это единственный сокет ``bot.ws``.
+    """
+
+    shards = getattr(bot, 'shards', None)
+
+    if isinstance(shards, dict):
+        return {
+            shard_id: shard._parent.ws  # pylint: disable=protected-access
+            for shard_id, shard in shards.items()
+        }
+
+    ws = getattr(bot, 'ws', None)
+
+    if ws is None:
+        return {}
+
+    return {getattr(bot, 'shard_id', None) or 0: ws}
+
+
+class ShardHealth:
+    """
+    История одного шарда: кольцевой буфер задержек, отключения и поток событий.
+    """
+
+    __slots__ = (
+        'shard_id', 'latencies', 'disconnects', 'resumes', 'last_disconnect', 'last_reason',
+        'sequence', 'sampled_at', 'event_rate'
+    )
+
+    def __init__(self, shard_id: int, capacity: int = 720):
+        self.shard_id = shard_id
+        self.latencies: typing.Deque[float] = collections.deque(maxlen=capacity)
+        self.disconnects = 0
+        self.resumes = 0
+        self.last_disconnect: typing.Optional[datetime] = None
+        self.last_reason: typing.Optional[str] = None
+        self.sequence: typing.Optional[int] = None
+        self.sampled_at: typing.Optional[float] = None
+        self.event_rate: typing.Optional[float] = None
+
+    def sample(self, ws, now: float):
+        """
+        Записывает задержку сокета и считает поток событий по приросту его sequence.
+        """
+
+        latency = getattr(ws, 'latency', None)
+
+        if latency is not None and math.isfinite(latency):
+            self.latencies.append(latency)
+
+        sequence = getattr(ws, 'sequence', None) or 0
+
+        if self.sampled_at is not None and now > self.sampled_at:
+            previous = self.sequence or 0
+            # После нового IDENTIFY sequence начинается заново
+            events = sequence - previous if sequence >= previous else sequence
+            self.event_rate = events / (now - self.sampled_at)
+
+        self.sequence = sequence
+        self.sampled_at = now
+
+
+class ShardMonitor:
+    """
+    Фоновая задача, которая каждые ``interval`` секунд снимает задержку и поток событий каждого шарда.
+
+    Задержки хранятся в кольцевом буфере на ``capacity`` выборок, так что память не растёт со временем.
+    Отключения и возобновления учитываются через :meth:`record_disconnect` и :meth:`record_resume`.
+    """
+
+    def __init__(self, bot, interval: float = 5.0, capacity: int = 720):
+        self.bot = bot
+        self.interval = interval
+        self.capacity = capacity
+        self.shards: typing.Dict[int, ShardHealth] = {}
+        self.task: typing.Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Работает ли фоновая задача.
+        """
+
+        return self.task is not None and not self.task.done()
+
+    def health(self, shard_id: int) -> ShardHealth:
+        """
+        История шарда, создаваемая при первом обращении.
+        """
+
+        try:
+            return self.shards[shard_id]
+        except KeyError:
+            health = self.shards[shard_id] = ShardHealth(shard_id, self.capacity)
+            return health
+
+    def sample(self):
+        """
+        Снимает одну выборку со всех шардов.
+        """
+
+        now = time.monotonic()
+
+        for shard_id, ws in shard_sockets(self.bot).items():
+            self.health(shard_id).sample(ws, now)
+
+    async def run(self):
+        """
+        Снимает выборки, пока задачу не отменят.
+        """
+
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        Запускает фоновую задачу, если она ещё не запущена.
+        """
+
+        if not self.running:
+            self.task = self.bot.loop.create_task(self.run())
+
+    def stop(self):
+        """
+        Останавливает фоновую задачу.
+        """
+
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def record_disconnect(self, shard_id: int):
+        """
+        Учитывает отключение шарда и запоминает причину по коду закрытия его сокета.
+        """
+
+        health = self.health(shard_id)
+        health.disconnects += 1
+        health.last_disconnect = datetime.now(timezone.utc)
+
+        ws = shard_sockets(self.bot).get(shard_id)
+        health.last_reason = close_reason(ws) if ws is not None else None
+
+    def record_resume(self, shard_id: int):
+        """
+        Учитывает возобновление сессии шарда.
+        """
+
+        self.health(shard_id).resumes += 1
+
+    def report(self) -> typing.List[ShardStatus]:
+        """
+        Состояние всех известных шардов, упорядоченное по ID.
+        """
+
+        sockets = shard_sockets(self.bot)
+        guilds = collections.Counter(guild.shard_id for guild in self.bot.guilds)
+
+        for shard_id in sockets:
+            self.health(shard_id)
+
+        statuses = []
+
+        for shard_id, health in sorted(self.shards.items()):
+            ws = sockets.get(shard_id)
+            latency = getattr(ws, 'latency', None)
+            history = list(health.latencies)
+
+            statuses.append(ShardStatus(
+                shard_id=shard_id,
+                latency=latency if latency is not None and math.isfinite(latency) else None,
+                p50=percentile(history, 0.5),
+                p95=percentile(history, 0.95),
+                max=max(history) if history else None,
+                disconnects=health.disconnects,
+                resumes=health.resumes,
+                last_disconnect=health.last_disconnect,
+                last_reason=health.last_reason,
+                guilds=guilds.get(shard_id, 0),
+                event_rate=health.event_rate,
+                closed=ws is None or not getattr(ws, 'open', True)
+            ))
+
+        return statuses
@@ -2,30 +2,127 @@
 # SPDX-License-Identifier: MIT
 
 import asyncio
+import collections
+import functools
 import os
 import pathlib
 import re
 import subprocess
 import sys
 import time
+import typing
+
+from jishaku.flags import Flags
 
 SHELL = os.getenv("SHELL") or "/bin/bash"
 WINDOWS = sys.platform == "win32"
 
 
+CHUNK_SIZE = 65536
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+
+
 def background_reader(stream, loop: asyncio.AbstractEventLoop, callback):
     """
-    Считает поток и пересылает каждую строку на асинхронный обратный вызов.
+    Считает поток крупными кусками и пересылает каждый кусок целых строк на асинхронный обратный вызов.
     """
 
-    for line in iter(stream.readline, b''):
-        loop.call_soon_threadsafe(loop.create_task, callback(line))
+    buffer = b''
+
+    for chunk in iter(functools.partial(stream.read1, CHUNK_SIZE), b''):
+        complete, separator, buffer = (buffer + chunk).rpartition(b'\n')
+
+        if separator:
+            loop.call_soon_threadsafe(loop.create_task, callback(complete))
+
+    if buffer:
+        loop.call_soon_threadsafe(loop.create_task, callback(buffer))
+
+
+class ShellProtocol(asyncio.SubprocessProtocol):
+    """
+    Протокол подпроцесса, который разбирает stdout и stderr на куски строк прямо в цикле событий.
+
+    Используется :class:`ShellReader` в нативном режиме, без потоков исполнителя.
+    """
+
+    def __init__(self, reader: 'ShellReader'):
+        self.reader = reader
+        self.transport: asyncio.SubprocessTransport = None
+        self.buffers = {1: b'', 2: b''}
+        self.open_pipes = {1, 2}
+        self.exited = False
+        self.paused = False
+
+    def connection_made(self, transport: asyncio.SubprocessTransport):
+        self.transport = transport
+
+    def pipe_data_received(self, fd: int, data: bytes):
+        complete, separator, self.buffers[fd] = (self.buffers[fd] + data).rpartition(b'\n')
+
+        if separator:
+            self.reader.feed_chunk(fd, complete)
+
+        if not self.paused and self.reader.queue.qsize() >= self.reader.queue_size:
+            self.pause_pipes()
+
+    def pipe_connection_lost(self, fd: int, exc):
+        if self.buffers.get(fd):
+            self.reader.feed_chunk(fd, self.buffers[fd])
+            self.buffers[fd] = b''
+
+        self.open_pipes.discard(fd)
+        self.wake_reader()
+
+    def process_exited(self):
+        self.exited = True
+        self.wake_reader()
+
+    def wake_reader(self):
+        """
+        Будит ожидающего читателя, как только выводить больше нечего, вместо ожидания тайм-аута опроса.
+        """
+
+        if self.finished:
+            self.reader.queue.put_nowait(None)
+
+    @property
+    def finished(self) -> bool:
+        """
+        Процесс завершился и оба потока вывода закрыты?
+        """
+
+        return self.exited and not self.open_pipes
+
+    def pause_pipes(self):
+        """
+        Приостанавливает чтение из процесса, пока очередь читателя переполнена.
+        """
+
+        self.paused = True
+
+        for fd in self.open_pipes:
+            self.transport.get_pipe_transport(fd).pause_reading()
+
+    def resume_pipes(self):
+        """
+        Возобновляет чтение из процесса после разгрузки очереди.
+        """
+
+        self.paused = False
+
+        for fd in self.open_pipes:
+            self.transport.get_pipe_transport(fd).resume_reading()
 
 
 class ShellReader:
     """
     Класс, который пассивно читает из оболочки и буферизирует результаты для чтения.
 
+    В нативном режиме (по умолчанию вне Windows, см. ``Flags.NATIVE_SHELL``) процесс запускается
+    через подпроцессы asyncio, и оба потока читаются циклом событий без потоков исполнителя.
+    Иначе используется :class:`subprocess.Popen` и по потоку исполнителя на каждый поток вывода.
+
     Пример
     -------
 
@@ -38,7 +135,9 @@ class ShellReader:
                 print(x)
     """
 
-    def __init__(self, code: str, timeout: int = 120, loop: asyncio.AbstractEventLoop = None):
+    queue_size = 250
+
+    def __init__(self, code: str, timeout: int = 120, loop: asyncio.AbstractEventLoop = None, native: bool = None):
         if WINDOWS:
             # Check for powershell
             if pathlib.Path(r"C:\Windows\System32\WindowsPowerShell\v1.0\powershell.exe").exists():
@@ -54,16 +153,28 @@ class ShellReader:
             self.ps1 = "$"
             self.highlight = "sh"
 
-        self.process = subprocess.Popen(sequence, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         self.close_code = None
 
         self.loop = loop or asyncio.get_event_loop()
         self.timeout = timeout
+        self.last_output = time.perf_counter()
+        self.pending = collections.deque()
+        self.native = Flags.NATIVE_SHELL if native is None else native
+
+        if self.native:
+            self.process = None
+            self.protocol: ShellProtocol = None
+            self.spawn_task = self.loop.create_task(self.spawn_native(sequence))
+
+            # Переполнение очереди обрабатывается паузой каналов, а не блокировкой
+            self.queue = asyncio.Queue()
+        else:
+            self.process = subprocess.Popen(sequence, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
-        self.stdout_task = self.make_reader_task(self.process.stdout, self.stdout_handler)
-        self.stderr_task = self.make_reader_task(self.process.stderr, self.stderr_handler)
+            self.stdout_task = self.make_reader_task(self.process.stdout, self.stdout_handler)
+            self.stderr_task = self.make_reader_task(self.process.stderr, self.stderr_handler)
 
-        self.queue = asyncio.Queue(maxsize=250)
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
 
     @property
     def closed(self):
@@ -71,8 +182,33 @@ class ShellReader:
         Обе задачи выполнены, указывая, что больше не нужно читать?
         """
 
+        if self.native:
+            if self.spawn_task.done() and (self.spawn_task.cancelled() or self.spawn_task.exception()):
+                return True
+
+            return self.protocol is not None and self.protocol.finished
+
         return self.stdout_task.done() and self.stderr_task.done()
 
+    async def spawn_native(self, sequence: list):
+        """
+        Запускает процесс в нативном режиме, подключая к нему :class:`ShellProtocol`.
+        """
+
+        transport, self.protocol = await self.loop.subprocess_exec(
+            lambda: ShellProtocol(self), *sequence,
+            stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+        self.process = transport
+
+    def feed_chunk(self, fd: int, chunk: bytes):
+        """
+        Помещает кусок целых строк из нативного протокола в очередь.
+        """
+
+        self.queue.put_nowait(self.clean_chunk(chunk, '[stderr] ' if fd == 2 else ''))
+
     async def executor_wrapper(self, *args, **kwargs):
         """
         Позвоните обертке для считывателя потока.
@@ -94,44 +230,163 @@ class ShellReader:
         """
 
         text = line.decode('utf-8').replace('\r', '').strip('\n')
-        return re.sub(r'\x1b[^m]*m', '', text).replace("``", "`\u200b`").strip('\n')
+        return ANSI_ESCAPE.sub('', text).replace("``", "`\u200b`").strip('\n')
+
+    @staticmethod
+    def clean_chunk(chunk: bytes, prefix: str = '') -> typing.List[str]:
+        """
+        Очищает кусок из нескольких строк за один проход и возвращает список строк.
+        """
+
+        text = chunk.decode('utf-8', errors='replace').replace('\r', '')
+        lines = ANSI_ESCAPE.sub('', text).replace("``", "`\u200b`").split('\n')
+
+        if prefix:
+            return [prefix + line for line in lines]
+
+        return lines
 
-    async def stdout_handler(self, line):
+    async def stdout_handler(self, chunk):
         """
         Обработчик для этого класса для Stdout.
         """
 
-        await self.queue.put(self.clean_bytes(line))
+        await self.queue.put(self.clean_chunk(chunk))
 
-    async def stderr_handler(self, line):
+    async def stderr_handler(self, chunk):
         """
         Обработчик для этого класса для Stderr.
         """
 
-        await self.queue.put(self.clean_bytes(b'[stderr] ' + line))
+        await self.queue.put(self.clean_chunk(chunk, '[stderr] '))
 
     def __enter__(self):
         return self
 
     def __exit__(self, *args):
-        self.process.kill()
-        self.process.terminate()
-        self.close_code = self.process.wait(timeout=0.5)
+        if not self.native:
+            self.process.kill()
+            self.process.terminate()
+            self.close_code = self.process.wait(timeout=0.5)
+            return
+
+        if self.process is None:
+            # Процесс ещё не запущен, asyncio сам убьёт его при отмене
+            self.spawn_task.cancel()
+            return
+
+        if self.process.get_returncode() is None:
+            self.process.kill()
+
+        self.close_code = self.process.get_returncode()
+        self.process.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        if self.native and self.process is not None and self.process.get_returncode() is None:
+            self.process.kill()
+
+            # Дадим циклу собрать код возврата, как это делает wait(timeout=0.5) в режиме потоков
+            deadline = time.perf_counter() + 0.5
+            while self.process.get_returncode() is None and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+
+        self.__exit__(*args)
 
     def __aiter__(self):
         return self
 
     async def __anext__(self):
-        last_output = time.perf_counter()
+        self.last_output = time.perf_counter()
+
+        while not self.pending:
+            self.pending.extend(await self.read_chunk())
+
+        return self.pending.popleft()
+
+    async def read_chunk(self, wait: float = None) -> typing.List[str]:
+        """
+        Возвращает следующий кусок очищенных строк, поднимая :class:`StopAsyncIteration`, когда читать больше нечего.
+
+        Если задан ``wait``, и за это время ничего не пришло, возвращается пустой список.
+        Тайм-аут самого читателя отсчитывается от ``last_output``.
+        """
+
+        if self.native:
+            await self.spawn_task
+
+        deadline = None if wait is None else time.perf_counter() + wait
 
         while not self.closed or not self.queue.empty():
+            poll = 1 if deadline is None else max(0, min(1, deadline - time.perf_counter()))
+
             try:
-                item = await asyncio.wait_for(self.queue.get(), timeout=1)
+                lines = await asyncio.wait_for(self.queue.get(), timeout=poll)
             except asyncio.TimeoutError as exception:
-                if time.perf_counter() - last_output >= self.timeout:
+                if time.perf_counter() - self.last_output >= self.timeout:
                     raise exception
+
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return []
             else:
-                last_output = time.perf_counter()
-                return item
+                if lines is None:
+                    # Маркер завершения от нативного протокола
+                    continue
+
+                if self.native and self.protocol.paused and self.queue.qsize() < self.queue_size // 2:
+                    self.protocol.resume_pipes()
+
+                self.last_output = time.perf_counter()
+                return lines
 
         raise StopAsyncIteration()
+
+    async def batches(self, max_lines: int = 500, max_delay: float = 0.5) -> typing.AsyncIterator[typing.List[str]]:
+        """
+        Итерирует вывод пачками строк вместо отдельных строк.
+
+        Пачка отдаётся, как только в ней набирается ``max_lines`` строк,
+        или через ``max_delay`` секунд после прихода её первой строки.
+
+        .. code:: python3
+
+            async with ShellReader('find /') as reader:
+                async for lines in reader.batches():
+                    await interface.add_lines(lines)
+        """
+
+        self.last_output = time.perf_counter()
+        batch_started = self.last_output
+
+        while True:
+            if len(self.pending) >= max_lines:
+                yield [self.pending.popleft() for _ in range(max_lines)]
+                self.last_output = batch_started = time.perf_counter()
+                continue
+
+            wait = None
+
+            if self.pending:
+                wait = batch_started + max_delay - time.perf_counter()
+
+                if wait <= 0:
+                    batch = list(self.pending)
+                    self.pending.clear()
+                    yield batch
+                    self.last_output = time.perf_counter()
+                    continue
+
+            try:
+                lines = await self.read_chunk(wait)
+            except StopAsyncIteration:
+                break
+
+            if lines and not self.pending:
+                batch_started = time.perf_counter()
+
+            self.pending.extend(lines)
+
+        while self.pending:
+            yield [self.pending.popleft() for _ in range(min(max_lines, len(self.pending)))]
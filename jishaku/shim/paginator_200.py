@@ -2,11 +2,13 @@
 # SPDX-License-Identifier: MIT
 
 import asyncio
+import typing
 
 import disnake
 from disnake import ui
 from disnake.ext import commands
 
+from jishaku.scheduler import EditScheduler, edit_scheduler
 from jishaku.shim.paginator_base import EMOJI_DEFAULT
 
 
@@ -62,6 +64,7 @@ class PaginatorInterface(ui.View):
         self.emojis = kwargs.pop('emoji', EMOJI_DEFAULT)
         self.timeout = kwargs.pop('timeout', 7200)
         self.delete_message = kwargs.pop('delete_message', False)
+        self.edit_scheduler: EditScheduler = kwargs.pop('edit_scheduler', edit_scheduler)
 
         self.sent_page_reactions = False
 
@@ -82,14 +85,11 @@ class PaginatorInterface(ui.View):
     def pages(self):
         """
         Возвращает страницы Paginator без преждевременного закрытия активной страницы.
-        """
-        # Защищенный доступ должен быть разрешен здесь, чтобы не закрывать страницы пагинатора
 
-        paginator_pages = list(self.paginator._pages)
-        if len(self.paginator._current_page) > 1:
-            paginator_pages.append('\n'.join(self.paginator._current_page) + '\n' + (self.paginator.suffix or ''))
+        Это строит полный список, поэтому сам интерфейс использует :attr:`page_count` и :meth:`get_page`.
+        """
 
-        return paginator_pages
+        return [self.get_page(index) for index in range(self.page_count)]
 
     @property
     def page_count(self):
@@ -97,7 +97,17 @@ class PaginatorInterface(ui.View):
         Возвращает количество страниц внутреннего пагинатора.
         """
 
-        return len(self.pages)
+        return len(self.paginator._pages) + (1 if len(self.paginator._current_page) > 1 else 0)
+
+    def get_page(self, index: int) -> str:
+        """
+        Возвращает одну страницу пагинатора, не копируя остальные.
+        """
+
+        if index < len(self.paginator._pages):
+            return self.paginator._pages[index]
+
+        return '\n'.join(self.paginator._current_page) + '\n' + (self.paginator.suffix or '')
 
     @property
     def display_page(self):
@@ -137,7 +147,7 @@ class PaginatorInterface(ui.View):
         это должен быть дикт, содержащий 'content', 'embed' или оба.
         """
 
-        content = self.pages[self.display_page]
+        content = self.get_page(self.display_page)
         return {'content': content, 'view': self}
 
     def update_view(self):
@@ -159,16 +169,34 @@ class PaginatorInterface(ui.View):
         Если это уже на нем.
         """
 
-        display_page = self.display_page
-        page_count = self.page_count
+        at_tail = self.display_page + 1 >= self.page_count
 
         self.paginator.add_line(*args, **kwargs)
 
-        new_page_count = self.page_count
+        self.after_lines_added(at_tail)
+
+    async def add_lines(self, lines: typing.Iterable[str], **kwargs):
+        """
+        Добавляет сразу пачку строк, как :meth:`add_line`, но пересчитывает страницы
+        и будит цикл обновления только один раз на всю пачку.
+        """
+
+        at_tail = self.display_page + 1 >= self.page_count
 
-        if display_page + 1 == page_count:
+        add_line = self.paginator.add_line
+        for line in lines:
+            add_line(line, **kwargs)
+
+        self.after_lines_added(at_tail)
+
+    def after_lines_added(self, at_tail: bool):
+        """
+        Общая часть :meth:`add_line` и :meth:`add_lines`. Стоит O(1) и не зависит от числа страниц.
+        """
+
+        if at_tail:
             # Чтобы сохранить позицию фиксированной в конце, обновить позицию на новую последнюю страницу и обновить сообщение.
-            self._display_page = new_page_count
+            self._display_page = max(0, self.page_count - 1)
 
         # Безоговорочно установленные отправить блокировку, чтобы попробовать и гарантировать обновления страницы на нефокусированных страницах
         self.send_lock.set()
@@ -201,36 +229,41 @@ class PaginatorInterface(ui.View):
             return False
         return self.task.done()
 
-    async def send_lock_delayed(self):
+    async def send_edit(self):
         """
-        Корука, которая возвращается через 1 секунду после выпуска блокировки отправки
-        Это помогает уменьшить выброс спама, который быстро достигает ограничений.
+        Редактирует сообщение под текущее состояние интерфейса.
+        Это вызывается планировщиком правок, а не вручную.
         """
 
-        gathered = await self.send_lock.wait()
-        self.send_lock.clear()
-        await asyncio.sleep(1)
-        return gathered
+        if not self.message or self.closed or self.bot.is_closed():
+            return
+
+        self.update_view()
+
+        try:
+            await self.message.edit(**self.send_kwargs)
+        except disnake.NotFound:
+            # произошло что -то ужасное
+            self.message = None
+            self.task.cancel()
 
     async def wait_loop(self):
         """
         Ждет в цикле для обновлений в интерфейсе.Это не следует называть вручную - это обрабатывается `send_to`.
+
+        Сами правки отправляет общий :class:`EditScheduler`, который сливает их и соблюдает ограничения скорости.
         """
 
         try:
             while not self.bot.is_closed():
-                await asyncio.wait_for(self.send_lock_delayed(), timeout=self.timeout)
-
-                self.update_view()
+                await asyncio.wait_for(self.send_lock.wait(), timeout=self.timeout)
+                self.send_lock.clear()
 
-                try:
-                    await self.message.edit(**self.send_kwargs)
-                except disnake.NotFound:
-                    # произошло что -то ужасное
-                    return
+                self.edit_scheduler.request(self)
 
         except (asyncio.CancelledError, asyncio.TimeoutError) as exception:
             self.close_exception = exception
+            self.edit_scheduler.discard(self)
 
             if self.bot.is_closed():
                 # Ничего не могу сделать с сообщениями, так что просто закройте, чтобы избежать шумной ошибки
@@ -310,7 +343,7 @@ class PaginatorEmbedInterface(PaginatorInterface):
 
     @property
     def send_kwargs(self) -> dict:
-        self._embed.description = self.pages[self.display_page]
+        self._embed.description = self.get_page(self.display_page)
         return {'embed': self._embed, 'view': self}
 
     max_page_size = 2048
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import collections
+import sys
+import time
+import typing
+from datetime import datetime, timezone
+
+__all__ = ('StoreStats', 'GuildStats', 'CacheReport', 'TimeSlicer', 'estimate_size', 'measure_cache')
+
+
+StoreStats = collections.namedtuple('StoreStats', 'count size')
+
+# Хранилища ConnectionState: имя в отчёте -> атрибут
+STATE_STORES = (
+    ('users', '_users'),
+    ('guilds', '_guilds'),
+    ('emojis', '_emojis'),
+    ('stickers', '_stickers'),
+    ('soundboard_sounds', '_soundboard_sounds'),
+    ('private_channels', '_private_channels'),
+    ('messages', '_messages'),
+    ('voice_clients', '_voice_clients'),
+    ('global_application_commands', '_global_application_commands'),
+)
+
+# Хранилища каждой гильдии: имя в отчёте -> атрибут
+GUILD_STORES = (
+    ('members', '_members'),
+    ('channels', '_channels'),
+    ('threads', '_threads'),
+    ('roles', '_roles'),
+    ('voice_states', '_voice_states'),
+    ('emojis', 'emojis'),
+    ('stickers', 'stickers'),
+    ('stage_instances', '_stage_instances'),
+    ('scheduled_events', '_scheduled_events'),
+)
+
+# Эмодзи и стикеры гильдий уже лежат в общих хранилищах, поэтому в итог они не прибавляются
+SHARED_GUILD_STORES = {'emojis', 'stickers'}
+
+PRIMITIVES = (str, bytes, int, float, bool, type(None))
+CONTAINERS = (list, tuple, set, frozenset, dict)
+
+slot_cache: typing.Dict[type, typing.Tuple[str, ...]] = {}
+
+
+def slot_names(kind: type) -> typing.Tuple[str, ...]:
+    """
+    Все имена из ``__slots__`` типа и его предков.
+    """
+
+    try:
+        return slot_cache[kind]
+    except KeyError:
+        pass
+
+    names = []
+
+    for base in kind.__mro__:
+        slots = base.__dict__.get('__slots__', ())
+
+        if isinstance(slots, str):
+            slots = (slots,)
+
+        names.extend(name for name in slots if name not in ('__dict__', '__weakref__'))
+
+    slot_cache[kind] = names = tuple(names)
+    return names
+
+
+def estimate_size(obj) -> int:
+    """
+    Оценивает размер объекта кеша: сам объект и его простые атрибуты на один уровень вглубь.
+
+    Ссылки на другие модели не учитываются, так как они посчитаны в своих хранилищах.
+    """
+
+    size = sys.getsizeof(obj)
+    values = [getattr(obj, name, None) for name in slot_names(type(obj))]
+
+    attributes = getattr(obj, '__dict__', None)
+
+    if attributes:
+        size += sys.getsizeof(attributes)
+        values.extend(attributes.values())
+
+    for value in values:
+        if isinstance(value, PRIMITIVES) or isinstance(value, CONTAINERS):
+            size += sys.getsizeof(value)
+
+    return size
+
+
+class TimeSlicer:
+    """
+    Отдаёт управление циклу событий, когда текущий срез работы длится дольше ``time_slice`` секунд.
+    """
+
+    def __init__(self, time_slice: float = 0.005):
+        self.time_slice = time_slice
+        self.started = time.perf_counter()
+        self.slices = 1
+
+    async def tick(self):
+        """
+        Отдаёт управление, если срез исчерпан.
+        """
+
+        if time.perf_counter() - self.started >= self.time_slice:
+            await asyncio.sleep(0)
+            self.started = time.perf_counter()
+            self.slices += 1
+
+
+class GuildStats:
+    """
+    Размеры хранилищ одной гильдии.
+    """
+
+    __slots__ = ('id', 'name', 'stores')
+
+    def __init__(self, guild_id: int, name: str):
+        self.id = guild_id
+        self.name = name
+        self.stores: typing.Dict[str, StoreStats] = {}
+
+    @property
+    def size(self) -> int:
+        """
+        Оценка суммарного размера хранилищ гильдии в байтах.
+        """
+
+        return sum(stats.size for stats in self.stores.values())
+
+    def to_dict(self) -> dict:
+        """
+        Представление для JSON.
+        """
+
+        return {
+            'id': self.id,
+            'name': self.name,
+            'size': self.size,
+            'stores': {name: stats._asdict() for name, stats in self.stores.items()}
+        }
+
+
+class CacheReport:
+    """
+    Отчёт о том, сколько объектов и примерно сколько байт занимает каждое хранилище кеша бота.
+    """
+
+    def __init__(self):
+        self.taken = datetime.now(timezone.utc)
+        self.duration = 0.0
+        self.slices = 0
+        self.stores: typing.Dict[str, StoreStats] = {}
+        self.guilds: typing.List[GuildStats] = []
+
+    def add(self, name: str, stats: StoreStats):
+        """
+        Прибавляет размеры к хранилищу отчёта.
+        """
+
+        previous = self.stores.get(name, StoreStats(0, 0))
+        self.stores[name] = StoreStats(previous.count + stats.count, previous.size + stats.size)
+
+    @property
+    def size(self) -> int:
+        """
+        Оценка суммарного размера всех хранилищ в байтах.
+        """
+
+        return sum(stats.size for stats in self.stores.values())
+
+    def top_guilds(self, limit: int = 10) -> typing.List[GuildStats]:
+        """
+        Гильдии с наибольшим кешем.
+        """
+
+        return sorted(self.guilds, key=lambda guild: guild.size, reverse=True)[:limit]
+
+    def to_dict(self, guild_limit: typing.Optional[int] = None) -> dict:
+        """
+        Представление для JSON, чтобы отслеживать кеш во времени.
+        """
+
+        guilds = self.top_guilds(guild_limit) if guild_limit else self.guilds
+
+        return {
+            'taken': self.taken.isoformat(),
+            'duration': self.duration,
+            'size': self.size,
+            'stores': {name: stats._asdict() for name, stats in self.stores.items()},
+            'guilds': [guild.to_dict() for guild in guilds]
+        }
+
+
+async def measure_store(values: typing.Iterable, slicer: TimeSlicer, sample_size: int) -> StoreStats:
+    """
+    Считает объекты хранилища и оценивает их размер по равномерной выборке.
+    """
+
+    if hasattr(values, 'values'):
+        # Словари, включая WeakValueDictionary хранилища пользователей
+        values = values.values()
+
+    values = list(values)
+    count = len(values)
+
+    if not count:
+        return StoreStats(0, 0)
+
+    step = max(1, count // sample_size)
+    sampled = 0
+    size = 0
+
+    for index in range(0, count, step):
+        size += estimate_size(values[index])
+        sampled += 1
+
+        await slicer.tick()
+
+    return StoreStats(count, size * count // sampled)
+
+
+async def measure_cache(bot, time_slice: float = 0.005, sample_size: int = 256) -> CacheReport:
+    """
+    Обходит кеш бота по частям, отдавая управление циклу событий после каждого среза в ``time_slice`` секунд.
+    """
+
+    state = bot._connection  # pylint: disable=protected-access
+    slicer = TimeSlicer(time_slice)
+    report = CacheReport()
+
+    started = time.perf_counter()
+
+    for name, attribute in STATE_STORES:
+        store = getattr(state, attribute, None)
+
+        if store is not None:
+            report.add(name, await measure_store(store, slicer, sample_size))
+
+    for guild in list(getattr(state, '_guilds', {}).values()):
+        guild_stats = GuildStats(guild.id, getattr(guild, 'name', None))
+
+        for name, attribute in GUILD_STORES:
+            store = getattr(guild, attribute, None)
+
+            if store is None:
+                continue
+
+            stats = await measure_store(store, slicer, sample_size)
+            guild_stats.stores[name] = stats
+
+            if name not in SHARED_GUILD_STORES:
+                report.add(f"guild.{name}", stats)
+
+        report.guilds.append(guild_stats)
+
+    report.duration = time.perf_counter() - started
+    report.slices = slicer.slices
+
+    return report
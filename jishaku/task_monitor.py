@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import asyncio.events
+import collections
+import linecache
+import os
+import sys
+import time
+import typing
+import weakref
+
+from jishaku.profiling import await_chain
+
+__all__ = ('TaskRecord', 'TaskInfo', 'TaskMonitor', 'task_monitor', 'describe_tasks', 'format_task_stack')
+
+ASYNCIO_DIRECTORY = os.path.dirname(asyncio.__file__)
+
+
+class TaskRecord:
+    """
+    Учётные данные одной задачи, собранные :class:`TaskMonitor`.
+    """
+
+    __slots__ = ('created', 'site', 'cpu_time', 'steps')
+
+    def __init__(self, created: typing.Optional[float] = None, site: typing.Optional[str] = None):
+        self.created = created
+        self.site = site
+        self.cpu_time = 0.0
+        self.steps = 0
+
+
+TaskInfo = collections.namedtuple('TaskInfo', 'task name coroutine age cpu_time steps site await_point')
+
+
+def frame_location(frame) -> str:
+    """
+    Текущее место выполнения кадра: функция, файл и строка.
+    """
+
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+
+    return f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def creation_site() -> typing.Optional[str]:
+    """
+    Находит первый кадр вне asyncio и этого модуля, то есть место, где была создана задача.
+    """
+
+    frame = sys._getframe(2)  # pylint: disable=protected-access
+
+    while frame is not None:
+        filename = frame.f_code.co_filename
+
+        if not filename.startswith(ASYNCIO_DIRECTORY) and filename != __file__:
+            return frame_location(frame)
+
+        frame = frame.f_back
+
+    return None
+
+
+class TaskMonitor:
+    """
+    Учёт задач asyncio: место и время создания, а также процессорное время каждой задачи.
+
+    Фабрика задач запоминает, где создана каждая задача, а выполнение шагов задач
+    замеряется через :meth:`asyncio.Handle._run`, так что учитывается только время,
+    когда задача действительно занимала цикл.
+
+    Замер шагов устанавливается глобально для процесса, поэтому монитор существует в одном экземпляре,
+    :data:`task_monitor`.
+    """
+
+    def __init__(self):
+        self.records: typing.MutableMapping[asyncio.Task, TaskRecord] = weakref.WeakKeyDictionary()
+        self.loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self.previous_factory = None
+        self.original_run = None
+
+    @property
+    def installed(self) -> bool:
+        """
+        Установлен ли монитор.
+        """
+
+        return self.original_run is not None
+
+    def install(self, loop: asyncio.AbstractEventLoop = None):
+        """
+        Устанавливает фабрику задач в цикл и замер шагов задач.
+        """
+
+        if self.installed:
+            return
+
+        self.loop = loop or asyncio.get_event_loop()
+        self.previous_factory = self.loop.get_task_factory()
+        self.loop.set_task_factory(self.task_factory)
+
+        original_run = self.original_run = asyncio.events.Handle._run  # pylint: disable=protected-access
+        records = self.records
+
+        def _run(handle):
+            task = getattr(handle._callback, '__self__', None)  # pylint: disable=protected-access
+
+            if not isinstance(task, asyncio.Task):
+                return original_run(handle)
+
+            started = time.thread_time()
+
+            try:
+                return original_run(handle)
+            finally:
+                record = records.get(task)
+
+                if record is None:
+                    # Задача создана до установки монитора
+                    record = records[task] = TaskRecord()
+
+                record.cpu_time += time.thread_time() - started
+                record.steps += 1
+
+        asyncio.events.Handle._run = _run  # pylint: disable=protected-access
+
+    def uninstall(self):
+        """
+        Убирает фабрику задач и замер шагов, возвращая всё как было.
+        """
+
+        if not self.installed:
+            return
+
+        asyncio.events.Handle._run = self.original_run  # pylint: disable=protected-access
+        self.original_run = None
+
+        if self.loop is not None and not self.loop.is_closed() and self.loop.get_task_factory() == self.task_factory:
+            self.loop.set_task_factory(self.previous_factory)
+
+        self.loop = None
+        self.previous_factory = None
+
+    def task_factory(self, loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+        """
+        Фабрика задач, которая запоминает место и время создания. Это не следует вызывать вручную.
+        """
+
+        if self.previous_factory is not None:
+            task = self.previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+
+        self.records[task] = TaskRecord(time.monotonic(), creation_site())
+
+        return task
+
+
+task_monitor = TaskMonitor()
+
+
+def describe_tasks(loop: asyncio.AbstractEventLoop = None, monitor: TaskMonitor = task_monitor) -> typing.List[TaskInfo]:
+    """
+    Возвращает снимки всех незавершённых задач цикла.
+    """
+
+    now = time.monotonic()
+    infos = []
+
+    for task in asyncio.all_tasks(loop or asyncio.get_event_loop()):
+        coro = task.get_coro()
+        record = monitor.records.get(task)
+        frames = await_chain(coro)
+
+        if frames:
+            # Место ожидания внутри самого asyncio мало о чём говорит, поэтому берём последний кадр вне него
+            own_frames = [frame for frame in frames if not frame.f_code.co_filename.startswith(ASYNCIO_DIRECTORY)]
+            await_point = frame_location((own_frames or frames)[-1])
+        else:
+            await_point = "<выполняется>" if getattr(coro, 'cr_running', False) else "<нет кадра>"
+
+        infos.append(TaskInfo(
+            task=task,
+            name=task.get_name(),
+            coroutine=getattr(coro, '__qualname__', repr(coro)),
+            age=now - record.created if record and record.created is not None else None,
+            cpu_time=record.cpu_time if record else None,
+            steps=record.steps if record else None,
+            site=record.site if record else None,
+            await_point=await_point
+        ))
+
+    return infos
+
+
+def format_task_stack(task: asyncio.Task) -> str:
+    """
+    Форматирует всю цепочку ``await`` задачи, как трассировку, от внешней корутины к месту ожидания.
+    """
+
+    lines = [repr(task), ""]
+
+    for frame in await_chain(task.get_coro()):
+        code = frame.f_code
+        lines.append(f'  File "{code.co_filename}", line {frame.f_lineno}, in {getattr(code, "co_qualname", code.co_name)}')
+
+        source = linecache.getline(code.co_filename, frame.f_lineno, frame.f_globals).strip()
+
+        if source:
+            lines.append(f"    {source}")
+
+    waiter = getattr(task, '_fut_waiter', None)
+
+    if waiter is not None:
+        lines.append(f"  Ожидает: {waiter!r}")
+
+    return "\n".join(lines)
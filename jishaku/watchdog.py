@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import collections
+import heapq
+import sys
+import threading
+import time
+import traceback
+import typing
+from datetime import datetime, timezone
+
+__all__ = ('Stall', 'LoopWatchdog')
+
+
+Stall = collections.namedtuple('Stall', 'duration started stack task')
+
+
+class LoopWatchdog:
+    """
+    Сторожевой поток, который замечает, когда цикл событий перестаёт тикать.
+
+    Цикл каждые ``interval`` секунд отмечает тик обратным вызовом. Если поток видит,
+    что тика не было дольше ``threshold`` секунд, он снимает стек главного потока цикла
+    и текущую задачу в этот момент. Когда цикл снова тикает, зависание записывается с полной длительностью.
+
+    Хранятся ``capacity`` худших зависаний; они доступны через :attr:`stalls`.
+
+    .. code:: python3
+
+        watchdog = LoopWatchdog(bot.loop, threshold=0.25)
+        watchdog.start()
+
+        for stall in watchdog.stalls:
+            print(f"{stall.duration:.2f}s in {stall.task}")
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop = None,
+        threshold: float = 0.25,
+        interval: float = 0.05,
+        capacity: int = 20,
+        stack_limit: int = 30
+    ):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+        self.capacity = capacity
+        self.stack_limit = stack_limit
+
+        self.worst: typing.List[typing.Tuple[float, int, Stall]] = []
+        self.stall_count = 0
+        self.total_stall_time = 0.0
+
+        self.expected = 0.0
+        self.ticks = 0
+        self.pending: typing.Optional[typing.Tuple[int, datetime, typing.List[str], typing.Optional[str]]] = None
+
+        self.loop_thread_id: int = None
+        self.handle: asyncio.TimerHandle = None
+        self.thread: threading.Thread = None
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """
+        Работает ли сторожевой поток.
+        """
+
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def stalls(self) -> typing.List[Stall]:
+        """
+        Записанные зависания, от худшего к лучшему.
+        """
+
+        with self.lock:
+            return [stall for _, _, stall in sorted(self.worst, reverse=True)]
+
+    def clear(self):
+        """
+        Забывает записанные зависания и счётчики.
+        """
+
+        with self.lock:
+            self.worst.clear()
+            self.stall_count = 0
+            self.total_stall_time = 0.0
+
+    def start(self):
+        """
+        Запускает сторожевой поток. Это нужно вызывать из потока цикла событий.
+        """
+
+        if self.running:
+            return
+
+        self.loop = self.loop or asyncio.get_event_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.stopped.clear()
+
+        self.expected = time.monotonic() + self.interval
+        self.handle = self.loop.call_later(self.interval, self.tick)
+
+        self.thread = threading.Thread(target=self.watch, name='jishaku-watchdog', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Останавливает сторожевой поток и тики цикла.
+        """
+
+        self.stopped.set()
+
+        if self.handle:
+            self.handle.cancel()
+            self.handle = None
+
+    def tick(self):
+        """
+        Тик цикла событий. Это не следует вызывать вручную - это обрабатывается `start`.
+        """
+
+        now = time.monotonic()
+        lag = now - self.expected
+
+        with self.lock:
+            pending, self.pending = self.pending, None
+            self.ticks += 1
+
+            if pending is not None and pending[0] == self.ticks - 1:
+                _, started, stack, task = pending
+                self.record(Stall(lag + self.interval, started, stack, task))
+
+        self.expected = now + self.interval
+
+        if not self.stopped.is_set():
+            self.handle = self.loop.call_later(self.interval, self.tick)
+
+    def record(self, stall: Stall):
+        """
+        Добавляет зависание, оставляя только ``capacity`` худших. Вызывается под блокировкой.
+        """
+
+        self.stall_count += 1
+        self.total_stall_time += stall.duration
+
+        entry = (stall.duration, self.stall_count, stall)
+
+        if len(self.worst) < self.capacity:
+            heapq.heappush(self.worst, entry)
+        else:
+            heapq.heappushpop(self.worst, entry)
+
+    def watch(self):
+        """
+        Тело сторожевого потока. Это не следует вызывать вручную - это обрабатывается `start`.
+        """
+
+        while not self.stopped.wait(self.interval):
+            if self.loop.is_closed():
+                return
+
+            lag = time.monotonic() - self.expected
+
+            if lag < self.threshold:
+                continue
+
+            with self.lock:
+                if self.pending is not None and self.pending[0] == self.ticks:
+                    # Это зависание уже снято
+                    continue
+
+                self.pending = (self.ticks, datetime.now(timezone.utc), self.capture_stack(), self.capture_task())
+
+    def capture_stack(self) -> typing.List[str]:
+        """
+        Снимает стек потока цикла событий в текущий момент.
+        """
+
+        frame = sys._current_frames().get(self.loop_thread_id)  # pylint: disable=protected-access
+
+        if frame is None:
+            return []
+
+        return traceback.format_list(traceback.extract_stack(frame, limit=self.stack_limit))
+
+    def capture_task(self) -> typing.Optional[str]:
+        """
+        Возвращает имя и корутину задачи, которая выполняется в цикле в текущий момент.
+        """
+
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return None
+
+        if task is None:
+            return None
+
+        coro = task.get_coro()
+        return f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
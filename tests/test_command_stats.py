@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.command_stats test
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import random
+import time
+from unittest import mock
+
+from disnake.ext import commands
+from utils import run_async
+
+from jishaku.command_stats import CommandStatsRecorder, LogLinearHistogram
+
+
+def test_histogram_buckets():
+    histogram = LogLinearHistogram()
+
+    # Корзины идут подряд без пропусков и перекрытий
+    for index in range(1, len(histogram.buckets)):
+        assert histogram.bounds(index - 1)[1] == histogram.bounds(index)[0]
+
+    for microseconds in (0, 1, 15, 16, 17, 1000, 123456, 10 ** 9):
+        low, high = histogram.bounds(histogram.index(microseconds))
+        assert low <= microseconds / 1e6 < high
+
+
+def test_histogram_percentiles():
+    histogram = LogLinearHistogram()
+    size = len(histogram.buckets)
+
+    values = [random.uniform(0.001, 2.0) for _ in range(10000)]
+
+    for value in values:
+        histogram.record(value)
+
+    # Огромные значения попадают в последнюю корзину
+    histogram.record(10 ** 9)
+
+    assert len(histogram.buckets) == size
+    assert histogram.count == 10001
+    assert histogram.max == 10 ** 9
+
+    values.sort()
+
+    for fraction in (0.5, 0.9, 0.99):
+        exact = values[int(fraction * len(values))]
+        assert abs(histogram.percentile(fraction) - exact) / exact < 0.15
+
+    assert LogLinearHistogram().percentile(0.5) is None
+
+
+def test_command_stats_recorder():
+    recorder = CommandStatsRecorder(pending_limit=2)
+
+    recorder.start(1)
+    time.sleep(0.01)
+    assert recorder.finish(1, 'jsk py') >= 0.01
+
+    recorder.start(2)
+    assert recorder.finish(2, 'jsk py', failed=True) is not None
+
+    # Завершение без известного начала не записывается
+    assert recorder.finish(3, 'jsk py') is None
+
+    for key in range(10, 20):
+        recorder.start(key)
+
+    assert len(recorder.pending) == 2
+    assert recorder.finish(10, 'jsk sh') is None
+
+    stats = recorder.commands['jsk py']
+    assert stats.calls == 2
+    assert stats.errors == 1
+    assert stats.error_rate == 0.5
+    assert 'jsk sh' not in recorder.commands
+
+    recorder.reset()
+    assert not recorder.commands and not recorder.pending
+
+
+def test_histogram_cumulative():
+    histogram = LogLinearHistogram()
+
+    for value in (0.001, 0.002, 0.04, 0.3, 7.0):
+        histogram.record(value)
+
+    assert list(histogram.cumulative((0.01, 0.1, 1.0, 10.0))) == [(0.01, 2), (0.1, 3), (1.0, 4), (10.0, 5)]
+
+
+@run_async
+async def test_default_error_handlers_survive():
+    bot = commands.Bot('?')
+    bot.load_extension('jishaku')
+    cog = bot.get_cog('Jishaku')
+
+    # cog_load выполняется задачей, ждём, пока учёт подключится
+    for _ in range(100):
+        if cog.dispatch_hook is not None:
+            break
+
+        await asyncio.sleep(0.02)
+
+    ctx = mock.MagicMock(cog=None)
+    ctx.command.qualified_name = 'boom'
+    ctx.command.has_error_handler.return_value = False
+
+    inter = mock.MagicMock(id=1234)
+    inter.data.name = 'ping'
+    inter.data.options = []
+    inter.application_command.has_error_handler.return_value = False
+    inter.application_command.cog = None
+
+    try:
+        # Джишаку не слушает событий ошибок, иначе обработчики бота по умолчанию молчат
+        assert 'on_command_error' not in bot.extra_events
+        assert 'on_slash_command_error' not in bot.extra_events
+
+        with mock.patch('traceback.print_exception') as print_exception:
+            bot.dispatch('command', ctx)
+            bot.dispatch('command_error', ctx, commands.CommandError('boom'))
+
+            bot.dispatch('slash_command', inter)
+            bot.dispatch('slash_command_error', inter, commands.CommandError('ping'))
+
+            await asyncio.sleep(0.05)
+
+        assert print_exception.call_count == 2
+
+        stats = cog.command_stats.commands
+        assert stats['boom'].calls == 1 and stats['boom'].errors == 1
+        assert stats['/ping'].calls == 1 and stats['/ping'].errors == 1
+
+        bot.dispatch('command', ctx)
+        bot.dispatch('command_completion', ctx)
+        assert stats['boom'].calls == 2 and stats['boom'].errors == 1
+    finally:
+        bot.unload_extension('jishaku')
+        await bot.close()
+
+    # Выгрузка возвращает dispatch бота
+    assert 'dispatch' not in bot.__dict__
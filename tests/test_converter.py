@@ -11,7 +11,7 @@ jishaku converter test
 
 import inspect
 
-from jishaku.codeblocks import Codeblock, codeblock_converter
+from jishaku.codeblocks import Codeblock, codeblock_converter, split_switches
 
 
 def test_codeblock_converter():
@@ -112,3 +112,17 @@ def test_codeblock_converter():
     assert isinstance(codeblock, Codeblock)
     assert codeblock.content.strip() == 'nine'
     assert not codeblock.language
+
+
+def test_split_switches():
+    switches = ('--proc', '--cprofile')
+
+    assert split_switches('--proc --cprofile ```py\nx```', switches) == ({'--proc', '--cprofile'}, '```py\nx```')
+    assert split_switches('--cprofile```py\nx```', switches) == ({'--cprofile'}, '```py\nx```')
+    assert split_switches('  --proc\n1 + 1', switches) == ({'--proc'}, '1 + 1')
+
+    # Неизвестные переключатели и похожие на них выражения остаются в коде
+    assert split_switches('--unknown --proc x', switches) == (set(), '--unknown --proc x')
+    assert split_switches('--process', switches) == (set(), '--process')
+    assert split_switches('ping', switches) == (set(), 'ping')
+
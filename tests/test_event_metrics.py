@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.event_metrics test
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import time
+import types
+
+from utils import run_async
+
+from jishaku.event_metrics import EventMetrics, RateWindow, event_shard
+
+
+def test_rate_window():
+    window = RateWindow(size=10)
+
+    for second in range(100, 110):
+        window.add(second, 5)
+
+    assert window.rate(5, 110) == 5.0
+    assert window.rate(5, 112) == 3.0
+
+    # Окно во весь размер кольца охватывает все его секунды, включая самую старую
+    ramp = RateWindow(size=10)
+
+    for second in range(100, 110):
+        ramp.add(second, second - 99)
+
+    ramp.add(110)
+    assert ramp.rate(10, 110) == 5.5
+
+    # Старая секунда вытесняет ячейку
+    window.add(120)
+    assert window.rate(5, 121) == 0.2
+
+
+def test_event_shard():
+    guild_id = 1 << 22 | 1 << 23
+
+    assert event_shard('MESSAGE_CREATE', {'guild_id': str(guild_id)}, 2) == 1
+    assert event_shard('GUILD_CREATE', {'id': str(guild_id)}, 4) == 3
+    assert event_shard('MESSAGE_CREATE', {'channel_id': '1'}, 4) == 0
+    assert event_shard('MESSAGE_CREATE', {'guild_id': str(guild_id)}, None) == 0
+
+
+@run_async
+async def test_event_metrics():
+    parsed = []
+
+    def parse_message_create(data):
+        parsed.append(data)
+
+    class FakeBot:
+        def __init__(self):
+            self._connection = types.SimpleNamespace(
+                parsers={'MESSAGE_CREATE': parse_message_create},
+                shard_count=2
+            )
+
+        async def _run_event(self, coro, event_name, *args, **kwargs):
+            await coro(*args, **kwargs)
+
+        async def on_message(self, message):
+            # Ожидание не занимает цикл и не учитывается, а синхронная работа учитывается
+            await asyncio.sleep(0.2)
+            started = time.perf_counter()
+
+            while time.perf_counter() - started < 0.01:
+                pass
+
+    bot = FakeBot()
+    parsers = bot._connection.parsers
+
+    metrics = EventMetrics()
+    metrics.install(bot)
+
+    assert metrics.installed
+    assert parsers['MESSAGE_CREATE'] is not parse_message_create
+
+    for guild_id in (0, 1 << 22, 1 << 22):
+        parsers['MESSAGE_CREATE']({'guild_id': guild_id})
+
+    await bot._run_event(bot.on_message, 'on_message', None)
+
+    assert len(parsed) == 3
+    assert metrics.events['MESSAGE_CREATE'].count == 3
+    assert metrics.shard_counts == {0: 1, 1: 2}
+    assert metrics.rates(10).keys() == {0, 1}
+
+    name, listener = metrics.slowest_listeners(1)[0]
+    assert name.endswith('on_message')
+    assert listener.count == 1
+    assert 0.01 <= listener.max_time < 0.1
+
+    metrics.uninstall()
+
+    assert not metrics.installed
+    assert parsers['MESSAGE_CREATE'] is parse_message_create
+    assert '_run_event' not in vars(bot)
+
+    metrics.reset()
+    assert not metrics.events and not metrics.listeners
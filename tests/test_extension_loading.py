@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.extension_loading test
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import types
+from unittest import mock
+
+from disnake.ext import commands
+from utils import run_async
+
+from jishaku.extension_loading import (
+    ExtensionFingerprints, ExtensionPlan, dependency_order, module_imports, prepare_extensions
+)
+
+
+def test_module_imports():
+    source = (
+        "import os, json\n"
+        "from . import helpers\n"
+        "from .models import User\n"
+        "from ..shared import *\n"
+        "from disnake.ext import commands\n"
+    )
+
+    imports = module_imports(source, 'cogs.admin.panel')
+
+    assert {'os', 'json', 'cogs.admin', 'cogs.admin.helpers', 'cogs.admin.models', 'cogs.shared'} <= imports
+    assert {'disnake.ext', 'disnake.ext.commands'} <= imports
+
+    assert 'cogs.admin.helpers' in module_imports("from . import helpers", 'cogs.admin', is_package=True)
+
+
+def test_dependency_order():
+    plans = [
+        ExtensionPlan('cogs.a', frozenset({'cogs.c.models'}), 0.0, None),
+        ExtensionPlan('cogs.b', frozenset({'os'}), 0.0, None),
+        ExtensionPlan('cogs.c', frozenset({'cogs.b'}), 0.0, None),
+        ExtensionPlan('cogs.x', frozenset({'cogs.y'}), 0.0, None),
+        ExtensionPlan('cogs.y', frozenset({'cogs.x'}), 0.0, None),
+    ]
+
+    assert dependency_order(plans) == ['cogs.b', 'cogs.c', 'cogs.a', 'cogs.x', 'cogs.y']
+
+
+def test_dependents_order():
+    fingerprints = ExtensionFingerprints()
+    fingerprints.imports = {
+        'cogs.a': frozenset({'os'}),
+        'cogs.b': frozenset({'cogs.a.models'}),
+        'cogs.c': frozenset({'cogs.b'}),
+        'cogs.d': frozenset(),
+    }
+
+    # cogs.a перезагружался последним, поэтому стоит в конце bot.extensions
+    assert fingerprints.dependents(['cogs.a'], ['cogs.c', 'cogs.d', 'cogs.b', 'cogs.a']) == ['cogs.a', 'cogs.b', 'cogs.c']
+
+
+@run_async
+async def test_prepare_extensions(tmp_path):
+    package = tmp_path / 'jsk_load_test_package'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'first.py').write_text(
+        "from . import second\n"
+        "import jsk_load_test_dependency\n"
+        "from jsk_load_test_dependency import VALUE\n"
+        "import jsk_load_test_main_thread\n\n"
+        "def setup(bot):\n    pass\n"
+    )
+    (package / 'second.py').write_text("def setup(bot):\n    pass\n")
+    (package / 'broken.py').write_text("def setup(bot)\n")
+    (tmp_path / 'jsk_load_test_dependency.py').write_text("VALUE = 1\n")
+    # Модуль, который, как многие сторонние, не переносит импорт вне главного потока
+    (tmp_path / 'jsk_load_test_main_thread.py').write_text(
+        "import threading\n"
+        "if threading.current_thread() is not threading.main_thread():\n"
+        "    raise RuntimeError('только главный поток')\n"
+    )
+
+    sys.path.insert(0, str(tmp_path))
+
+    try:
+        names = ['jsk_load_test_package.first', 'jsk_load_test_package.second', 'jsk_load_test_package.broken']
+        plans, order = await prepare_extensions(names)
+
+        assert order == [names[1], names[2], names[0]]
+
+        first, _, broken = plans
+        assert 'jsk_load_test_package.second' in first.imports
+        assert first.error is None
+        assert broken.error.startswith('SyntaxError')
+
+        # Ошибка импорта в потоке записывается в план, а импорт имени из модуля ошибкой не считается
+        assert first.preimport_errors == (('jsk_load_test_main_thread', "RuntimeError: только главный поток"),)
+        assert broken.preimport_errors == ()
+
+        # Сторонняя зависимость импортирована заранее, а байткод уже в кеше
+        assert 'jsk_load_test_dependency' in sys.modules
+
+        if not sys.dont_write_bytecode:
+            assert os.path.exists(importlib.util.cache_from_source(str(package / 'first.py')))
+    finally:
+        sys.path.remove(str(tmp_path))
+
+        for name in list(sys.modules):
+            if name.startswith('jsk_load_test'):
+                del sys.modules[name]
+
+
+@run_async
+async def test_prepare_extensions_importing(tmp_path):
+    (tmp_path / 'jsk_load_test_user.py').write_text("import jsk_load_test_busy.child\n")
+    (tmp_path / 'jsk_load_test_busy').mkdir()
+    (tmp_path / 'jsk_load_test_busy' / '__init__.py').write_text("")
+    (tmp_path / 'jsk_load_test_busy' / 'child.py').write_text("")
+
+    # Пакет, который прямо сейчас импортируется в другом потоке
+    busy = types.ModuleType('jsk_load_test_busy')
+    busy.__spec__ = importlib.util.spec_from_loader('jsk_load_test_busy', loader=None)
+    busy.__spec__._initializing = True
+    sys.modules['jsk_load_test_busy'] = busy
+
+    sys.path.insert(0, str(tmp_path))
+
+    try:
+        with mock.patch('jishaku.extension_loading.preimport', return_value=[]) as preimport:
+            await prepare_extensions(['jsk_load_test_user'])
+
+        preimport.assert_not_called()
+        assert 'jsk_load_test_busy.child' not in sys.modules
+    finally:
+        sys.path.remove(str(tmp_path))
+
+        for name in list(sys.modules):
+            if name.startswith('jsk_load_test'):
+                del sys.modules[name]
+
+
+@run_async
+async def test_prepare_extensions_cancel(tmp_path):
+    # Зависимость расширения импортируется, пока тест не откроет ворота
+    gate = types.ModuleType('jsk_load_test_gate')
+    gate.started = threading.Event()
+    gate.opened = threading.Event()
+    gate.finished = threading.Event()
+    sys.modules['jsk_load_test_gate'] = gate
+
+    (tmp_path / 'jsk_load_test_slow.py').write_text(
+        "import jsk_load_test_gate as gate\n"
+        "gate.started.set()\n"
+        "gate.opened.wait(10)\n"
+        "gate.finished.set()\n"
+    )
+    (tmp_path / 'jsk_load_test_cancelled.py').write_text("import jsk_load_test_slow\n")
+
+    sys.path.insert(0, str(tmp_path))
+
+    try:
+        task = asyncio.ensure_future(prepare_extensions(['jsk_load_test_cancelled']))
+
+        while not gate.started.is_set():
+            await asyncio.sleep(0.01)
+
+        task.cancel()
+
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        # Отмена не ждала идущего в пуле импорта
+        assert task.cancelled()
+        assert not gate.finished.is_set()
+    finally:
+        gate.opened.set()
+        gate.finished.wait(10)
+
+        sys.path.remove(str(tmp_path))
+
+        for name in list(sys.modules):
+            if name.startswith('jsk_load_test'):
+                del sys.modules[name]
+
+
+@run_async
+async def test_extension_fingerprints(tmp_path):
+    package = tmp_path / 'jsk_watch_test'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'base.py').write_text("VALUE = 1\n")
+    (package / 'user.py').write_text("from . import base\n")
+    (package / 'other.py').write_text("import os\n")
+
+    sys.path.insert(0, str(tmp_path))
+
+    try:
+        names = ['jsk_watch_test.base', 'jsk_watch_test.user', 'jsk_watch_test.other']
+
+        for name in names:
+            importlib.import_module(name)
+
+        fingerprints = ExtensionFingerprints()
+        await fingerprints.record(names)
+
+        assert await fingerprints.stale(names) == []
+
+        # Только время изменения - не изменение
+        base = package / 'base.py'
+        os.utime(base, ns=(0, 10 ** 9))
+        assert await fingerprints.stale(names) == []
+        assert fingerprints.files['jsk_watch_test.base'][str(base)].mtime == 10 ** 9
+
+        base.write_text("VALUE = 2\n")
+        stale = await fingerprints.stale(names)
+
+        assert stale == ['jsk_watch_test.base']
+        assert fingerprints.dependents(stale, names) == ['jsk_watch_test.base', 'jsk_watch_test.user']
+
+        # Перезагруженное расширение стоит в конце bot.extensions, но зависимое всё равно идёт после него
+        assert fingerprints.dependents(stale, ['jsk_watch_test.user', 'jsk_watch_test.base']) == \
+            ['jsk_watch_test.base', 'jsk_watch_test.user']
+
+        await fingerprints.record(stale)
+        assert await fingerprints.stale(names) == []
+
+        fingerprints.forget('jsk_watch_test.other')
+        assert await fingerprints.stale(['jsk_watch_test.other']) == []
+    finally:
+        sys.path.remove(str(tmp_path))
+
+        for name in list(sys.modules):
+            if name.startswith('jsk_watch_test'):
+                del sys.modules[name]
+
+
+def make_ctx(bot):
+    ctx = mock.MagicMock()
+    ctx.bot = bot
+    ctx.invoked_with = 'load'
+    ctx.send = mock.AsyncMock()
+
+    return ctx
+
+
+@run_async
+async def test_jsk_reload_changed_failure(tmp_path):
+    extension = tmp_path / 'jsk_reload_test.py'
+    extension.write_text("def setup(bot):\n    pass\n")
+
+    sys.path.insert(0, str(tmp_path))
+
+    bot = commands.Bot('?')
+    bot.load_extension('jishaku')
+    bot.load_extension('jsk_reload_test')
+    cog = bot.get_cog('Jishaku')
+
+    try:
+        # Отпечатки загруженных расширений записываются в cog_load, который выполняется задачей
+        while 'jsk_reload_test' not in cog.extension_fingerprints.files:
+            await asyncio.sleep(0.01)
+
+        extension.write_text("def setup(bot):\n    raise RuntimeError('broken')\n")
+
+        for _ in range(2):
+            # Неудачная перезагрузка оставляет старый модуль, поэтому расширение остаётся изменившимся
+            ctx = make_ctx(bot)
+            await cog.jsk_load.callback(cog, ctx, ['--changed'])
+
+            report = "".join(call.args[0] for call in ctx.send.call_args_list)
+            assert "`jsk_reload_test`" in report
+            assert "RuntimeError" in report
+
+        extension.write_text("def setup(bot):\n    pass\n\n")
+
+        ctx = make_ctx(bot)
+        await cog.jsk_load.callback(cog, ctx, ['--changed'])
+
+        ctx = make_ctx(bot)
+        await cog.jsk_load.callback(cog, ctx, ['--changed'])
+        assert ctx.send.call_args.args[0] == "Исходный код расширений не изменился."
+    finally:
+        bot.unload_extension('jishaku')
+        await bot.close()
+
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop('jsk_reload_test', None)
+
+
+@run_async
+async def test_autoreload_errors():
+    bot = commands.Bot('?')
+    bot.load_extension('jishaku')
+    cog = bot.get_cog('Jishaku')
+
+    # Выгрузка расширения убирает модули Джишаку, так что флаги берутся из только что загруженного
+    from jishaku.flags import Flags  # pylint: disable=import-outside-toplevel
+
+    calls = []
+
+    async def stale(names):
+        calls.append(names)
+
+        if len(calls) == 1:
+            raise OSError("диск недоступен")
+
+        return ['jishaku']
+
+    destination = mock.MagicMock()
+    destination.send = mock.AsyncMock()
+
+    try:
+        Flags.AUTORELOAD_INTERVAL = 0.01
+
+        with mock.patch.object(cog.extension_fingerprints, 'stale', side_effect=stale), \
+                mock.patch.object(cog, 'load_extensions', wraps=cog.load_extensions) as load_extensions:
+            task = asyncio.ensure_future(cog.autoreload(destination))
+
+            for _ in range(500):
+                if len(calls) >= 10 or task.done():
+                    break
+
+                await asyncio.sleep(0.01)
+
+            # Ошибка проверки сообщается, а слежение продолжается
+            assert not task.done()
+
+            task.cancel()
+
+        first, second = (call.args[0] for call in destination.send.call_args_list)
+
+        assert "OSError" in first
+        # Изменение самого Джишаку не перезагружается, и о нём сообщается один раз
+        assert "`jishaku`" in second and "jsk reload" in second
+        assert all('jishaku' not in call.args[0] for call in load_extensions.call_args_list)
+        assert bot.get_cog('Jishaku') is cog
+    finally:
+        Flags.flag_map['AUTORELOAD_INTERVAL'].override = None
+
+        bot.unload_extension('jishaku')
+        await bot.close()
+
+
+@run_async
+async def test_jsk_load_parallel_report(tmp_path):
+    (tmp_path / 'jsk_load_test_parallel.py').write_text("import jsk_load_test_main_thread\n\ndef setup(bot):\n    pass\n")
+    (tmp_path / 'jsk_load_test_main_thread.py').write_text(
+        "import threading\n"
+        "if threading.current_thread() is not threading.main_thread():\n"
+        "    raise RuntimeError('только главный поток')\n"
+    )
+
+    sys.path.insert(0, str(tmp_path))
+
+    bot = commands.Bot('?')
+    bot.load_extension('jishaku')
+    cog = bot.get_cog('Jishaku')
+
+    try:
+        ctx = make_ctx(bot)
+        await cog.jsk_load.callback(cog, ctx, ['--parallel'], ['jsk_load_test_parallel'])
+
+        report = "".join(call.args[0] for call in ctx.send.call_args_list)
+
+        # Ошибка импорта в потоке видна в отчёте, а сама загрузка в цикле событий проходит
+        assert "предварительный импорт `jsk_load_test_main_thread` в потоке: RuntimeError" in report
+        assert 'jsk_load_test_parallel' in bot.extensions
+    finally:
+        bot.unload_extension('jishaku')
+        await bot.close()
+
+        sys.path.remove(str(tmp_path))
+
+        for name in list(sys.modules):
+            if name.startswith('jsk_load_test'):
+                del sys.modules[name]
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.features.filesystem test
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import threading
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from aiohttp import web
+from disnake.ext import commands
+from utils import run_async
+
+from jishaku.features import filesystem
+from jishaku.features.filesystem import build_file_paginator, read_line_span
+from jishaku.paginators import LazyFilePaginator
+
+
+def make_ctx(bot):
+    ctx = mock.MagicMock()
+    ctx.bot = bot
+    ctx.guild = None
+    ctx.send = mock.AsyncMock(return_value=mock.MagicMock(edit=mock.AsyncMock(), delete=mock.AsyncMock()))
+    ctx.message.add_reaction = mock.AsyncMock()
+
+    return ctx
+
+
+@run_async
+async def test_read_line_span(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("one\ntwo é\nthree\nfour\n", encoding="utf-8")
+
+    assert await read_line_span(str(path), (2, 3)) == "two é\nthree".encode("utf-8")
+    assert await read_line_span(str(path), (4, 4)) == b"four"
+
+    # Промежуток за концом файла обрезается, а не падает
+    assert await read_line_span(str(path), (3, 10)) == b"three\nfour\n"
+
+    # Кодировка определяется так же, как в пагинаторе, а результат всегда в UTF-8
+    path.write_bytes("# -*- coding: cp932 -*-\nよろしく".encode("cp932"))
+    assert await read_line_span(str(path), (2, 2)) == "よろしく".encode("utf-8")
+
+
+@run_async
+async def test_build_file_paginator(tmp_path):
+    lines = [f"line {index}" for index in range(5_000)]
+    path = tmp_path / "big.txt"
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+    threads = []
+
+    def record_thread(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return LazyFilePaginator(*args, **kwargs)
+
+    with mock.patch.object(filesystem, 'LazyFilePaginator', side_effect=record_thread):
+        paginator = await build_file_paginator(str(path), max_size=1985)
+        spanned = await build_file_paginator(BytesIO(path.read_bytes()), line_span=(10, 12), max_size=1985)
+
+    # Чтение и индексация проходят вне цикла событий, и индекс к возврату уже построен
+    assert threads and threading.get_ident() not in threads
+    assert paginator.indexed
+    assert "".join(page[3:-4] for page in paginator.pages).replace("\n", "") == "".join(lines)
+    assert list(spanned.pages) == ["```\nline 9\nline 10\nline 11\n```"]
+
+    with pytest.raises(ValueError):
+        await build_file_paginator(str(path), line_span=(5_001, 5_002))
+
+
+@run_async
+async def test_jsk_cat(tmp_path):
+    bot = commands.Bot('?')
+    bot.load_extension('jishaku')
+    cog = bot.get_cog('Jishaku')
+
+    try:
+        path = tmp_path / "small.py"
+        path.write_text("one = 1\ntwo = 2\nthree = 3\n", encoding="utf-8")
+
+        # Маленький промежуток строк отправляется файлом
+        ctx = make_ctx(bot)
+        await cog.jsk_cat.callback(cog, ctx, f"{path}#L2-3")
+
+        sent = ctx.send.call_args.kwargs['file']
+        assert sent.filename == "small.py"
+        assert sent.fp.read() == b"two = 2\nthree = 3"
+
+        # Большой файл показывается через пагинатор
+        path = tmp_path / "large.txt"
+        path.write_text("\n".join(f"line {index}" for index in range(20_000)), encoding="utf-8")
+
+        ctx = make_ctx(bot)
+        await cog.jsk_cat.callback(cog, ctx, f"{path}#L100-102")
+
+        interface = ctx.send.call_args.kwargs['view']
+        assert interface.pages == ["```\nline 99\nline 100\nline 101\n```"]
+        interface.task.cancel()
+
+        # Ошибки промежутка сообщаются, а не выбрасываются
+        ctx = make_ctx(bot)
+        await cog.jsk_cat.callback(cog, ctx, f"{path}#L30000")
+
+        assert "Не удалось прочитать этот файл" in ctx.send.call_args.args[0]
+    finally:
+        bot.unload_extension('jishaku')
+        await bot.close()
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get('/', handler)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+
+    port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+async def stream_body(
+    request, body: bytes, chunk_size: int, content_length: bool = False, content_type: str = 'text/plain; charset=utf-8'
+):
+    response = web.StreamResponse(headers={'Content-Type': content_type})
+
+    if content_length:
+        response.content_length = len(body)
+
+    await response.prepare(request)
+
+    for index in range(0, len(body), chunk_size):
+        await response.write(body[index:index + chunk_size])
+        await asyncio.sleep(0)
+
+    await response.write_eof()
+    return response
+
+
+@run_async
+async def test_jsk_curl():
+    # Строки из трёхбайтовых символов, чтобы куски ответа резали символы посередине
+    text = "\n".join(f"{index} " + "よ" * 100 for index in range(1_000))
+    body = text.encode('utf-8')
+
+    async def chunked(request):
+        return await stream_body(request, body, 1_000)
+
+    async def sized(request):
+        return await stream_body(request, body, 1_000, content_length=True)
+
+    async def short(request):
+        return await stream_body(request, b"one\ntwo\n", 1_000)
+
+    async def unknown_charset(request):
+        return await stream_body(request, b"\xff\xfe\xfd\n", 1_000, content_type='text/plain; charset=x-no-such-codec')
+
+    bot = commands.Bot('?')
+    bot.load_extension('jishaku')
+    cog = bot.get_cog('Jishaku')
+
+    # Выгрузка расширения убирает модули Джишаку, так что флаги берутся из только что загруженного
+    from jishaku.flags import Flags  # pylint: disable=import-outside-toplevel
+
+    runner, url = await serve(chunked)
+    sized_runner, sized_url = await serve(sized)
+    short_runner, short_url = await serve(short)
+    unknown_runner, unknown_url = await serve(unknown_charset)
+
+    try:
+        # Весь ответ помещается в предел: разрезанные символы собираются инкрементальным декодером
+        ctx = make_ctx(bot)
+        await cog.jsk_curl.callback(cog, ctx, url)
+
+        interface = ctx.send.call_args.kwargs['view']
+        output = "".join(page[3:-3] for page in interface.pages).replace("\n", "")
+
+        assert "\ufffd" not in output
+        assert output == text.replace("\n", "")
+        interface.task.cancel()
+
+        Flags.FILE_SIZE_LIMIT = 100_000
+
+        # Без Content-Length загрузка обрезается на пределе, и это отмечается в выводе
+        ctx = make_ctx(bot)
+        await cog.jsk_curl.callback(cog, ctx, url)
+
+        interface = ctx.send.call_args.kwargs['view']
+        pages = interface.pages
+        output = "".join(page[3:-3] for page in pages).replace("\n", "")
+
+        assert pages[-1].endswith("[ответ обрезан после 100000 байт]\n```")
+        assert "\ufffd" not in output
+        assert len(output.encode('utf-8')) < 100_000 + 100
+        interface.task.cancel()
+
+        # С Content-Length больше предела ответ не загружается вовсе
+        ctx = make_ctx(bot)
+        await cog.jsk_curl.callback(cog, ctx, sized_url)
+
+        ctx.send.assert_called_once()
+        assert "Трусливо отказывается" in ctx.send.call_args.args[0]
+
+        Flags.FORCE_PAGINATOR = True
+
+        # Перевод строки в конце ответа не даёт пустой последней строки
+        ctx = make_ctx(bot)
+        await cog.jsk_curl.callback(cog, ctx, short_url)
+
+        interface = ctx.send.call_args.kwargs['view']
+        assert interface.pages == ["```\none\ntwo\n```"]
+        interface.task.cancel()
+
+        # Неизвестная Python кодировка из заголовка сообщается, а не выбрасывается
+        ctx = make_ctx(bot)
+        await cog.jsk_curl.callback(cog, ctx, unknown_url)
+
+        ctx.send.assert_called_once()
+        assert "Не удалось определить кодировку ответа" in ctx.send.call_args.args[0]
+    finally:
+        Flags.flag_map['FILE_SIZE_LIMIT'].override = None
+        Flags.flag_map['FORCE_PAGINATOR'].override = None
+
+        await runner.cleanup()
+        await sized_runner.cleanup()
+        await short_runner.cleanup()
+        await unknown_runner.cleanup()
+
+        bot.unload_extension('jishaku')
+        await bot.close()
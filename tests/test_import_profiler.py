@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.import_profiler test
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import importlib
+import importlib._bootstrap
+import sys
+
+from jishaku.import_profiler import ImportProfiler, format_import_tree
+
+
+def test_import_profiler(tmp_path):
+    (tmp_path / 'jsk_import_heavy.py').write_text("import time\ntime.sleep(0.05)\n")
+    (tmp_path / 'jsk_import_light.py').write_text("import jsk_import_heavy\n")
+    (tmp_path / 'jsk_import_extension.py').write_text("import jsk_import_light\n")
+
+    sys.path.insert(0, str(tmp_path))
+    original = importlib._bootstrap._find_and_load
+
+    try:
+        with ImportProfiler('jsk_import_extension') as profiler:
+            importlib.import_module('jsk_import_extension')
+
+        assert importlib._bootstrap._find_and_load is original
+
+        root = profiler.root
+        assert root.cumulative >= 0.05
+
+        [extension] = root.children
+        [light] = extension.children
+        [heavy] = light.children
+
+        assert (extension.name, light.name, heavy.name) == (
+            'jsk_import_extension', 'jsk_import_light', 'jsk_import_heavy'
+        )
+
+        assert root.top(1)[0] is heavy
+        assert heavy.self_time >= 0.05
+        assert light.self_time < light.cumulative
+        assert root.top(1, cumulative=True)[0] is extension
+
+        lines = format_import_tree(root).splitlines()
+        assert lines[0].startswith("import time: self [us]")
+        assert lines[-1].endswith("      jsk_import_heavy")
+    finally:
+        sys.path.remove(str(tmp_path))
+
+        for name in list(sys.modules):
+            if name.startswith('jsk_import_'):
+                del sys.modules[name]
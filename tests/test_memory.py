@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.memory test
+~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import gc
+import threading
+import tracemalloc
+from unittest import mock
+
+from utils import run_async
+
+from jishaku.memory import (
+    compare_tracemalloc_snapshots,
+    find_referrer_chains,
+    referrer_chain,
+    take_census,
+    take_tracemalloc_snapshot
+)
+
+
+class LeakyObject:
+    pass
+
+
+class LeakyHolder:
+    def __init__(self):
+        self.items = [LeakyObject()]
+
+
+LEAKY_CACHE = {}
+
+
+@run_async
+async def test_census_diff():
+    before = await take_census()
+    leaked = [LeakyObject() for _ in range(500)]
+    after = await take_census()
+
+    name = f"{__name__}.LeakyObject"
+
+    assert after.counts[name] - before.counts[name] == 500
+    assert after.total_count > before.total_count
+
+    changes = {change[0]: change for change in after.diff(before, limit=100)}
+    assert changes[name][1] == 500
+    assert changes[name][2] > 0
+
+    top = [row[0] for row in after.top(1000)]
+    assert name in top
+
+    del leaked
+
+    # Перепись, вышедшая за бюджет времени, помечается как частичная
+    partial = await take_census(time_budget=0)
+    assert partial.partial
+    assert partial.total_count < after.total_count
+    assert not after.partial
+
+
+@run_async
+async def test_referrer_chains():
+    LEAKY_CACHE['holder'] = LeakyHolder()
+
+    try:
+        total, chains = await find_referrer_chains('LeakyHolder')
+
+        assert total == 1
+        assert chains == [[f'модуль {__name__}', "dict['LEAKY_CACHE']", "dict['holder']", f'{__name__}.LeakyHolder']]
+
+        total, chains = await find_referrer_chains(f'{__name__}.LeakyObject')
+
+        assert total == 1
+        assert chains[0][-3:] == [f'{__name__}.LeakyHolder.items', 'list[0]', f'{__name__}.LeakyObject']
+    finally:
+        LEAKY_CACHE.clear()
+
+
+def test_referrer_chain_budget():
+    LEAKY_CACHE['holder'] = LeakyHolder()
+    original = gc.get_referrers
+    scans = []
+
+    def counting_get_referrers(*objects):
+        scans.append(len(objects))
+        return original(*objects)
+
+    try:
+        leaked = LEAKY_CACHE['holder'].items[0]
+        extra = [[leaked] for _ in range(50)]
+
+        with mock.patch.object(gc, 'get_referrers', counting_get_referrers):
+            chain = referrer_chain(leaked, ignore=(extra,))
+
+            # Один проход по куче на уровень, а не на каждый посещённый объект
+            assert chain[-3:] == [f'{__name__}.LeakyHolder.items', 'list[0]', f'{__name__}.LeakyObject']
+            assert len(scans) <= 8
+            assert max(scans) > 50
+
+            scans.clear()
+
+            # Бюджеты обрывают поиск
+            assert referrer_chain(LEAKY_CACHE['holder'], time_budget=0) is None
+            assert not scans
+            assert referrer_chain(LEAKY_CACHE['holder'], max_visited=1) is None
+    finally:
+        LEAKY_CACHE.clear()
+
+
+@run_async
+async def test_tracemalloc_snapshot():
+    assert (await take_tracemalloc_snapshot()) is None
+
+    tracemalloc.start()
+
+    try:
+        previous = await take_tracemalloc_snapshot()
+        assert isinstance(previous, tracemalloc.Snapshot)
+
+        LEAKY_CACHE['buffers'] = [bytearray(1024) for _ in range(1000)]
+        snapshot = await take_tracemalloc_snapshot()
+
+        # Сравнение и форматирование проходят вне цикла событий
+        threads = []
+        compare_to = tracemalloc.Snapshot.compare_to
+
+        def record_thread(self, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return compare_to(self, *args, **kwargs)
+
+        with mock.patch.object(tracemalloc.Snapshot, 'compare_to', record_thread):
+            lines = await compare_tracemalloc_snapshots(snapshot, previous, 5)
+
+        assert threads and threading.get_ident() not in threads
+        assert len(lines) == 5
+        assert any('test_memory.py' in line for line in lines)
+    finally:
+        LEAKY_CACHE.clear()
+        tracemalloc.stop()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.metrics test
+~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import socket
+from unittest import mock
+
+import aiohttp
+import pytest
+from disnake.ext import commands
+
+from utils import run_async
+
+from jishaku.metrics import CONTENT_TYPE, MetricsExporter, MetricsRegistry
+
+
+def make_registry():
+    registry = MetricsRegistry()
+
+    def collect_latency(writer):
+        for shard_id, latency in ((0, 0.25), (1, float('inf'))):
+            writer.sample(latency, writer.labels(('shard', shard_id)))
+
+    def collect_broken(writer):
+        writer.sample(1)
+        raise RuntimeError("сбой сбора")
+
+    registry.register('bot_latency_seconds', 'gauge', "Latency.", collect_latency)
+    registry.register('bot_broken', 'gauge', "Broken.", collect_broken)
+    registry.register('bot_commands', 'counter', "Commands.", lambda writer: writer.sample(
+        3, writer.labels(('command', 'say "hi"\n')), '_total'
+    ))
+
+    return registry
+
+
+def test_registry_render():
+    registry = make_registry()
+    text = registry.render()
+
+    assert text == (
+        '# TYPE bot_latency_seconds gauge\n'
+        '# HELP bot_latency_seconds Latency.\n'
+        'bot_latency_seconds{shard="0"} 0.25\n'
+        'bot_latency_seconds{shard="1"} +Inf\n'
+        '# TYPE bot_commands counter\n'
+        '# HELP bot_commands Commands.\n'
+        'bot_commands_total{command="say \\"hi\\"\\n"} 3\n'
+        '# EOF\n'
+    )
+
+    # Строки меток собираются один раз
+    labels = registry.writer.label_cache[(('shard', 0),)]
+    registry.render()
+    assert registry.writer.label_cache[(('shard', 0),)] is labels
+
+    with pytest.raises(ValueError):
+        registry.register('bot_bad', 'gauges', "Bad.", lambda writer: None)
+
+
+@run_async
+async def test_exporter():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    exporter = MetricsExporter(make_registry(), port=port)
+    await exporter.start()
+
+    try:
+        assert exporter.running
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.status == 200
+                assert response.headers['Content-Type'] == CONTENT_TYPE
+                assert (await response.text()).endswith('# EOF\n')
+    finally:
+        await exporter.stop()
+
+    assert not exporter.running
+
+
+@run_async
+async def test_exporter_port_in_use():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        port = sock.getsockname()[1]
+
+        bot = commands.Bot('?')
+
+        # Флаги берутся из модуля, который загрузит расширение
+        from jishaku.flags import Flags  # pylint: disable=import-outside-toplevel
+        Flags.METRICS_PORT = port
+
+        try:
+            bot.load_extension('jishaku')
+            cog = bot.get_cog('Jishaku')
+
+            for _ in range(100):
+                if cog.metrics_error is not None:
+                    break
+
+                await asyncio.sleep(0.02)
+
+            # Занятый порт не мешает загрузке Джишаку, а ошибка видна в jsk metrics
+            assert bot.get_command('jsk metrics')
+            assert cog.metrics_error
+            assert not cog.metrics_exporter.running
+
+            ctx = mock.MagicMock(guild=None)
+            ctx.send = mock.AsyncMock()
+            await cog.jsk_metrics.callback(cog, ctx)
+
+            report = ctx.send.call_args.kwargs['file'].fp.read().decode('utf-8')
+            assert report.startswith(f"# Экспорт не запустился на 127.0.0.1:{port}")
+        finally:
+            Flags.flag_map['METRICS_PORT'].override = None
+
+            bot.unload_extension('jishaku')
+            await bot.close()
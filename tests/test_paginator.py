@@ -11,14 +11,17 @@ jishaku converter test
 
 import asyncio
 import inspect
+import os
 from io import BytesIO
+from unittest import mock
 
 import disnake
 import pytest
 import utils
 from disnake.ext import commands
 
-from jishaku.paginators import FilePaginator, PaginatorEmbedInterface, PaginatorInterface, WrappedPaginator
+from jishaku.paginators import (FilePaginator, LazyFilePaginator, PaginatorEmbedInterface, PaginatorInterface,
+                                RingBufferPaginator, WrappedFilePaginator, WrappedPaginator)
 
 
 def test_file_paginator():
@@ -66,6 +69,58 @@ def test_file_paginator():
         FilePaginator(BytesIO("one\ntwo\nthree\nfour".encode('utf-8')), line_span=(-1, 20))
 
 
+def test_lazy_file_paginator(tmp_path):
+    base_text = inspect.cleandoc("""
+    #!/usr/bin/env python
+    # -*- coding: cp932 -*-
+    pass  # \u3088\u308d\u3057\u304f
+    """)
+
+    for data in (base_text.encode("utf-8"), base_text.encode("cp932")):
+        assert list(LazyFilePaginator(BytesIO(data)).pages) == FilePaginator(BytesIO(data)).pages
+        assert list(LazyFilePaginator(BytesIO(data), line_span=(2, 3)).pages) == \
+            FilePaginator(BytesIO(data), line_span=(2, 3)).pages
+
+    with pytest.raises(UnicodeDecodeError):
+        LazyFilePaginator(BytesIO("\u3088\u308d\u3057\u304f".encode("cp932")))
+
+    with pytest.raises(ValueError):
+        LazyFilePaginator(BytesIO("one\ntwo\nthree\nfour".encode('utf-8')), line_span=(-1, 20))
+
+    with pytest.raises(ValueError):
+        LazyFilePaginator(BytesIO("one\ntwo\nthree\nfour".encode('utf-8')), line_span=(2, 5))
+
+    # Большой отображаемый файл, включая строку, которую нужно переносить
+    lines = [f"line {index} \u00e9" * (index % 7) for index in range(20_000)] + ["long " * 2000]
+    path = tmp_path / "big.txt"
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+    with open(path, "rb") as file:
+        paginator = LazyFilePaginator(file, max_size=1985)
+
+    assert paginator.indexed
+    assert all(len(page) <= 1985 for page in paginator.pages)
+    assert "".join(page[3:-4] for page in paginator.pages).replace("\n", "") == "".join(lines)
+
+    with open(path, "rb") as file:
+        assert list(LazyFilePaginator(file, line_span=(15_000, 15_002), max_size=1985).pages) == \
+            WrappedFilePaginator(file, line_span=(15_000, 15_002), max_size=1985).pages
+
+    # В работающем цикле индекс строится в фоне
+    async def background():
+        with open(path, "rb") as file:
+            paginator = LazyFilePaginator(file, max_size=1985)
+
+        assert paginator.pages[0].startswith("```\n")
+        assert paginator.index_task is not None
+
+        await paginator.index_task
+        return paginator
+
+    paginator = asyncio.get_event_loop().run_until_complete(background())
+    assert paginator.indexed
+
+
 def test_wrapped_paginator():
     paginator = WrappedPaginator(max_size=200)
     paginator.add_line("abcde " * 50)
@@ -76,6 +131,62 @@ def test_wrapped_paginator():
     assert len(paginator.pages) == 2
 
 
+def test_ring_buffer_paginator():
+    reference = WrappedPaginator(prefix="```sh", max_size=200)
+    paginator = RingBufferPaginator(prefix="```sh", max_size=200, max_pages=3)
+
+    for index in range(500):
+        reference.add_line(f"line {index} \u3088\u308d\u3057\u304f")
+        paginator.add_line(f"line {index} \u3088\u308d\u3057\u304f")
+
+    assert paginator.spilled
+    assert len(paginator._pages.ring) == 3
+
+    # Старые страницы перечитываются с диска и отрисовываются так же
+    assert len(paginator._pages) == len(reference._pages)
+    assert list(paginator._pages) == reference._pages
+
+    file = paginator.log_file()
+
+    try:
+        assert file.fp.read().decode('utf-8').splitlines() == [
+            f"line {index} \u3088\u308d\u3057\u304f" for index in range(500)
+        ]
+    finally:
+        file.close()
+
+    assert list(paginator.pages) == reference.pages
+
+    log_path = paginator.log_path
+    paginator.close()
+
+    assert not os.path.exists(log_path)
+
+    # После закрытия вытесненные страницы показываются заглушками, а страницы в памяти остаются
+    pages = list(paginator.pages)
+    assert "журнал уже закрыт" in pages[0]
+    assert pages[-3:] == reference.pages[-3:]
+
+    # Журнал ограничен по размеру, а не записанные в него страницы после вытеснения показываются заглушками
+    capped_reference = WrappedPaginator(prefix="```sh", max_size=200)
+    capped = RingBufferPaginator(prefix="```sh", max_size=200, max_pages=3, max_log_size=1000)
+
+    try:
+        for index in range(500):
+            capped_reference.add_line(f"line {index}")
+            capped.add_line(f"line {index}")
+
+        assert capped.log_truncated
+        assert os.path.getsize(capped.log_path) <= 1000
+
+        pages = list(capped.pages)
+        assert pages[0] == capped_reference.pages[0]
+        assert "журнал достиг предела" in pages[len(pages) - 4]
+        assert "line 499" in pages[-1]
+    finally:
+        capped.close()
+
+
 @pytest.mark.skipif(
     disnake.version_info >= (2, 0, 0),
     reason="Тесты с реакционной моделью границы раздела Paginator"
@@ -328,3 +439,49 @@ async def test_paginator_interface_reactions():
         assert interface.closed
 
 # TODO: Написать тест на интерфейс на основе взаимодействий на основе взаимодействий
+
+
+@utils.run_async
+async def test_paginator_interface_add_lines():
+    bot = commands.Bot('?')
+
+    paginator = WrappedPaginator(max_size=200)
+    paginator.add_line("header")
+    interface = PaginatorInterface(bot, paginator)
+
+    await interface.add_lines(f"line {index}" for index in range(100))
+
+    reference = WrappedPaginator(max_size=200)
+    reference.add_line("header")
+    for index in range(100):
+        reference.add_line(f"line {index}")
+
+    assert interface.pages == reference.pages
+    assert interface.page_count > 1
+
+    # Интерфейс был на последней странице, поэтому он должен следовать за хвостом
+    assert interface.display_page == interface.page_count - 1
+    assert interface.send_lock.is_set()
+
+
+def test_paginator_interface_linear_streaming():
+    async def stream(count):
+        bot = commands.Bot('?')
+        paginator = WrappedPaginator(prefix="```sh", max_size=1975)
+        paginator.add_line("$ find /")
+        interface = PaginatorInterface(bot, paginator)
+
+        with mock.patch.object(PaginatorInterface, 'get_page', autospec=True) as get_page, \
+                mock.patch.object(PaginatorInterface, 'pages', new_callable=mock.PropertyMock) as pages:
+            for index in range(count):
+                await interface.add_line(f"/some/path/number/{index}")
+
+        # Добавление строк не пересобирает и не рендерит страницы, сколько бы их ни было
+        assert get_page.call_count == 0
+        assert pages.call_count == 0
+
+        assert interface.page_count > 1
+        assert interface.display_page == interface.page_count - 1
+        assert interface.pages[-1] == interface.get_page(interface.page_count - 1)
+
+    asyncio.get_event_loop().run_until_complete(stream(20_000))
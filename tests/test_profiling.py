@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.profiling test
+~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import time
+from xml.etree import ElementTree
+
+from utils import run_async
+
+from jishaku.profiling import CProfileSession, ProfilingSession, StackSampler, TracemallocSession, render_flamegraph
+from jishaku.repl import AsyncCodeExecutor
+
+
+def busy_work():
+    end = time.perf_counter() + 0.2
+    while time.perf_counter() < end:
+        pass
+
+
+async def sleepy_work():
+    await asyncio.sleep(0.2)
+
+
+async def profiled_command():
+    busy_work()
+    await sleepy_work()
+
+
+@run_async
+async def test_stack_sampler():
+    task = asyncio.get_event_loop().create_task(profiled_command())
+
+    with StackSampler(task, interval=0.005) as sampler:
+        await task
+
+    assert sampler.sample_count > 20
+    assert sampler.duration >= 0.4
+
+    stacks = list(sampler.samples)
+
+    # И работа в потоке, и ожидание попадают в выборки под корутиной задачи
+    assert any('busy_work' in stack[-1] and 'profiled_command' in stack[0] for stack in stacks)
+    assert any(stack[-1].startswith('<await') and any('sleepy_work' in name for name in stack) for stack in stacks)
+
+    for line in sampler.collapsed().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert stack.startswith('profiled_command')
+        assert int(count) > 0
+
+    top = sampler.top(5)
+    names = [name for name, _, _ in top]
+    assert any('busy_work' in name for name in names)
+
+    for name, own, cumulative in top:
+        assert own <= cumulative <= sampler.sample_count
+
+    svg = render_flamegraph(sampler.samples, title="test <profile>")
+    root = ElementTree.fromstring(svg)
+    assert root.tag.endswith('svg')
+    assert 'busy_work' in svg
+
+
+@run_async
+async def test_stack_sampler_late_task():
+    async def fast_command():
+        busy_work()
+
+    with StackSampler(interval=0.005) as sampler:
+        assert sampler.sample() is None
+
+        # Задача, созданная под выборкой, попадает в неё с самого начала
+        sampler.task = asyncio.get_event_loop().create_task(fast_command())
+        await sampler.task
+
+    assert sampler.sample_count > 10
+    assert all('fast_command' in stack[0] for stack in sampler.samples)
+    assert any('busy_work' in stack[-1] for stack in sampler.samples)
+
+
+async def allocating_work():
+    await asyncio.sleep(0.1)
+    return [bytearray(1024) for _ in range(1000)]
+
+
+@run_async
+async def test_cprofile_session():
+    profiler = CProfileSession()
+
+    async def noise():
+        busy_work()
+
+    with profiler:
+        # Работа других задач во время ожидания не попадает в профиль
+        noise_task = asyncio.get_event_loop().create_task(noise())
+        await profiler.wrap(profiled_command())
+        await noise_task
+
+    report = profiler.report()
+
+    assert profiler.wall_time >= 0.35
+    assert 0.15 <= profiler.active_time < 0.35
+    assert 'profiled_command' in report
+    assert 'busy_work' in report
+    assert 'noise' not in report
+
+    results = []
+
+    with CProfileSession() as profiler:
+        async for result in profiler.wrap_iterator(AsyncCodeExecutor('yield 1\nyield 2')):
+            results.append(result)
+
+    assert results == [1, 2]
+    assert '_repl_coroutine' in profiler.report()
+
+
+@run_async
+async def test_tracemalloc_session():
+    with TracemallocSession() as profiler:
+        result = await profiler.wrap(allocating_work())
+
+    report = profiler.report()
+
+    assert len(result) == 1000
+    assert 'test_profiling.py' in report
+    assert 'KiB' in report
+
+    with ProfilingSession() as profiler:
+        pass
+
+    assert profiler.report() is None
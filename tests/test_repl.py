@@ -9,14 +9,17 @@ jishaku.repl internal test
 
 """
 
+import asyncio
 import inspect
 import random
 import sys
+import threading
+from unittest import mock
 
 import pytest
 from utils import mock_ctx, run_async
 
-from jishaku.repl import AsyncCodeExecutor, Scope, get_parent_var, get_var_dict_from_ctx
+from jishaku.repl import AsyncCodeExecutor, CodeCache, Scope, get_parent_var, get_var_dict_from_ctx
 
 
 def upper_method():
@@ -175,3 +178,142 @@ def test_var_dict(scope):
         assert scope.globals['_ctx'] is ctx
         assert scope.globals['_bot'] is ctx.bot
         assert scope.globals['_message'] is ctx.message
+
+
+@run_async
+async def test_http_helpers():
+    from aiohttp import ClientSession, web
+
+    async def handle(request):
+        return web.json_response({'path': request.path})
+
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+
+    port = site._server.sockets[0].getsockname()[1]
+    base = f'http://127.0.0.1:{port}'
+
+    try:
+        async with ClientSession() as session:
+            var_dict = get_var_dict_from_ctx(mock.MagicMock(), session=session)
+
+            assert (await var_dict['_http_get_json'](f'{base}/one')) == {'path': '/one'}
+            assert (await var_dict['_http_post_json'](f'{base}/two')) == {'path': '/two'}
+
+            chunks = [chunk async for chunk in var_dict['_http_stream'](f'{base}/three', chunk_size=4)]
+            assert b''.join(chunks) == b'{"path": "/three"}'
+            assert len(chunks) > 1
+
+            results = await var_dict['_http_gather'](*(f'{base}/{index}' for index in range(20)), json=True, concurrency=4)
+            assert results == [{'path': f'/{index}'} for index in range(20)]
+
+        # Без общей сессии помощники создают временную
+        var_dict = get_var_dict_from_ctx(mock.MagicMock())
+
+        assert (await var_dict['_http_get_bytes'](f'{base}/four')) == b'{"path": "/four"}'
+    finally:
+        await runner.cleanup()
+
+
+@run_async
+async def test_code_cache():
+    cache = CodeCache(maxsize=2)
+
+    first = cache.compile('1 + 1', '_async_executor')
+    assert cache.compile('1 + 1', '_async_executor') is first
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+
+    # Другие имена аргументов дают другую запись
+    assert cache.compile('1 + 1', '_async_executor, x') is not first
+
+    cache.compile('2 + 2', '_async_executor')
+    assert len(cache) == 2
+
+    # Самая старая запись вытеснена
+    cache.compile('1 + 1', '_async_executor')
+    assert cache.misses == 4
+
+    with pytest.raises(SyntaxError):
+        cache.compile('1 +', '_async_executor')
+
+    assert len(cache) == 2
+
+    # Закешированный код по-прежнему получает свежие аргументы
+    for value in (3, 5):
+        results = [result async for result in AsyncCodeExecutor('x * 2', arg_dict={'x': value})]
+        assert results == [value * 2]
+
+
+@run_async
+async def test_process_executor():
+    # Импорт здесь, так как тесты кога перезагружают модули jishaku, а процессы получают функции по имени
+    from jishaku.repl.process import ProcessExecutor, ProcessPoolRecycled
+
+    async def collect(*args, **kwargs):
+        return [result async for result in executor.run(*args, **kwargs)]
+
+    executor = ProcessExecutor(processes=2, max_tasks_per_child=3)
+
+    try:
+        assert (await collect('sum(range(_))', {'_': 10, 'unpicklable': lambda: None})) == [45]
+        worker, = executor.workers
+        # Непередаваемые результаты возвращаются как repr
+        first, second = await collect('yield 1\nyield lambda: None')
+        assert first == 1
+        assert second.startswith('<function')
+
+        with pytest.raises(ZeroDivisionError):
+            await collect('1 / 0')
+
+        # Ошибка не убивает процесс, но после max_tasks_per_child фрагментов он пересоздаётся
+        assert executor.workers == [] and not worker.process.is_alive()
+
+        # Результаты приходят по мере выдачи, а не по завершении фрагмента
+        results = executor.run('import time\nyield 1\ntime.sleep(30)\nyield 2')
+        assert (await asyncio.wait_for(results.__anext__(), timeout=15)) == 1
+        stuck, = executor.busy
+
+        # Пока этот фрагмент занят, другой выполняется в соседнем процессе
+        other = asyncio.ensure_future(collect('import time\ntime.sleep(1)\nyield 3'))
+        await asyncio.sleep(0.5)
+
+        # Закрытие генератора убивает только процесс своего фрагмента
+        await results.aclose()
+
+        assert not stuck.process.is_alive()
+        assert (await other) == [3]
+
+        # Зависший фрагмент убивается по тайм-ауту, а следующий получает новый процесс
+        with pytest.raises(asyncio.TimeoutError):
+            await collect('import time\ntime.sleep(30)', timeout=0.5)
+
+        assert executor.busy == set()
+        assert (await collect('2 + 2')) == [4]
+
+        # Закрытие убивает выполняющиеся фрагменты, не занимая цикл событий
+        running = asyncio.ensure_future(collect('import time\ntime.sleep(30)'))
+        await asyncio.sleep(0.5)
+
+        threads = []
+        kill_all = executor.kill_all
+
+        def record_kill(workers):
+            threads.append(threading.get_ident())
+            kill_all(workers)
+
+        with mock.patch.object(executor, 'kill_all', side_effect=record_kill):
+            await executor.terminate()
+
+        assert executor.workers == []
+        assert threads and threading.get_ident() not in threads
+
+        with pytest.raises(ProcessPoolRecycled):
+            await running
+    finally:
+        await executor.terminate()
\ No newline at end of file
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.scheduler test
+~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+from unittest import mock
+
+import disnake
+from utils import run_async
+
+from jishaku.scheduler import EditScheduler, RateBucket
+
+
+class FakeInterface:
+    def __init__(self, channel_id, fail_with=None):
+        self.message = mock.MagicMock()
+        self.message.channel.id = channel_id
+        self.edits = 0
+        self.fail_with = fail_with
+        self.task = None
+        self.closed = False
+
+    async def send_edit(self):
+        if self.fail_with:
+            exception, self.fail_with = self.fail_with, None
+            raise exception
+
+        self.edits += 1
+
+
+def test_rate_bucket():
+    bucket = RateBucket(2, 1.0)
+
+    assert bucket.wait_time(bucket.updated) == 0
+    bucket.consume()
+    bucket.consume()
+
+    assert bucket.wait_time(bucket.updated) > 0
+    assert bucket.wait_time(bucket.updated + 0.5) == 0
+
+
+@run_async
+async def test_edit_scheduler_coalescing():
+    scheduler = EditScheduler(min_delay=0.05)
+
+    first = FakeInterface(1)
+    second = FakeInterface(2)
+
+    for _ in range(10):
+        scheduler.request(first)
+        scheduler.request(second)
+
+    await asyncio.sleep(0.2)
+
+    assert first.edits == 1
+    assert second.edits == 1
+    assert scheduler.edits_sent == 2
+    assert scheduler.edits_merged == 18
+
+    # Убранные интерфейсы не редактируются
+    scheduler.request(first)
+    scheduler.discard(first)
+
+    await asyncio.sleep(0.2)
+
+    assert first.edits == 1
+
+    scheduler.task.cancel()
+
+
+@run_async
+async def test_edit_scheduler_ratelimit():
+    scheduler = EditScheduler(min_delay=0.05)
+
+    response = mock.MagicMock(status=429, reason="Too Many Requests")
+    interface = FakeInterface(1, fail_with=disnake.HTTPException(response, "rate limited"))
+
+    scheduler.request(interface)
+    await asyncio.sleep(0.5)
+
+    # Неудачная правка повторяется после отката
+    assert scheduler.ratelimits == 1
+    assert interface.edits == 1
+    assert scheduler.stats['edits_sent'] == 1
+
+    scheduler.task.cancel()
+
+
+@run_async
+async def test_edit_scheduler_errors():
+    scheduler = EditScheduler(min_delay=0.05)
+
+    # Удалённое сообщение закрывает интерфейс и больше не редактируется
+    interface = FakeInterface(1, fail_with=disnake.NotFound(mock.MagicMock(status=404), "unknown message"))
+    interface.task = mock.MagicMock()
+
+    scheduler.request(interface)
+    await asyncio.sleep(0.2)
+
+    assert interface.message is None
+    interface.task.cancel.assert_called_once()
+    assert interface not in scheduler.pending
+
+    # Ограничение скорости не повторяется для уже закрытого интерфейса
+    response = mock.MagicMock(status=429, reason="Too Many Requests")
+    interface = FakeInterface(2, fail_with=disnake.HTTPException(response, "rate limited"))
+    interface.closed = True
+
+    scheduler.request(interface)
+    await asyncio.sleep(0.5)
+
+    assert scheduler.ratelimits == 1
+    assert interface.edits == 0
+
+    scheduler.task.cancel()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.shard_monitor test
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import types
+
+from jishaku.shard_monitor import ShardMonitor, percentile
+
+
+def make_socket(latency: float, sequence: int = None, close_code: int = None):
+    return types.SimpleNamespace(latency=latency, sequence=sequence, open=close_code is None, _close_code=close_code)
+
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([3.0], 0.95) == 3.0
+
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 1.0) == 100.0
+
+
+def test_shard_monitor():
+    sockets = {0: make_socket(0.05, 10), 1: make_socket(float('inf'))}
+
+    bot = types.SimpleNamespace(
+        shards={
+            shard_id: types.SimpleNamespace(_parent=types.SimpleNamespace(ws=ws))
+            for shard_id, ws in sockets.items()
+        },
+        guilds=[types.SimpleNamespace(shard_id=shard_id) for shard_id in (0, 0, 1)]
+    )
+
+    monitor = ShardMonitor(bot, capacity=3)
+    monitor.sample()
+
+    sockets[0].latency = 0.15
+    sockets[0].sequence = 40
+    health = monitor.shards[0]
+    health.sampled_at -= 2
+    monitor.sample()
+
+    assert health.event_rate is not None and health.event_rate > 0
+    assert len(monitor.shards[1].latencies) == 0
+
+    # Буфер задержек кольцевой
+    for _ in range(5):
+        monitor.sample()
+
+    assert len(health.latencies) == 3
+
+    sockets[1].open = False
+    sockets[1]._close_code = 4009
+    monitor.record_disconnect(1)
+    monitor.record_resume(0)
+
+    first, second = monitor.report()
+
+    assert first.shard_id == 0
+    assert first.latency == 0.15
+    assert first.max == 0.15
+    assert first.guilds == 2
+    assert first.resumes == 1
+    assert not first.closed
+
+    assert second.latency is None
+    assert second.p95 is None
+    assert second.disconnects == 1
+    assert second.last_reason.startswith("4009")
+    assert second.guilds == 1
+    assert second.closed
@@ -10,11 +10,15 @@ jishaku.shell test
 """
 
 import asyncio
+import os
 import sys
+from unittest import mock
 
 import pytest
+from disnake.ext import commands
 from utils import run_async
 
+from jishaku.codeblocks import Codeblock
 from jishaku.shell import ShellReader
 
 
@@ -61,6 +65,77 @@ async def test_linux():
     assert return_data[1] == "two"
 
 
+@pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="Тесты с синтаксисом SH только Linux."
+)
+@pytest.mark.parametrize("native", [True, False])
+@run_async
+async def test_reader_modes(native):
+    return_data = []
+
+    async with ShellReader("echo one; >&2 echo two; printf three; exit 3", native=native) as reader:
+        assert reader.native is native
+
+        async for result in reader:
+            return_data.append(result)
+
+    assert sorted(return_data) == ["[stderr] two", "one", "three"]
+    assert reader.close_code == 3
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="Тесты с синтаксисом SH только Linux."
+)
+@run_async
+async def test_native_backpressure():
+    count = ShellReader.queue_size * 4
+
+    async with ShellReader(f"seq 1 {count}", native=True) as reader:
+        return_data = [result async for result in reader]
+
+    assert return_data == [str(x) for x in range(1, count + 1)]
+    assert reader.close_code == 0
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="Тесты с синтаксисом SH только Linux."
+)
+@pytest.mark.parametrize("native", [True, False])
+@run_async
+async def test_reader_batches(native):
+    batches = []
+
+    async with ShellReader("seq 1 1000; printf '\\033[31mred\\033[0m'", native=native) as reader:
+        async for batch in reader.batches(max_lines=300, max_delay=0.1):
+            batches.append(batch)
+
+    assert all(0 < len(batch) <= 300 for batch in batches)
+    assert [line for batch in batches for line in batch] == [*map(str, range(1, 1001)), "red"]
+
+    batches = []
+
+    async with ShellReader("echo one; sleep 0.5; echo two", native=native) as reader:
+        async for batch in reader.batches(max_delay=0.1):
+            batches.append(batch)
+
+    assert batches == [["one"], ["two"]]
+
+    with pytest.raises(asyncio.TimeoutError):
+        async with ShellReader("sleep 2", timeout=1, native=native) as reader:
+            async for batch in reader.batches():
+                pass
+
+
+def test_clean_chunk():
+    chunk = b'Downloading \x1b[K\nline2 a\nline3\nsummary done\nmore'
+
+    assert ShellReader.clean_chunk(chunk) == ['Downloading ', 'line2 a', 'line3', 'summary done', 'more']
+    assert ShellReader.clean_chunk(b'\x1b[1;31mred\x1b[0m\r\n\x1b[?25lok', '> ') == ['> red', '> ok']
+
+
 @pytest.mark.skipif(
     sys.platform != "win32",
     reason="Тесты с синтаксисом CMD только для Windows"
@@ -79,3 +154,54 @@ async def test_windows():
     assert "one" in return_data
     assert "two" in return_data
     assert "[stderr] three" in return_data
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="Тесты с синтаксисом SH только Linux."
+)
+@run_async
+async def test_jsk_shell_ring_log():
+    bot = commands.Bot('?')
+    bot.load_extension('jishaku')
+    cog = bot.get_cog('Jishaku')
+
+    # Выгрузка расширения убирает модули Джишаку, так что флаги берутся из только что загруженного
+    from jishaku.flags import Flags  # pylint: disable=import-outside-toplevel
+    from jishaku.paginators import RingBufferPaginator  # pylint: disable=import-outside-toplevel
+
+    created = []
+
+    class RecordedPaginator(RingBufferPaginator):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    ctx = mock.MagicMock()
+    ctx.bot = bot
+    ctx.send = mock.AsyncMock(return_value=mock.MagicMock(edit=mock.AsyncMock(), delete=mock.AsyncMock()))
+    ctx.message.add_reaction = mock.AsyncMock()
+
+    try:
+        Flags.SHELL_RING_PAGES = 2
+        Flags.FILE_SIZE_LIMIT = 20_000
+
+        with mock.patch('jishaku.features.shell.RingBufferPaginator', RecordedPaginator):
+            await cog.jsk_shell.callback(cog, ctx, argument=Codeblock('', 'seq 1 20000'))
+
+        paginator, = created
+
+        # Журнал приложен, ограничен пределом и удалён после сессии
+        assert paginator.log_truncated
+        assert paginator.log.closed
+        assert not os.path.exists(paginator.log_path)
+
+        content, = ctx.send.call_args.args
+        assert "Журнал обрезан после 20000 байт" in content
+        assert ctx.send.call_args.kwargs['file'].filename == "shell.log"
+    finally:
+        Flags.flag_map['SHELL_RING_PAGES'].override = None
+        Flags.flag_map['FILE_SIZE_LIMIT'].override = None
+
+        bot.unload_extension('jishaku')
+        await bot.close()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku startup cost test
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+from disnake.ext import commands
+
+# Тяжёлые модули, которые должны импортироваться только командами, которым они нужны
+DEFERRED_MODULES = ('pkg_resources', 'psutil', 'aiohttp.web', 'youtube_dl', 'importlib.metadata')
+
+# Бюджеты с большим запасом: тест ловит возврат тяжёлых импортов, а не колебания машины
+IMPORT_BUDGET = 3.0
+LOAD_BUDGET = 1.0
+
+STARTUP_CODE = f"""
+import json, sys, time
+
+started = time.perf_counter()
+import jishaku
+elapsed = time.perf_counter() - started
+
+print(json.dumps({{
+    'elapsed': elapsed,
+    'loaded': [name for name in {DEFERRED_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def test_import_cost():
+    # Отдельный процесс, чтобы импорт был холодным, а не из уже загруженных модулей
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_CODE], capture_output=True, check=True, text=True, timeout=60
+    )
+    report = json.loads(result.stdout.splitlines()[-1])
+
+    assert report['loaded'] == []
+    assert report['elapsed'] < IMPORT_BUDGET
+
+
+def test_load_extension_cost():
+    bot = commands.Bot('?')
+
+    try:
+        started = time.perf_counter()
+        bot.load_extension('jishaku')
+        elapsed = time.perf_counter() - started
+
+        assert bot.get_command('jsk')
+        assert elapsed < LOAD_BUDGET
+
+        bot.unload_extension('jishaku')
+    finally:
+        bot.loop.run_until_complete(bot.close())
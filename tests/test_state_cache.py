@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.state_cache test
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import collections
+import json
+import types
+import weakref
+
+from utils import run_async
+
+from jishaku.state_cache import estimate_size, measure_cache
+
+
+class FakeModel:
+    __slots__ = ('id', 'name', 'roles', '__weakref__')
+
+    def __init__(self, model_id: int):
+        self.id = model_id
+        self.name = f"model {model_id}"
+        self.roles = [1, 2, 3]
+
+
+def make_guild(guild_id: int, members: int):
+    return types.SimpleNamespace(
+        id=guild_id,
+        name=f"guild {guild_id}",
+        _members={index: FakeModel(index) for index in range(members)},
+        _channels={1: FakeModel(1)},
+        _roles={},
+        emojis=(FakeModel(2),),
+    )
+
+
+@run_async
+async def test_measure_cache():
+    users = {index: FakeModel(index) for index in range(5000)}
+
+    state = types.SimpleNamespace(
+        _users=weakref.WeakValueDictionary(users),
+        _guilds={1: make_guild(1, 10), 2: make_guild(2, 3000)},
+        _emojis={},
+        _messages=collections.deque([FakeModel(0)], maxlen=1000),
+    )
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker_task = asyncio.get_event_loop().create_task(ticker())
+    report = await measure_cache(types.SimpleNamespace(_connection=state), time_slice=0.0001, sample_size=100)
+    ticker_task.cancel()
+
+    # Обход отдаёт управление циклу между срезами
+    assert report.slices > 1
+    assert ticks > 1
+
+    assert report.stores['users'].count == 5000
+    assert report.stores['guild.members'].count == 3010
+    assert report.stores['messages'].count == 1
+    assert 'guild.emojis' not in report.stores
+
+    # Размер оценивается по выборке, поэтому сравнивается только порядок величины
+    model_size = estimate_size(FakeModel(1000))
+    assert 4000 * model_size < report.stores['users'].size < 6000 * model_size
+
+    top = report.top_guilds(1)
+    assert top[0].id == 2
+    assert top[0].stores['members'].count == 3000
+    assert top[0].stores['emojis'].count == 1
+
+    data = json.loads(json.dumps(report.to_dict(guild_limit=1)))
+    assert data['stores']['users'] == {'count': 5000, 'size': report.stores['users'].size}
+    assert [guild['id'] for guild in data['guilds']] == [2]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.task_monitor test
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import time
+
+from utils import run_async
+
+from jishaku.task_monitor import TaskMonitor, describe_tasks, format_task_stack
+
+
+async def waiting_inner(event: asyncio.Event):
+    await event.wait()
+
+
+async def waiting_task(event: asyncio.Event):
+    end = time.thread_time() + 0.05
+    while time.thread_time() < end:
+        pass
+
+    await waiting_inner(event)
+
+
+@run_async
+async def test_task_monitor():
+    loop = asyncio.get_event_loop()
+    monitor = TaskMonitor()
+    event = asyncio.Event()
+
+    monitor.install(loop)
+
+    try:
+        task = loop.create_task(waiting_task(event), name="jsk-test-waiter")
+        await asyncio.sleep(0.1)
+
+        infos = {info.name: info for info in describe_tasks(loop, monitor)}
+        info = infos["jsk-test-waiter"]
+
+        assert info.coroutine == 'waiting_task'
+        assert info.age >= 0.05
+        assert 0.04 <= info.cpu_time < 0.5
+        assert info.steps >= 1
+        assert 'test_task_monitor' in info.site
+        assert info.await_point.startswith('waiting_inner')
+
+        stack = format_task_stack(task)
+        assert 'waiting_task' in stack
+        assert 'await event.wait()' in stack
+        assert 'Ожидает' in stack
+
+        event.set()
+        await task
+    finally:
+        monitor.uninstall()
+
+    assert loop.get_task_factory() is None
+    assert not monitor.installed
+
+    # После снятия монитора задачи всё ещё видны, но без учёта
+    other = loop.create_task(asyncio.sleep(0.1), name="jsk-test-unmonitored")
+    infos = {info.name: info for info in describe_tasks(loop, monitor)}
+
+    assert infos["jsk-test-unmonitored"].cpu_time is None
+    other.cancel()
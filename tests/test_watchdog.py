@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.watchdog test
+~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (Gorialis) R
+:license: MIT, Смотрите лицензию для более подробной информации.
+
+"""
+
+import asyncio
+import time
+
+from utils import run_async
+
+from jishaku.watchdog import LoopWatchdog
+
+
+def blocking_call():
+    time.sleep(0.4)
+
+
+@run_async
+async def test_loop_watchdog():
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.02, capacity=2)
+    watchdog.start()
+
+    try:
+        await asyncio.sleep(0.1)
+        assert watchdog.running
+        assert not watchdog.stalls
+
+        blocking_call()
+        await asyncio.sleep(0.1)
+
+        stalls = watchdog.stalls
+        assert len(stalls) == 1
+
+        stall = stalls[0]
+        assert stall.duration >= 0.3
+        assert any('blocking_call' in frame for frame in stall.stack)
+        assert 'test_loop_watchdog' in stall.task
+
+        # Хранятся только худшие зависания
+        for _ in range(2):
+            time.sleep(0.15)
+            await asyncio.sleep(0.05)
+
+        assert watchdog.stall_count == 3
+        assert len(watchdog.stalls) == 2
+        assert watchdog.stalls[0] is stall
+
+        watchdog.clear()
+        assert not watchdog.stalls
+    finally:
+        watchdog.stop()